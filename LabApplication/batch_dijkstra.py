@@ -0,0 +1,87 @@
+from csr import CSRGraph
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappush, heappop
+from array import array
+import numpy as np
+
+# Read only graph shared with the worker processes, set once per worker by _init_worker
+_shared_graph = None
+
+
+def _init_worker(csr):
+    global _shared_graph
+    _shared_graph = csr
+
+
+def _dijkstra_ids(csr, source):
+    # O((V + E) * log V) over the integer ids of a CSRGraph with a lazy deletion heap.
+    # Returns the distance row (inf when unreachable) and the parent row (-1 for none).
+    n = csr.get_v()
+    offsets, targets, weights = csr.offsets, csr.targets, csr.weights
+    distance = [float('inf')] * n
+    parent = [-1] * n
+    done = bytearray(n)
+    distance[source] = 0
+    heap = [(0, source)]
+    while heap:
+        d, u = heappop(heap)
+        if done[u]:
+            continue
+        done[u] = 1
+        for p in range(offsets[u], offsets[u + 1]):
+            v = targets[p]
+            new_distance = d + weights[p]
+            if new_distance < distance[v]:
+                distance[v] = new_distance
+                parent[v] = u
+                heappush(heap, (new_distance, v))
+    return array('d', distance), array('q', parent)
+
+
+def _rows(source_ids):
+    return [_dijkstra_ids(_shared_graph, source) for source in source_ids]
+
+
+# O(S * (V + E) * log V / workers)
+# Distance matrix from every vertex of sources to every vertex of g, one row per source and one column
+# per vertex in the order of g.get_vertices(). With parents=True a matrix of parent column indices
+# (-1 for none) is returned as well.
+def dijkstra_many(g, sources, workers=1, parents=False):
+    csr = g if isinstance(g, CSRGraph) else CSRGraph.from_graph(g)
+    source_ids = []
+    for source in sources:
+        if not csr.is_vertex(source):
+            raise ValueError("Vertex not in graph")
+        source_ids.append(csr.id_of(source))
+
+    if workers > 1 and len(source_ids) > 1:
+        chunk = -(-len(source_ids) // workers)
+        chunks = [source_ids[i:i + chunk] for i in range(0, len(source_ids), chunk)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(csr,)) as pool:
+            rows = [row for part in pool.map(_rows, chunks) for row in part]
+    else:
+        _init_worker(csr)
+        rows = _rows(source_ids)
+
+    distances = np.empty((len(source_ids), csr.get_v()), dtype=np.float64)
+    parent_matrix = np.empty((len(source_ids), csr.get_v()), dtype=np.int64) if parents else None
+    for k, (distance_row, parent_row) in enumerate(rows):
+        distances[k] = np.frombuffer(distance_row, dtype=np.float64)
+        if parents:
+            parent_matrix[k] = np.frombuffer(parent_row, dtype=np.int64)
+    if parents:
+        return distances, parent_matrix
+    return distances
+
+
+if __name__ == "__main__":
+    import time
+    from graph import Graph
+
+    g = Graph.create_from_file("A3_v10000_e40000_positives_7.txt")
+    sources = g.get_vertices()[:100]
+    for workers in (1, 4):
+        start_time = time.perf_counter()
+        matrix = dijkstra_many(g, sources, workers=workers)
+        print(f"{len(sources)} sources, {workers} workers: {(time.perf_counter() - start_time) * 1000:.2f}ms, "
+              f"matrix {matrix.shape}")
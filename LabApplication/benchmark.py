@@ -0,0 +1,248 @@
+from graph import *
+from positions import VertexPositions
+from generators import GENERATORS, generate, subdivided_graph
+from utility import dijkstra, A_star
+from kruskal import kruskal
+from reduction import reducing
+import instrumentation
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Non interactive benchmark suite: every task runs on synthetic graphs (see generators.py) of several kinds
+# and scales, the results (best wall time over the repeats, peak traced memory of a separate run and the
+# algorithm counters) are written to JSON and compared against a baseline recorded on the same machine.
+#
+#   python benchmark.py --update-baseline             # record benchmark_baseline.json once, before a change
+#   python benchmark.py --scales 1000 10000 --output results.json
+#
+# The exit status is 1 when a task got slower or bigger than the baseline allows. The counters only depend
+# on the seed, a change there means an algorithm now does different work and is reported as well.
+# Wall times only compare on the machine that recorded them, so the baseline is not part of the repository
+# (it is ignored by git): every checkout records its own, and a baseline from another machine or Python
+# is reported before the comparison.
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+
+class _Case:
+    # One generated graph, its text files and the vertices the path queries run between
+    def __init__(self, kind, n, seed, directory):
+        self.graph, self.positions = generate(kind, n, seed)
+        self.graph_file = os.path.join(directory, "{}_{}.txt".format(kind, n))
+        self.graph.save_to_file(self.graph_file)
+        self.positions_file = None
+        if self.positions is not None:
+            self.positions_file = os.path.join(directory, "{}_{}_vertex_positions.txt".format(kind, n))
+            self.positions.save(self.positions_file)
+        vertices = self.graph.get_vertices()
+        self.source, self.goal = vertices[0], vertices[-1]
+
+
+def _load(case):
+    g = Graph.create_from_file(case.graph_file)
+    counters = {"vertices": g.get_v(), "edges": g.get_e()}
+    if case.positions_file is not None:
+        counters["positions"] = len(VertexPositions.from_file(case.positions_file))
+    return counters
+
+
+def _dijkstra(case):
+    distance = dijkstra(case.graph, case.source)[1]
+    return {"reached": sum(1 for value in distance.values() if value != float('inf'))}
+
+
+def _A_star(case):
+    g_score = A_star(case.graph, case.source, case.goal, heuristic=case.positions)[1]
+    return {"cost": g_score[case.goal]}
+
+
+def _kruskal(case):
+    tree_edges = kruskal(case.graph, forest=True, edges_only=True)
+    return {"tree_weight": sum(weight for _, _, weight in tree_edges)}
+
+
+def _BFS(case):
+    iterator = case.graph.BFS_iter(case.source)
+    for _ in iterator:
+        pass
+    return {"depth": iterator.get_path_length()}
+
+
+def _DFS(case):
+    for _ in case.graph.DFS_iter(case.source):
+        pass
+    return {}
+
+
+def _reducing_setup(case):
+    # reducing changes its graph, every run gets fresh subdivisions (not timed)
+    return subdivided_graph(case.graph, 2, "a"), subdivided_graph(case.graph, 1, "b")
+
+
+def _reducing(graph, target_graph):
+    reducing(graph, target_graph)
+    return {"vertices": graph.get_v()}
+
+
+# name -> (setup, run, needs positions), setup(case) returns the arguments of run, None passes the case
+TASKS = {
+    "load": (None, _load, False),
+    "dijkstra": (None, _dijkstra, False),
+    "A_star": (None, _A_star, True),
+    "kruskal": (None, _kruskal, False),
+    "BFS": (None, _BFS, False),
+    "DFS": (None, _DFS, False),
+    "reducing": (_reducing_setup, _reducing, False),
+}
+
+
+def _arguments(setup, case):
+    return (case,) if setup is None else setup(case)
+
+
+def run_task(name, case, repeat, memory=True, profile=None):
+    # Returns {"time_ms", "counters", "phases", "peak_kib", "hot_spots"} for one task. time_ms is the best
+    # of repeat runs with the instrumentation off, the counters (the task's own and the ones the algorithms
+    # report) and phase times come from one recorded run, which also samples the hot spots every profile
+    # seconds. tracemalloc slows everything down, so the peak memory comes from one more run of its own.
+    setup, run, _ = TASKS[name]
+    best = float('inf')
+    for _ in range(repeat):
+        arguments = _arguments(setup, case)
+        start_time = time.perf_counter()
+        run(*arguments)
+        best = min(best, (time.perf_counter() - start_time) * 1000)
+    arguments = _arguments(setup, case)
+    with instrumentation.recording(sample_interval=profile) as recorder:
+        counters = run(*arguments)
+    recorded = recorder.to_dict()
+    counters.update(recorded["counters"])
+    result = {"time_ms": round(best, 3), "counters": counters, "phases": recorded["phases"]}
+    if "samples" in recorded:
+        result["hot_spots"] = recorded["samples"]["hot_spots"]
+    if memory:
+        arguments = _arguments(setup, case)
+        tracemalloc.start()
+        try:
+            run(*arguments)
+            result["peak_kib"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def run_suite(kinds, scales, tasks, repeat=3, seed=0, memory=True, profile=None, log=print):
+    # Returns {"kind/scale/task": result} for every combination (A_star only for kinds with positions)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for kind in kinds:
+            for n in scales:
+                start_time = time.perf_counter()
+                case = _Case(kind, n, seed, directory)
+                log("{}/{}: {} vertices, {} edges generated in {:.2f}ms".format(
+                    kind, n, case.graph.get_v(), case.graph.get_e(), (time.perf_counter() - start_time) * 1000))
+                for name in tasks:
+                    if TASKS[name][2] and case.positions is None:
+                        continue
+                    key = "{}/{}/{}".format(kind, n, name)
+                    results[key] = run_task(name, case, repeat, memory, profile)
+                    log("  {:10} {:10.2f}ms {:>12} {}".format(
+                        name, results[key]["time_ms"],
+                        "{:.1f}KiB".format(results[key]["peak_kib"]) if "peak_kib" in results[key] else "",
+                        results[key]["counters"]))
+    return results
+
+
+def compare(results, baseline, tolerance=0.5, memory_tolerance=0.1, min_delta=1.0):
+    # Returns (regressions, changes): a regression is a task more than tolerance and min_delta ms slower
+    # (memory_tolerance bigger) than the baseline, a change is a task whose counters differ. Tasks missing
+    # on either side are skipped. min_delta keeps the timer noise of sub-millisecond tasks out.
+    regressions, changes = [], []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        if result["time_ms"] > max(old["time_ms"] * (1 + tolerance), old["time_ms"] + min_delta):
+            regressions.append("{}: {:.2f}ms, baseline {:.2f}ms".format(key, result["time_ms"], old["time_ms"]))
+        if "peak_kib" in result and "peak_kib" in old and result["peak_kib"] > old["peak_kib"] * (1 + memory_tolerance):
+            regressions.append("{}: {:.1f}KiB peak, baseline {:.1f}KiB".format(key, result["peak_kib"], old["peak_kib"]))
+        if result["counters"] != old["counters"]:
+            changes.append("{}: counters {}, baseline {}".format(key, result["counters"], old["counters"]))
+    return regressions, changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the graph algorithms on synthetic graphs.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000],
+                        help="vertex counts to generate (10^3 .. 10^6)")
+    parser.add_argument("--kinds", nargs="+", choices=sorted(GENERATORS), default=sorted(GENERATORS))
+    parser.add_argument("--tasks", nargs="+", choices=list(TASKS), default=list(TASKS))
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per task, the best one is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("--profile", type=float, metavar="MS",
+                        help="sample the stack every MS milliseconds in the recorded run and keep the hot spots")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative slowdown")
+    parser.add_argument("--min-delta", type=float, default=1.0, help="slowdowns below this many ms are ignored")
+    parser.add_argument("--memory-tolerance", type=float, default=0.1, help="allowed relative peak memory growth")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the baseline")
+    args = parser.parse_args(argv)
+
+    profile = args.profile / 1000 if args.profile else None
+    results = run_suite(args.kinds, args.scales, args.tasks, args.repeat, args.seed, not args.no_memory, profile)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r') as f:
+                baseline = json.load(f)
+        # Keep the entries of kinds/scales that did not run this time
+        merged = dict(baseline.get("results", {}))
+        merged.update(results)
+        report["results"] = dict(sorted(merged.items()))
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print("Baseline written to {}".format(args.baseline))
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline at {}, run with --update-baseline to create one".format(args.baseline))
+        return 0
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    if baseline.get("seed") != args.seed:
+        print("Baseline was recorded with seed {}, counters are not comparable".format(baseline.get("seed")))
+    if (baseline.get("python"), baseline.get("machine")) != (report["python"], report["machine"]):
+        print("Baseline was recorded with Python {} on {}, times are not comparable, run --update-baseline".format(
+            baseline.get("python"), baseline.get("machine")))
+    regressions, changes = compare(results, baseline["results"], args.tolerance, args.memory_tolerance,
+                                  args.min_delta)
+    for line in changes:
+        print("Changed:    " + line)
+    for line in regressions:
+        print("Regression: " + line)
+    if not regressions:
+        print("No regressions against {}".format(args.baseline))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+from graph import *
+from heapq import heappush, heappop
+import json
+import random
+import time
+
+CH_FORMAT_VERSION = 1
+
+
+def _witness_distances(out_adjacency, source, excluded, targets, limit, max_settled):
+    # O(max_settled * log max_settled), Dijkstra from source that ignores the vertex being contracted
+    # and stops once every target is settled, the limit distance is passed or max_settled is reached
+    distance = {source: 0}
+    heap = [(0, source)]
+    settled = 0
+    remaining = set(targets)
+    while heap and remaining and settled < max_settled:
+        d, u = heappop(heap)
+        if d > distance[u]:
+            continue
+        if d > limit:
+            break
+        settled += 1
+        remaining.discard(u)
+        for w, (weight, _) in out_adjacency[u].items():
+            if w == excluded:
+                continue
+            new_distance = d + weight
+            if new_distance < distance.get(w, float('inf')):
+                distance[w] = new_distance
+                heappush(heap, (new_distance, w))
+    return distance
+
+
+class ContractionHierarchy:
+    # Contraction hierarchy of a static graph.
+    # Vertices are contracted from least to most important (estimated edge difference + contracted
+    # neighbours), adding a shortcut u -> w of weight w(u, v) + w(v, w) whenever contracting v would
+    # otherwise lose the only shortest u -> w path. Queries then only follow edges towards more
+    # important vertices: forward from the start and backward into the goal. Contraction stops at a
+    # dense core, which queries cross with a bidirectional Dijkstra.
+    def __init__(self, names, rank, edges, directed=True):
+        # Theta(V + E), edges are (u, w, weight, middle) id tuples, middle is -1 for original edges
+        self.__names = names
+        self.__index = {name: i for i, name in enumerate(names)}
+        self.__rank = rank
+        self.__edges = edges
+        self.__directed = directed
+        self.__up = [[] for _ in names]
+        self.__down = [[] for _ in names]
+        self.__middle = {}
+        top = max(rank, default=0)
+        self.__core = [r == top for r in rank]
+        for u, w, weight, middle in edges:
+            self.__middle[(u, w)] = middle
+            # Edges inside the core (equal ranks) are usable by both searches
+            if rank[w] >= rank[u]:
+                self.__up[u].append((w, weight))
+            if rank[w] <= rank[u]:
+                self.__down[w].append((u, weight))
+
+    @classmethod
+    def build(cls, g, max_settled=50, core_degree=16):
+        # O(V * (witness searches)) preprocessing, max_settled bounds every witness search.
+        # Contraction stops once the remaining graph averages more than core_degree edges per vertex,
+        # those core vertices share the top rank and keep their edges in both query directions.
+        names = g.get_vertices()
+        index = {name: i for i, name in enumerate(names)}
+        n = len(names)
+        out_adjacency = [dict() for _ in range(n)]
+        in_adjacency = [dict() for _ in range(n)]
+        for i, name in enumerate(names):
+            for neighbour, weight in g.out_edges(name):
+                j = index[neighbour]
+                if i == j:
+                    continue
+                known = out_adjacency[i].get(j)
+                if known is None or weight < known[0]:
+                    out_adjacency[i][j] = (weight, -1)
+                    in_adjacency[j][i] = (weight, -1)
+        remaining_edges = sum(len(neighbours) for neighbours in out_adjacency)
+
+        def shortcuts_for(v):
+            # Shortcuts needed if v were contracted now: [(u, w, weight)]
+            shortcuts = []
+            outgoing = out_adjacency[v]
+            if not outgoing:
+                return shortcuts
+            for u, (in_weight, _) in in_adjacency[v].items():
+                targets = [w for w in outgoing if w != u]
+                if not targets:
+                    continue
+                limit = in_weight + max(outgoing[w][0] for w in targets)
+                distance = _witness_distances(out_adjacency, u, v, targets, limit, max_settled)
+                for w in targets:
+                    via = in_weight + outgoing[w][0]
+                    if distance.get(w, float('inf')) > via:
+                        shortcuts.append((u, w, via))
+            return shortcuts
+
+        contracted_neighbours = [0] * n
+
+        def priority(v):
+            removed = len(in_adjacency[v]) + len(out_adjacency[v])
+            return len(in_adjacency[v]) * len(out_adjacency[v]) - removed + contracted_neighbours[v]
+
+        heap = [(priority(v), v) for v in range(n)]
+        heap.sort()
+        rank = [0] * n
+        edges = []
+        level = 0
+        while heap:
+            if remaining_edges > core_degree * len(heap):
+                break
+            _, v = heappop(heap)
+            # Lazy update: re-evaluate and put back if another vertex is now cheaper to contract
+            current = priority(v)
+            if heap and current > heap[0][0]:
+                heappush(heap, (current, v))
+                continue
+
+            for u, w, weight in shortcuts_for(v):
+                known = out_adjacency[u].get(w)
+                if known is None or weight < known[0]:
+                    if known is None:
+                        remaining_edges += 1
+                    out_adjacency[u][w] = (weight, v)
+                    in_adjacency[w][u] = (weight, v)
+
+            rank[v] = level
+            level += 1
+            remaining_edges -= len(out_adjacency[v]) + len(in_adjacency[v])
+            for w, (weight, middle) in out_adjacency[v].items():
+                edges.append((v, w, weight, middle))
+                del in_adjacency[w][v]
+                contracted_neighbours[w] += 1
+            for u, (weight, middle) in in_adjacency[v].items():
+                edges.append((u, v, weight, middle))
+                del out_adjacency[u][v]
+                contracted_neighbours[u] += 1
+            out_adjacency[v] = {}
+            in_adjacency[v] = {}
+
+        # Core: every vertex left shares the top rank
+        for _, v in heap:
+            rank[v] = level
+            for w, (weight, middle) in out_adjacency[v].items():
+                edges.append((v, w, weight, middle))
+        return cls(names, rank, edges, g.directed() == "directed")
+
+    def get_core_size(self):
+        # Theta(V)
+        return sum(self.__core)
+
+    def get_shortcut_count(self):
+        # Theta(1)
+        return sum(1 for edge in self.__edges if edge[3] >= 0)
+
+    def __unpack(self, u, w):
+        # O(length of the unpacked path), original vertices from u to w without u
+        path = []
+        stack = [(u, w)]
+        while stack:
+            a, b = stack.pop()
+            middle = self.__middle[(a, b)]
+            if middle < 0:
+                path.append(b)
+            else:
+                stack.append((middle, b))
+                stack.append((a, middle))
+        return path
+
+    def query(self, start, goal):
+        # Returns path, cost, settled where settled counts the vertices popped by both searches.
+        # Phase 1 runs the two upward searches without expanding core vertices, phase 2 continues
+        # from the core vertices they reached with a bidirectional Dijkstra inside the core.
+        if start not in self.__index or goal not in self.__index:
+            raise ValueError("Start or goal vertex not in graph")
+        s, t = self.__index[start], self.__index[goal]
+        adjacency = (self.__up, self.__down)
+        core = self.__core
+        distance = ({s: 0}, {t: 0})
+        parent = ({s: -1}, {t: -1})
+        best = 0 if s == t else float('inf')
+        meeting = s if s == t else -1
+        settled = 0
+
+        entries = ([], [])
+        for side, root in ((0, s), (1, t)):
+            heap = [(0, root)]
+            done = set()
+            while heap:
+                d, u = heappop(heap)
+                if u in done:
+                    continue
+                done.add(u)
+                settled += 1
+                if core[u]:
+                    entries[side].append((d, u))
+                    continue
+                for w, weight in adjacency[side][u]:
+                    new_distance = d + weight
+                    if new_distance < distance[side].get(w, float('inf')):
+                        distance[side][w] = new_distance
+                        parent[side][w] = u
+                        heappush(heap, (new_distance, w))
+        for u, d in distance[0].items():
+            through = distance[1].get(u)
+            if through is not None and d + through < best:
+                best = d + through
+                meeting = u
+
+        heaps = entries
+        for heap in heaps:
+            heap.sort()
+        done = (set(), set())
+        while heaps[0] and heaps[1] and heaps[0][0][0] + heaps[1][0][0] < best:
+            side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+            d, u = heappop(heaps[side])
+            if u in done[side] or d > distance[side][u]:
+                continue
+            done[side].add(u)
+            settled += 1
+            for w, weight in adjacency[side][u]:
+                new_distance = d + weight
+                if new_distance < distance[side].get(w, float('inf')):
+                    distance[side][w] = new_distance
+                    parent[side][w] = u
+                    heappush(heaps[side], (new_distance, w))
+                through = distance[1 - side].get(w)
+                if through is not None and distance[side][w] + through < best:
+                    best = distance[side][w] + through
+                    meeting = w
+
+        if meeting < 0:
+            return [], best, settled
+
+        up_path = [meeting]
+        while parent[0][up_path[-1]] >= 0:
+            up_path.append(parent[0][up_path[-1]])
+        up_path.reverse()
+        down_path = [meeting]
+        while parent[1][down_path[-1]] >= 0:
+            down_path.append(parent[1][down_path[-1]])
+
+        hierarchy_path = up_path + down_path[1:]
+        path = [s]
+        for u, w in zip(hierarchy_path, hierarchy_path[1:]):
+            path.extend(self.__unpack(u, w))
+        return [self.__names[v] for v in path], best, settled
+
+    def save(self, filename):
+        with open(filename, 'w') as f:
+            json.dump({"version": CH_FORMAT_VERSION, "directed": self.__directed, "names": self.__names,
+                       "rank": self.__rank, "edges": self.__edges}, f)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'r') as f:
+            data = json.load(f)
+        if data.get("version") != CH_FORMAT_VERSION:
+            raise ValueError("Unsupported contraction hierarchy format {}".format(data.get("version")))
+        return cls(data["names"], data["rank"], [tuple(edge) for edge in data["edges"]], data["directed"])
+
+
+if __name__ == "__main__":
+    from utility import dijkstra, A_star, bidirectional_dijkstra
+
+    graph_file = "A3_v10000_e40000_positives_7.txt"
+    coordinates_file = "A3_v10000_e40000_positives_7_vertex_positions.txt"
+    queries = 100
+
+    g = Graph.create_from_file(graph_file)
+    g.load_positions(coordinates_file)
+    start_time = time.perf_counter()
+    ch = ContractionHierarchy.build(g)
+    print(f"Preprocessing: {time.perf_counter() - start_time:.2f}s, {ch.get_shortcut_count()} shortcuts, "
+          f"core of {ch.get_core_size()} vertices")
+
+    random.seed(7)
+    vertices = g.get_vertices()
+    pairs = [(random.choice(vertices), random.choice(vertices)) for _ in range(queries)]
+    totals = {"Dijkstra": [0, 0], "A*": [0, 0], "Bi-Dij": [0, 0], "CH": [0, 0]}
+    for start, goal in pairs:
+        start_time = time.perf_counter()
+        _, distance, _, pops = dijkstra(g, start)
+        totals["Dijkstra"][0] += time.perf_counter() - start_time
+        totals["Dijkstra"][1] += pops
+
+        start_time = time.perf_counter()
+        _, _, _, pops = A_star(g, start, goal)
+        totals["A*"][0] += time.perf_counter() - start_time
+        totals["A*"][1] += pops
+
+        start_time = time.perf_counter()
+        _, _, _, pops = bidirectional_dijkstra(g, start, goal)
+        totals["Bi-Dij"][0] += time.perf_counter() - start_time
+        totals["Bi-Dij"][1] += pops
+
+        start_time = time.perf_counter()
+        _, cost, settled = ch.query(start, goal)
+        totals["CH"][0] += time.perf_counter() - start_time
+        totals["CH"][1] += settled
+        if cost != distance[goal]:
+            raise Exception(f"CH returned {cost} instead of {distance[goal]} for {start} -> {goal}")
+
+    print(f"{queries} random queries, averages per query:")
+    print(f"            time   settled")
+    for name, (total_time, total_settled) in totals.items():
+        print(f"{name:8} {total_time / queries * 1000:7.2f}ms {total_settled / queries:8.1f}")
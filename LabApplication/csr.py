@@ -0,0 +1,559 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+from graph import Graph
+from graph_io import GraphFileReader
+from iterators import NeighbourIterator, InboundNeighbourIterator, BFS, DFS
+from positions import VertexPositions
+from mmap import mmap as memory_map, ACCESS_READ
+import struct
+import zlib
+
+BINARY_MAGIC = b"GRAPHCSR"
+BINARY_VERSION = 3
+# magic, version, flags (1 directed, 2 weighted), id typecode, weight typecode, V, stored arcs, E,
+# size of the name table, crc32 of everything after the header, padded to 64 bytes.
+# The name table is V + 1 int64 byte offsets followed by the utf-8 names, so a name may hold any character.
+_BINARY_HEADER = struct.Struct("<8sII1s1s2xQQQQI8x")
+
+
+def _index_typecode(n):
+    # Smallest signed array typecode able to hold ids/offsets up to n
+    return 'i' if n < 2 ** 31 else 'q'
+
+
+def _weight_typecode(weights):
+    return 'q' if all(type(w) is int for w in weights) else 'd'
+
+
+def _name_table(names):
+    # Theta(total name length)
+    encoded = [name.encode("utf-8") for name in names]
+    offsets = array('q', [0])
+    for name in encoded:
+        offsets.append(offsets[-1] + len(name))
+    return offsets.tobytes() + b"".join(encoded)
+
+
+def _read_names(table, n, path):
+    # Theta(total name length), inverse of _name_table
+    offsets = array('q')
+    offsets.frombytes(table[:8 * (n + 1)])
+    blob = bytes(table[8 * (n + 1):])
+    if offsets[n] != len(blob):
+        raise ValueError("{} has a malformed name table".format(path))
+    return [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(n)]
+
+
+def _padding(offset):
+    # Zero bytes bringing the file offset offset to the next multiple of 8, so mapped arrays are aligned
+    return (-offset) % 8
+
+
+def _bucket(n, keys, values, weights, typecode_keys, typecode_values, typecode_weights):
+    # Theta(n + m) counting sort of the (key, value, weight) triples by key.
+    # The relative order of triples with the same key is preserved.
+    offsets = array('q', bytes(8 * (n + 1)))
+    for key in keys:
+        offsets[key + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+
+    m = len(keys)
+    sorted_values = array(typecode_values, bytes(array(typecode_values).itemsize * m))
+    sorted_keys = array(typecode_keys, bytes(array(typecode_keys).itemsize * m))
+    sorted_weights = array(typecode_weights, bytes(array(typecode_weights).itemsize * m))
+    position = offsets[:-1].tolist()
+    for k in range(m):
+        key = keys[k]
+        p = position[key]
+        sorted_values[p] = values[k]
+        sorted_keys[p] = key
+        sorted_weights[p] = weights[k]
+        position[key] = p + 1
+    return offsets, sorted_keys, sorted_values, sorted_weights
+
+
+class _Row(Sequence):
+    # Read only neighbour names of one vertex, a view over a slice of the CSR arrays (nothing is copied)
+    def __init__(self, names, columns, start, stop):
+        self.__names = names
+        self.__columns = columns
+        self.__start = start
+        self.__stop = stop
+
+    def __getitem__(self, position):
+        # Theta(1)
+        if isinstance(position, slice):
+            return [self[p] for p in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("Row index out of range")
+        return self.__names[self.__columns[self.__start + position]]
+
+    def __iter__(self):
+        names, columns = self.__names, self.__columns
+        for p in range(self.__start, self.__stop):
+            yield names[columns[p]]
+
+    def __len__(self):
+        return self.__stop - self.__start
+
+
+class _Rows(Mapping):
+    # Read only vertex name -> neighbour names view over one direction of a CSRGraph
+    def __init__(self, graph, offsets, columns):
+        self.__graph = graph
+        self.__offsets = offsets
+        self.__columns = columns
+
+    def __getitem__(self, vertex):
+        # Theta(1), unknown vertices have no neighbours (like the defaultdict of Graph)
+        i = self.__graph.id_of(vertex, None)
+        if i is None:
+            return ()
+        return _Row(self.__graph.get_names(), self.__columns, self.__offsets[i], self.__offsets[i + 1])
+
+    def __iter__(self):
+        return iter(self.__graph.get_names())
+
+    def __len__(self):
+        return self.__graph.get_v()
+
+
+def _load_mapped(path, flipped):
+    # Unpickles a mapped graph (see CSRGraph.__reduce_ex__)
+    graph = CSRGraph.load_binary(path, True, False)
+    return graph.reversed() if flipped else graph
+
+
+class CSRGraph:
+    # Frozen compressed sparse row graph.
+    # Vertex names are interned to dense ids 0..V-1. The outbound neighbours of id i are
+    # targets[offsets[i]:offsets[i + 1]] (sorted) with the matching entries of weights, and
+    # in_offsets/in_sources/in_weights hold the same layout for the inbound neighbours.
+    # Undirected edges are stored in both directions.
+    def __init__(self, names, directed, weighted, e, offsets, targets, weights, in_offsets, in_sources, in_weights,
+                 source=None, mapped=None, flipped=False):
+        # Theta(1), use from_graph / from_file / from_edges / load_binary to build one
+        self.__names = names
+        self.__index = None
+        self.__directed = directed
+        self.__weighted = weighted
+        self.__e = e
+        self.__offsets = offsets
+        self.__targets = targets
+        self.__weights = weights
+        self.__in_offsets = in_offsets
+        self.__in_sources = in_sources
+        self.__in_weights = in_weights
+        self.__positions = None
+        # Binary snapshot the buffers are mapped from, kept alive together with the views into it
+        self.__source = source
+        self.__mapped = mapped
+        # The mapped file holds the graph before reversed() turned it around
+        self.__reversed = flipped
+
+    @classmethod
+    def from_edges(cls, names, sources, destinations, weights, directed=True, weighted=True):
+        # Theta(V + E): sources/destinations are ids into names, weights matches them one to one
+        n = len(names)
+        e = len(sources)
+        if not directed:
+            # Store every undirected edge in both directions, self loops only once
+            back = [k for k in range(e) if sources[k] != destinations[k]]
+            sources = array(sources.typecode if isinstance(sources, array) else 'q', sources)
+            destinations = array(sources.typecode, destinations)
+            weights = list(weights)
+            sources.extend(destinations[k] for k in back)
+            destinations.extend(sources[k] for k in back)
+            weights.extend(weights[k] for k in back)
+
+        index_code = _index_typecode(n)
+        weight_code = _weight_typecode(weights)
+        # Three stable bucket passes: by destination, then by source (rows sorted by target),
+        # then by destination again (inbound rows sorted by source).
+        _, by_dst_dst, by_dst_src, by_dst_w = _bucket(n, destinations, sources, weights,
+                                                      index_code, index_code, weight_code)
+        offsets, owners, targets, out_weights = _bucket(n, by_dst_src, by_dst_dst, by_dst_w,
+                                                        index_code, index_code, weight_code)
+        in_offsets, _, in_sources, in_weights = _bucket(n, targets, owners, out_weights,
+                                                        index_code, index_code, weight_code)
+        # Rows are sorted, so a repeated edge shows up as two equal neighbouring arcs
+        for p in range(1, len(targets)):
+            if targets[p] == targets[p - 1] and owners[p] == owners[p - 1]:
+                raise ValueError("Edge {} already exists".format((names[owners[p]], names[targets[p]])))
+        return cls(list(names), directed, weighted, e, offsets, targets, out_weights,
+                   in_offsets, in_sources, in_weights)
+
+    @classmethod
+    def from_graph(cls, g):
+        # Theta(V + E)
+        names = g.get_vertices()
+        index = {name: i for i, name in enumerate(names)}
+        edges = g.get_edges()
+        sources = array('q', (index[v1] for v1, _ in edges))
+        destinations = array('q', (index[v2] for _, v2 in edges))
+        return cls.from_edges(names, sources, destinations, list(edges.values()),
+                              g.directed() == "directed", g.weighted() == "weighted")
+
+    @classmethod
+    def from_file(cls, filename):
+        # Theta(V + E), streams the file without building an intermediate Graph
+        names = []
+        index = {}
+        sources = array('q')
+        destinations = array('q')
+        weights = array('q')
+        with GraphFileReader(filename) as reader:
+            directed = reader.directed
+            weighted = reader.weighted
+            for line_number, v1, v2, weight in reader:
+                if v2 is None:
+                    if v1 in index:
+                        raise ValueError("{}, line {}: Vertex already exists".format(filename, line_number))
+                    index[v1] = len(names)
+                    names.append(v1)
+                    continue
+                for vertex in (v1, v2):
+                    if vertex not in index:
+                        index[vertex] = len(names)
+                        names.append(vertex)
+                sources.append(index[v1])
+                destinations.append(index[v2])
+                weights.append(1 if weight is None else weight)
+        return cls.from_edges(names, sources, destinations, weights, directed, weighted)
+
+    def save_binary(self, path):
+        # Theta(V + E), versioned and checksummed snapshot that load_binary can map back in
+        name_table = _name_table(self.__names)
+        offset = _BINARY_HEADER.size + len(name_table)
+        sections = [name_table, bytes(_padding(offset))]
+        offset += _padding(offset)
+        for buffer in (self.__offsets, self.__targets, self.__weights,
+                       self.__in_offsets, self.__in_sources, self.__in_weights):
+            raw = memoryview(buffer).cast('B')
+            offset += len(raw)
+            sections.append(raw)
+            sections.append(bytes(_padding(offset)))
+            offset += _padding(offset)
+        checksum = 0
+        for section in sections:
+            checksum = zlib.crc32(section, checksum)
+        flags = (1 if self.__directed else 0) | (2 if self.__weighted else 0)
+        header = _BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, flags,
+                                     memoryview(self.__targets).format[-1].encode(),
+                                     memoryview(self.__weights).format[-1].encode(),
+                                     len(self.__names), len(self.__targets), self.__e, len(name_table), checksum)
+        with open(path, 'wb') as f:
+            f.write(header)
+            for section in sections:
+                f.write(section)
+
+    @classmethod
+    def load_binary(cls, path, mmap=True, verify=True):
+        # O(V) for the name table; with mmap=True the CSR arrays are views into the shared page cache,
+        # verify=True checks the crc32 of the whole file (one pass in C)
+        with open(path, 'rb') as f:
+            data = memory_map(f.fileno(), 0, access=ACCESS_READ) if mmap else f.read()
+        if len(data) < _BINARY_HEADER.size:
+            raise ValueError("{} is not a binary graph".format(path))
+        magic, version, flags, index_code, weight_code, n, arcs, e, names_size, checksum = \
+            _BINARY_HEADER.unpack_from(data, 0)
+        if magic != BINARY_MAGIC:
+            raise ValueError("{} is not a binary graph".format(path))
+        if version != BINARY_VERSION:
+            raise ValueError("Unsupported binary graph version {}".format(version))
+        body = memoryview(data)[_BINARY_HEADER.size:]
+        if verify and zlib.crc32(body) != checksum:
+            raise ValueError("{} is corrupted (checksum mismatch)".format(path))
+
+        if names_size < 8 * (n + 1) or names_size > len(body):
+            raise ValueError("{} is truncated".format(path))
+        names = _read_names(body[:names_size], n, path)
+        # Offsets into body, the paddings are counted from the start of the file
+        offset = names_size + _padding(_BINARY_HEADER.size + names_size)
+        buffers = []
+        for typecode, count in (('q', n + 1), (index_code.decode(), arcs), (weight_code.decode(), arcs),
+                                ('q', n + 1), (index_code.decode(), arcs), (weight_code.decode(), arcs)):
+            size = array(typecode).itemsize * count
+            if offset + size > len(body):
+                raise ValueError("{} is truncated".format(path))
+            if mmap:
+                buffers.append(body[offset:offset + size].cast(typecode))
+            else:
+                # Owned arrays, so the graph can be pickled without a file behind it
+                buffer = array(typecode)
+                buffer.frombytes(body[offset:offset + size])
+                buffers.append(buffer)
+            offset += size + _padding(_BINARY_HEADER.size + offset + size)
+        return cls(names, bool(flags & 1), bool(flags & 2), e, *buffers,
+                   source=path if mmap else None, mapped=data if mmap else None)
+
+    def __reduce_ex__(self, protocol):
+        # A mapped graph is sent to other processes as its path, they map the same pages instead of copying.
+        # Any other graph goes by value, views into foreign buffers are copied into arrays first.
+        if self.__source is not None:
+            return _load_mapped, (self.__source, self.__reversed)
+        buffers = [buffer if isinstance(buffer, array) else array(memoryview(buffer).format[-1], buffer)
+                   for buffer in (self.__offsets, self.__targets, self.__weights,
+                                  self.__in_offsets, self.__in_sources, self.__in_weights)]
+        return CSRGraph, (self.__names, self.__directed, self.__weighted, self.__e, *buffers)
+
+    def reversed(self):
+        # Theta(1), the same graph with every edge turned around, sharing all buffers
+        reverse = CSRGraph(self.__names, self.__directed, self.__weighted, self.__e,
+                           self.__in_offsets, self.__in_sources, self.__in_weights,
+                           self.__offsets, self.__targets, self.__weights,
+                           source=self.__source, mapped=self.__mapped, flipped=not self.__reversed)
+        reverse.__index = self.__index
+        return reverse
+
+    def with_weights(self, weights, in_weights):
+        # Theta(1) (Theta(V + E) for a mapped graph), the same arcs with new weights: weights follows targets and
+        # in_weights follows in_sources. The arcs of an undirected graph may now differ per direction, so the
+        # result is directed. The structure buffers are shared, except for a mapped graph whose pickled form
+        # (its path) would bring back the old weights; those are copied.
+        if len(weights) != len(self.__targets) or len(in_weights) != len(self.__in_sources):
+            raise ValueError("Weights do not match the edges")
+        buffers = (self.__offsets, self.__targets, self.__in_offsets, self.__in_sources)
+        if self.__source is not None:
+            buffers = [array(memoryview(buffer).format[-1], buffer) for buffer in buffers]
+        offsets, targets, in_offsets, in_sources = buffers
+        graph = CSRGraph(self.__names, True, self.__weighted, len(targets), offsets, targets, weights,
+                         in_offsets, in_sources, in_weights)
+        graph.__index = self.__index
+        return graph
+
+    def to_graph(self):
+        # Theta(V + E), mutable copy
+        g = Graph()
+        if self.__directed:
+            g.change_if_directed()
+        if not self.__weighted:
+            g.change_if_weighted()
+        for name in self.__names:
+            g.add_vertex(name)
+        for edge, weight in self.get_edges().items():
+            g.add_edge(edge, weight)
+        return g
+
+    def id_of(self, vertex, default=...):
+        # Theta(1) amortized, the name index is built on first use
+        if self.__index is None:
+            self.__index = {name: i for i, name in enumerate(self.__names)}
+        i = self.__index.get(vertex)
+        if i is None:
+            if default is ...:
+                raise ValueError("Vertex {} is not in the graph".format(vertex))
+            return default
+        return i
+
+    def name_of(self, i):
+        # Theta(1)
+        return self.__names[i]
+
+    def get_names(self):
+        # Theta(1), id -> name table (do not modify)
+        return self.__names
+
+    @property
+    def offsets(self):
+        return memoryview(self.__offsets).toreadonly()
+
+    @property
+    def targets(self):
+        return memoryview(self.__targets).toreadonly()
+
+    @property
+    def weights(self):
+        return memoryview(self.__weights).toreadonly()
+
+    @property
+    def in_offsets(self):
+        return memoryview(self.__in_offsets).toreadonly()
+
+    @property
+    def in_sources(self):
+        return memoryview(self.__in_sources).toreadonly()
+
+    @property
+    def in_weights(self):
+        return memoryview(self.__in_weights).toreadonly()
+
+    def nbytes(self):
+        # Theta(1), size of the CSR buffers (the name table is not counted)
+        return sum(memoryview(a).nbytes for a in (self.__offsets, self.__targets, self.__weights,
+                                                 self.__in_offsets, self.__in_sources, self.__in_weights))
+
+    def __find(self, i, j):
+        # O(log deg(i)), position of the arc i -> j in targets or -1
+        lo, hi = self.__offsets[i], self.__offsets[i + 1]
+        p = bisect_left(self.__targets, j, lo, hi)
+        if p < hi and self.__targets[p] == j:
+            return p
+        return -1
+
+    def get_v(self):
+        # Theta(1)
+        return len(self.__names)
+
+    def get_e(self):
+        # Theta(1)
+        return self.__e
+
+    def get_version(self):
+        # Theta(1), a CSRGraph never changes
+        return 0
+
+    def is_vertex(self, vertex):
+        # Theta(1)
+        return self.id_of(vertex, None) is not None
+
+    def is_edge(self, vertex1, vertex2):
+        # O(log deg(vertex1))
+        i = self.id_of(vertex1, None)
+        j = self.id_of(vertex2, None)
+        if i is None or j is None:
+            return False
+        return self.__find(i, j) >= 0
+
+    def get_weight(self, edge):
+        # O(log deg(edge[0]))
+        if not self.__weighted:
+            raise ValueError("Graph is unweighted")
+        i = self.id_of(edge[0], None)
+        j = self.id_of(edge[1], None)
+        p = -1 if i is None or j is None else self.__find(i, j)
+        if p < 0:
+            raise ValueError("Edge {} does not exist".format(edge))
+        return self.__weights[p]
+
+    def out_edges(self, vertex):
+        # Theta(deg(vertex)), (neighbour, weight) pairs of the outbound edges of vertex
+        i = self.id_of(vertex, None)
+        if i is None:
+            return ()
+        names = self.__names
+        start, stop = self.__offsets[i], self.__offsets[i + 1]
+        return [(names[j], weight) for j, weight in zip(self.__targets[start:stop], self.__weights[start:stop])]
+
+    def in_edges(self, vertex):
+        # Theta(deg(vertex)), (neighbour, weight) pairs of the inbound edges of vertex
+        i = self.id_of(vertex, None)
+        if i is None:
+            return ()
+        names = self.__names
+        start, stop = self.__in_offsets[i], self.__in_offsets[i + 1]
+        return [(names[j], weight) for j, weight in zip(self.__in_sources[start:stop], self.__in_weights[start:stop])]
+
+    def get_vertices(self):
+        # Theta(v)
+        return list(self.__names)
+
+    def get_edges(self):
+        # Theta(e), undirected edges are reported once as (lower id, higher id)
+        names = self.__names
+        edges = {}
+        for i in range(len(names)):
+            for p in range(self.__offsets[i], self.__offsets[i + 1]):
+                j = self.__targets[p]
+                if self.__directed or i <= j:
+                    edges[(names[i], names[j])] = self.__weights[p]
+        return edges
+
+    def adjacency(self):
+        # Theta(1)
+        return _Rows(self, self.__offsets, self.__targets)
+
+    def inbound_adjacency(self):
+        # Theta(1)
+        return _Rows(self, self.__in_offsets, self.__in_sources)
+
+    def neighbors(self, vertex):
+        return NeighbourIterator(self, vertex)
+
+    def neighbors_array(self, vertex, ids=False):
+        # Theta(deg(vertex)) NumPy array of the outbound neighbour names in one call.
+        # ids=True returns their ids instead, a read only view of the CSR arrays (Theta(1), no copy).
+        import numpy as np
+        i = self.id_of(vertex)
+        view = np.frombuffer(self.__targets, dtype=memoryview(self.__targets).format)
+        view = view[self.__offsets[i]:self.__offsets[i + 1]]
+        view.flags.writeable = False
+        if ids:
+            return view
+        return np.array([self.__names[j] for j in view.tolist()])
+
+    def inbound_neighbours(self, vertex):
+        return InboundNeighbourIterator(self, vertex)
+
+    def BFS_iter(self, vertex):
+        return BFS(self, vertex)
+
+    def DFS_iter(self, vertex):
+        return DFS(self, vertex)
+
+    def frontier_BFS_iter(self, vertex, direction_optimizing=False):
+        from traversal import FrontierBFS
+        return FrontierBFS(self, vertex, direction_optimizing)
+
+    def as_undirected(self):
+        # Theta(1), read only view with every edge usable both ways (see views.py)
+        from views import UndirectedView
+        return UndirectedView(self)
+
+    def as_unweighted(self):
+        # Theta(1), read only view with every edge weighing 1 (see views.py)
+        from views import UnweightedView
+        return UnweightedView(self)
+
+    def size_of_outbound_neighbours(self, vertex):
+        # Theta(1)
+        i = self.id_of(vertex)
+        return self.__offsets[i + 1] - self.__offsets[i]
+
+    def size_of_inbound_neighbours(self, vertex):
+        # Theta(1)
+        i = self.id_of(vertex)
+        return self.__in_offsets[i + 1] - self.__in_offsets[i]
+
+    def count_neighbours(self, vertex):
+        return self.size_of_outbound_neighbours(vertex)
+
+    def load_positions(self, filename):
+        # Theta(V), attaches the coordinate store used by get_coordinates and A_star
+        self.__positions = VertexPositions.from_file(filename)
+        return self.__positions
+
+    def get_positions(self, filename=None):
+        # Theta(1) once loaded, a different positions file replaces the attached one
+        if filename is not None and (self.__positions is None or self.__positions.filename != filename):
+            return self.load_positions(filename)
+        if self.__positions is None:
+            raise ValueError("No vertex positions loaded")
+        return self.__positions
+
+    def get_coordinates(self, vertex, filename=None):
+        # Theta(1) once the positions are loaded
+        return self.get_positions(filename).get_coordinates(vertex)
+
+    def directed(self):
+        if self.__directed:
+            return "directed"
+        return "undirected"
+
+    def weighted(self):
+        if self.__weighted:
+            return "weighted"
+        return "unweighted"
+
+    def __str__(self):
+        s = str()
+        for edge, weight in self.get_edges().items():
+            s += str(edge[0]) + ' ' + str(edge[1]) + ' ' + str(weight) + '\n'
+        for i, name in enumerate(self.__names):
+            if self.__offsets[i] == self.__offsets[i + 1] and self.__in_offsets[i] == self.__in_offsets[i + 1]:
+                s += str(name) + '\n'
+        return str(f"{self.directed()} {self.weighted()} \n{s}\n")
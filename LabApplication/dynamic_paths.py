@@ -0,0 +1,235 @@
+from graph import *
+from utility import dijkstra, reconstruct_path
+from collections import defaultdict
+from heapq import heappush, heappop
+import random
+import time
+
+
+class ShortestPathTree:
+    # Single source shortest path tree that follows the mutations of a Graph (non negative weights).
+    # Ramalingam-Reps style repair: a cheaper or new edge only re-settles the vertices it improves, a
+    # removed or more expensive tree edge resets the subtree below it, which is re-seeded from the
+    # unaffected in-neighbours of its vertices and re-settled with Dijkstra. Changes to non tree edges
+    # that make them more expensive cost Theta(1).
+    def __init__(self, g, source, parent=None, distance=None):
+        # Theta(V) given the parent and distance maps of dijkstra(g, source), which is run otherwise
+        if parent is None or distance is None:
+            parent, distance, _, _ = dijkstra(g, source)
+        self.__graph = g
+        self.__source = source
+        self.__parent = dict(parent)
+        self.__distance = dict(distance)
+        self.__children = defaultdict(set)
+        for vertex, vertex_parent in self.__parent.items():
+            if vertex_parent is not None:
+                self.__children[vertex_parent].add(vertex)
+        self.__touched = set()
+        self.__total_touched = 0
+        self.__updates = 0
+        g.subscribe(self.__on_change)
+
+    def close(self):
+        # Stops following the graph
+        self.__graph.unsubscribe(self.__on_change)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get_source(self):
+        return self.__source
+
+    def get_distance(self, vertex):
+        # Theta(1), inf when vertex is unreachable
+        if vertex not in self.__distance:
+            raise ValueError("Vertex {} is not in the graph".format(vertex))
+        return self.__distance[vertex]
+
+    def get_distances(self):
+        # Theta(V)
+        return self.__distance.copy()
+
+    def get_parents(self):
+        # Theta(V)
+        return self.__parent.copy()
+
+    def get_path(self, goal):
+        # O(V), [] when goal is unreachable
+        if self.get_distance(goal) == float('inf'):
+            return []
+        return reconstruct_path(self.__parent, goal)
+
+    def get_touched(self):
+        # Theta(1), vertices reset or re-settled by the last update
+        return len(self.__touched)
+
+    def get_total_touched(self):
+        return self.__total_touched
+
+    def get_update_count(self):
+        return self.__updates
+
+    def __set_parent(self, vertex, parent):
+        old_parent = self.__parent.get(vertex)
+        if old_parent is not None:
+            self.__children[old_parent].discard(vertex)
+        self.__parent[vertex] = parent
+        if parent is not None:
+            self.__children[parent].add(vertex)
+
+    def __arcs(self, edge):
+        if self.__graph.directed() == "directed":
+            return [edge]
+        return [edge, (edge[1], edge[0])]
+
+    def __on_change(self, event, *args):
+        self.__touched = set()
+        if event == "add_vertex":
+            self.__parent[args[0]] = None
+            self.__distance[args[0]] = float('inf')
+        elif event == "remove_vertex":
+            self.__remove_vertices([args[0]])
+        elif event == "remove_vertices":
+            self.__remove_vertices(args[0])
+        elif event == "add_edge":
+            for arc in self.__arcs(args[0]):
+                self.__decreased(arc, args[1])
+        elif event == "remove_edge":
+            self.__increased([args[0]])
+        elif event == "remove_edges":
+            self.__increased([edge for edge, _ in args[0]])
+        elif event == "set_weight":
+            edge, old_weight, new_weight = args
+            if new_weight < old_weight:
+                for arc in self.__arcs(edge):
+                    self.__decreased(arc, new_weight)
+            elif new_weight > old_weight:
+                self.__increased([edge])
+        elif event == "reset":
+            self.__recompute()
+        self.__total_touched += len(self.__touched)
+        self.__updates += 1
+
+    def __recompute(self):
+        # O((V + E) * log V), Theta(V) once the source is gone (nothing is reachable)
+        if self.__graph.is_vertex(self.__source):
+            parent, distance, _, _ = dijkstra(self.__graph, self.__source)
+        else:
+            vertices = self.__graph.get_vertices()
+            parent = dict.fromkeys(vertices)
+            distance = dict.fromkeys(vertices, float('inf'))
+        self.__parent = {}
+        self.__distance = distance
+        self.__children = defaultdict(set)
+        for vertex, vertex_parent in parent.items():
+            self.__set_parent(vertex, vertex_parent)
+        self.__touched = set(distance)
+
+    def __settle(self, heap):
+        # O(k * log k) for the k vertices whose distance improves, Dijkstra from the seeded heap
+        distance = self.__distance
+        while heap:
+            d, vertex = heappop(heap)
+            if d > distance[vertex]:
+                continue
+            self.__touched.add(vertex)
+            for neighbour, weight in self.__graph.out_edges(vertex):
+                new_distance = d + weight
+                if new_distance < distance[neighbour]:
+                    distance[neighbour] = new_distance
+                    self.__set_parent(neighbour, vertex)
+                    heappush(heap, (new_distance, neighbour))
+
+    def __decreased(self, arc, weight):
+        # O(k * log k), k improved vertices
+        u, v = arc
+        new_distance = self.__distance[u] + weight
+        if new_distance < self.__distance[v]:
+            self.__distance[v] = new_distance
+            self.__set_parent(v, u)
+            self.__settle([(new_distance, v)])
+
+    def __increased(self, edges):
+        # Theta(len(edges)) unless some of them are tree edges, their subtrees are then repaired together
+        roots = [v for edge in edges for u, v in self.__arcs(edge) if self.__parent.get(v) == u]
+        if roots:
+            self.__repair(roots)
+
+    def __remove_vertices(self, vertices):
+        # The vertices are already gone from the graph: they leave the tree first, then the subtrees
+        # that hung below them are repaired together
+        removed = set(vertices)
+        roots = []
+        for vertex in vertices:
+            roots.extend(self.__children.pop(vertex, ()))
+            self.__set_parent(vertex, None)
+            del self.__parent[vertex]
+            del self.__distance[vertex]
+        self.__touched.update(vertices)
+        if self.__source in removed:
+            # Nothing is reachable any more
+            for other in self.__parent:
+                self.__set_parent(other, None)
+                self.__distance[other] = float('inf')
+            self.__touched.update(self.__parent)
+        else:
+            roots = [vertex for vertex in roots if vertex not in removed]
+            if roots:
+                self.__repair(roots)
+        # Detaching the children above left empty child sets behind for the removed vertices
+        for vertex in vertices:
+            self.__children.pop(vertex, None)
+
+    def __repair(self, roots):
+        # O(k * log k + edges into the k vertices below roots)
+        affected = []
+        stack = list(roots)
+        while stack:
+            vertex = stack.pop()
+            affected.append(vertex)
+            stack.extend(self.__children[vertex])
+        affected_set = set(affected)
+        self.__touched.update(affected)
+        distance = self.__distance
+        for vertex in affected:
+            self.__set_parent(vertex, None)
+            distance[vertex] = float('inf')
+        heap = []
+        for vertex in affected:
+            for neighbour, weight in self.__graph.in_edges(vertex):
+                if neighbour in affected_set:
+                    continue
+                new_distance = distance[neighbour] + weight
+                if new_distance < distance[vertex]:
+                    distance[vertex] = new_distance
+                    self.__set_parent(vertex, neighbour)
+            if distance[vertex] < float('inf'):
+                heappush(heap, (distance[vertex], vertex))
+        self.__settle(heap)
+
+
+if __name__ == "__main__":
+    g = Graph.create_from_file("A3_v10000_e40000_positives_7.txt")
+    source = g.get_vertices()[0]
+    tree = ShortestPathTree(g, source)
+    edges = list(g.get_edges().items())
+    random.seed(7)
+    updates = 200
+    repair_time = 0
+    recompute_time = 0
+    for _ in range(updates):
+        edge, weight = random.choice(edges)
+        start_time = time.perf_counter()
+        g.set_weight(edge, max(0, weight + random.randint(-weight, weight)))
+        repair_time += time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        _, distance, _, _ = dijkstra(g, source)
+        recompute_time += time.perf_counter() - start_time
+        if distance != tree.get_distances():
+            raise Exception(f"Repaired tree differs from dijkstra after changing {edge}")
+    print(f"{updates} weight updates on {g.get_v()} vertices")
+    print(f"repair:    {repair_time / updates * 1000:7.3f}ms, {tree.get_total_touched() / updates:8.1f} vertices touched")
+    print(f"recompute: {recompute_time / updates * 1000:7.3f}ms, {g.get_v():8} vertices touched")
@@ -0,0 +1,121 @@
+from graph import *
+from positions import VertexPositions
+import math
+import random
+
+# Synthetic graphs for benchmarks. Every generator is deterministic for a given seed, names the vertices
+# "0" .. "n-1" and builds the Graph in one batch. Weights are positive integers like the A3 files.
+
+
+def random_geometric_graph(n, degree=8, seed=0, directed=False):
+    # Expected Theta(n * degree): n points spread uniformly over a square of side 10 * sqrt(n), every pair
+    # closer than the radius giving an average of degree neighbours is joined. The weight is the distance
+    # rounded up, so the euclidean distance of the positions is an admissible A* heuristic.
+    # Returns the graph and its VertexPositions.
+    generator = random.Random(seed)
+    side = 10 * math.sqrt(n)
+    radius = math.sqrt(degree / math.pi) * 10
+    positions = VertexPositions()
+    points = []
+    cells = {}
+    for i in range(n):
+        x, y = generator.uniform(0, side), generator.uniform(0, side)
+        points.append((x, y))
+        positions.add(str(i), x, y)
+        cells.setdefault((int(x // radius), int(y // radius)), []).append(i)
+
+    g = Graph()
+    if directed:
+        g.change_if_directed()
+    with g.batch() as batch:
+        batch.add_vertices(str(i) for i in range(n))
+        # Each pair is found once from the cell of its lower endpoint
+        for i, (x, y) in enumerate(points):
+            cx, cy = int(x // radius), int(y // radius)
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for j in cells.get((cx + dx, cy + dy), ()):
+                        if j <= i:
+                            continue
+                        distance = math.hypot(x - points[j][0], y - points[j][1])
+                        if distance < radius:
+                            weight = max(1, math.ceil(distance))
+                            batch.add_edge((str(i), str(j)), weight)
+                            if directed:
+                                batch.add_edge((str(j), str(i)), weight)
+    return g, positions
+
+
+def grid_graph(rows, columns, max_weight=10, seed=0):
+    # Theta(rows * columns), undirected 4-neighbour grid with unit spacing and weights in 1..max_weight,
+    # vertex r * columns + c sits at (c, r). Returns the graph and its VertexPositions.
+    generator = random.Random(seed)
+    positions = VertexPositions()
+    g = Graph()
+    with g.batch() as batch:
+        for r in range(rows):
+            for c in range(columns):
+                name = str(r * columns + c)
+                batch.add_vertex(name)
+                positions.add(name, c, r)
+        for r in range(rows):
+            for c in range(columns):
+                v = r * columns + c
+                if c + 1 < columns:
+                    batch.add_edge((str(v), str(v + 1)), generator.randint(1, max_weight))
+                if r + 1 < rows:
+                    batch.add_edge((str(v), str(v + columns)), generator.randint(1, max_weight))
+    return g, positions
+
+
+def power_law_graph(n, m=2, max_weight=10, seed=0):
+    # Theta(n * m), Barabasi-Albert preferential attachment: every new vertex joins m distinct existing
+    # vertices picked proportionally to their degree, which gives a power law degree distribution.
+    # Undirected, no positions.
+    generator = random.Random(seed)
+    g = Graph()
+    # Every vertex appears in endpoints once per incident edge, so a uniform pick is degree proportional
+    endpoints = []
+    with g.batch() as batch:
+        batch.add_vertices(str(i) for i in range(n))
+        for v in range(1, n):
+            if v <= m:
+                chosen = set(range(v))
+            else:
+                chosen = set()
+                while len(chosen) < m:
+                    chosen.add(generator.choice(endpoints))
+            for u in chosen:
+                batch.add_edge((str(u), str(v)), generator.randint(1, max_weight))
+                endpoints.append(u)
+                endpoints.append(v)
+    return g
+
+
+def subdivided_graph(g, chain_length, prefix="s"):
+    # Theta(V + E * chain_length), a copy of g with every edge replaced by a chain of chain_length new
+    # vertices (named prefix + edge number + "_" + position), homeomorphic to g
+    copy = Graph()
+    with copy.batch() as batch:
+        batch.add_vertices(g.get_vertices())
+        for k, (vertex1, vertex2) in enumerate(g.get_edges()):
+            chain = ["{}{}_{}".format(prefix, k, i) for i in range(chain_length)]
+            batch.add_vertices(chain)
+            path = [vertex1] + chain + [vertex2]
+            for a, b in zip(path, path[1:]):
+                batch.add_edge((a, b))
+    return copy
+
+
+GENERATORS = {
+    "geometric": lambda n, seed: random_geometric_graph(n, seed=seed),
+    "grid": lambda n, seed: grid_graph(max(1, math.isqrt(n)), max(1, n // max(1, math.isqrt(n))), seed=seed),
+    "power_law": lambda n, seed: (power_law_graph(n, seed=seed), None),
+}
+
+
+def generate(kind, n, seed=0):
+    # Returns graph, positions (None when the kind has no coordinates)
+    if kind not in GENERATORS:
+        raise ValueError("Unknown graph kind {}".format(kind))
+    return GENERATORS[kind](n, seed)
@@ -1,27 +1,86 @@
 from collections import defaultdict
+from contextlib import contextmanager
 from iterators import NeighbourIterator, InboundNeighbourIterator, BFS, DFS
+from graph_io import GraphFileReader
+from positions import VertexPositions
+
+
+class ListenerError(Exception):
+    # Raised after a mutation when listeners failed. The mutation is already applied and every listener
+    # was called; errors holds the (listener, exception) pairs in call order.
+    def __init__(self, event, errors):
+        super().__init__("{} listener(s) failed on {} (the change was applied): {}".format(
+            len(errors), event, "; ".join(repr(error) for _, error in errors)))
+        self.event = event
+        self.errors = errors
+
 
 class Graph:
     def __init__(self):
         # Theta(1)
-        self.__vertices = []
+        # Vertices are kept in an insertion ordered dict so membership checks are O(1)
+        self.__vertices = {}
         self.__edges = {}
         self.__directed = False
         self.__weighted = True
-        self.__inbound_neighbours = defaultdict(set)
-        self.__outbound_neighbours = defaultdict(set)
-        self.__cost = 0
+        # vertex -> {neighbour: weight}, so traversals read weights without touching __edges
+        self.__inbound_neighbours = defaultdict(dict)
+        self.__outbound_neighbours = defaultdict(dict)
+        self.__positions = None
+        self.__saved_weights = {}
+        self.__listeners = []
+        self.__version = 0
+        self.__in_batch = False
+
+    def subscribe(self, listener):
+        # Theta(1), listener(event, *args) is called after every mutation with one of
+        # ("add_vertex", vertex), ("remove_vertex", vertex), ("add_edge", edge, weight),
+        # ("remove_edge", edge, weight), ("set_weight", edge, old_weight, new_weight),
+        # ("remove_vertices", [vertex, ...]) / ("remove_edges", [(edge, weight), ...]) after a bulk removal,
+        # or ("reset",) when a batch or change_if_directed/change_if_weighted rewrote the edges.
+        # A listener that raises does not stop the others or the mutation, see ListenerError.
+        self.__listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        # O(number of listeners)
+        self.__listeners.remove(listener)
+
+    def get_version(self):
+        # Theta(1), increases with every mutation, so results computed at an older version are stale
+        return self.__version
+
+    def __notify(self, event, *args):
+        # Called once the mutation is complete, so a failing listener can not leave it half done:
+        # every listener still runs and the failures are raised together afterwards as ListenerError
+        self.__version += 1
+        errors = []
+        for listener in list(self.__listeners):
+            try:
+                listener(event, *args)
+            except Exception as e:
+                errors.append((listener, e))
+        if errors:
+            raise ListenerError(event, errors) from errors[0][1]
+
+    def __rebuild_neighbours(self):
+        # Theta(V + E), recomputes both weighted neighbour maps from __edges
+        inbound = self.__inbound_neighbours = defaultdict(dict)
+        outbound = self.__outbound_neighbours = defaultdict(dict)
+        if self.__directed:
+            for (v1, v2), weight in self.__edges.items():
+                outbound[v1][v2] = weight
+                inbound[v2][v1] = weight
+        else:
+            for (v1, v2), weight in self.__edges.items():
+                outbound[v1][v2] = weight
+                inbound[v2][v1] = weight
+                outbound[v2][v1] = weight
+                inbound[v1][v2] = weight
+
     def change_if_directed(self):
          # O(V + E)
         self.__directed = not self.__directed
         if not self.__directed:
-            for vertex in self.__vertices:
-                # Making the set of neighbours of each vertex identical in the double list of neighbours
-                set_of_neighbours = self.__inbound_neighbours[vertex].union(self.__outbound_neighbours[vertex])
-
-                self.__inbound_neighbours[vertex] = set_of_neighbours
-                self.__outbound_neighbours[vertex] = set_of_neighbours
-
             # No duplicate edges in undirected graphs
             seen = set()
             for edge in list(self.__edges.keys()):
@@ -36,23 +95,33 @@ class Graph:
                 opposite_edge = (edge[1], edge[0])
                 if opposite_edge not in self.__edges.keys():
                     self.__edges[opposite_edge] = self.__edges[edge]
+        # Making the neighbours of each vertex match the new edge set
+        self.__rebuild_neighbours()
+        self.__notify("reset")
 
     def change_if_weighted(self):
-        # Theta(E)
+        # Theta(E), the weights are kept aside while the graph is unweighted and come back afterwards
+        # (edges added in between weigh 0). as_unweighted() gives the same without touching the graph.
         self.__weighted = not self.__weighted
         if not self.__weighted:
+            self.__saved_weights = self.__edges.copy()
             for edge in self.__edges.keys():
                 self.__edges[edge] = 1
         else:
+            saved = self.__saved_weights
             for edge in self.__edges.keys():
-                self.__edges[edge] = 0
+                self.__edges[edge] = saved.get(edge, 0)
+            self.__saved_weights = {}
+        self.__rebuild_neighbours()
+        self.__notify("reset")
 
     def add_vertex(self, vertex: str):
-        # O(v)
+        # Theta(1)
         if vertex in self.__vertices:
             raise ValueError("Vertex already exists")
         else:
-            self.__vertices.append(vertex)
+            self.__vertices[vertex] = None
+            self.__notify("add_vertex", vertex)
 
     def set_weight(self, edge, weight: int):
         # Theta(1)
@@ -60,7 +129,14 @@ class Graph:
             raise ValueError("Graph is unweighted")
         if not edge in self.__edges:
             raise ValueError("Edge {} does not exist".format(edge))
+        old_weight = self.__edges[edge]
         self.__edges[edge] = weight
+        self.__outbound_neighbours[edge[0]][edge[1]] = weight
+        self.__inbound_neighbours[edge[1]][edge[0]] = weight
+        if not self.__directed:
+            self.__outbound_neighbours[edge[1]][edge[0]] = weight
+            self.__inbound_neighbours[edge[0]][edge[1]] = weight
+        self.__notify("set_weight", edge, old_weight, weight)
 
     def get_edge(self, edge):
         if edge in self.__edges.keys():
@@ -73,23 +149,29 @@ class Graph:
         # Theta(1)
         if not self.__weighted:
             raise ValueError("Graph is unweighted")
-        if not self.is_edge(edge[0], edge[1]):
+        weight = self.__edges.get(edge)
+        if weight is None and not self.__directed:
+            weight = self.__edges.get((edge[1], edge[0]))
+        if weight is None:
             raise ValueError("Edge {} does not exist".format(edge))
-        self.__cost += 1
-        return self.__edges[self.get_edge(edge)]
+        return weight
 
-    def get_cost(self):
-        return self.__cost
+    def out_edges(self, vertex):
+        # Theta(1), live (neighbour, weight) view of the outbound edges of vertex
+        return self.__outbound_neighbours[vertex].items()
 
-    def reset_cost(self):
-        self.__cost = 0
+    def in_edges(self, vertex):
+        # Theta(1), live (neighbour, weight) view of the inbound edges of vertex
+        return self.__inbound_neighbours[vertex].items()
 
     def add_edge(self, edge, weight: int|None = None):
-        # Theta(v)
+        # Theta(1)
         if edge in self.__edges.keys():
             raise ValueError("Edge already exists")
 
         if edge[0] in self.__vertices and edge[1] in self.__vertices:
+            if weight is None:
+                weight = 1
             if not self.__directed:
                 # In undirected graph, check for the opposite edge.
                 opposite_edge = (edge[1], edge[0])
@@ -97,54 +179,155 @@ class Graph:
                 if opposite_edge in self.__edges.keys():
                     raise ValueError("Edge already exists")
 
-                self.__inbound_neighbours[edge[0]].add(edge[1])
-                self.__outbound_neighbours[edge[1]].add(edge[0])
+                self.__inbound_neighbours[edge[0]][edge[1]] = weight
+                self.__outbound_neighbours[edge[1]][edge[0]] = weight
 
             # Add the edge.
-            if weight is not None:
-                self.__edges[edge] = weight
-            else:
-                self.__edges[edge] = 1
+            self.__edges[edge] = weight
             # Update neighbours.
-            self.__inbound_neighbours[edge[1]].add(edge[0])
-            self.__outbound_neighbours[edge[0]].add(edge[1])
+            self.__inbound_neighbours[edge[1]][edge[0]] = weight
+            self.__outbound_neighbours[edge[0]][edge[1]] = weight
+            self.__notify("add_edge", edge, weight)
         else:
             raise ValueError("Vertices {} are not in the graph".format(edge))
 
     def remove_vertex(self, vertex: str):
-        # O(v + e)
-        if vertex in self.__vertices:
-            self.__vertices.remove(vertex)
-            if vertex in self.__inbound_neighbours.keys():
-                for neighbour in self.__inbound_neighbours[vertex]:
-                    self.__inbound_neighbours[neighbour].remove(vertex)
-                self.__inbound_neighbours.pop(vertex)
-            if vertex in self.__outbound_neighbours.keys():
-                for neighbour in self.__outbound_neighbours[vertex]:
-                    self.__outbound_neighbours[neighbour].remove(vertex)
-                self.__outbound_neighbours.pop(vertex)
-
-            # Create a list of edges to remove
-            edges_to_remove = [edge for edge in self.__edges.keys()
-                               if edge[0] == vertex or edge[1] == vertex]
-
-            # Remove edges from the list
-            for edge in edges_to_remove:
-                self.__edges.pop(edge)
-        else:
+        # Theta(deg(vertex)), the incident edges are found through the neighbour maps
+        if vertex not in self.__vertices:
             raise ValueError("Vertex {} is not in the graph".format(vertex))
+        self.__detach_vertex(vertex)
+        self.__notify("remove_vertex", vertex)
+
+    def __detach_vertex(self, vertex):
+        # Theta(deg(vertex)), removes vertex and its edges without notifying
+        del self.__vertices[vertex]
+        outbound = self.__outbound_neighbours.pop(vertex, {})
+        inbound = self.__inbound_neighbours.pop(vertex, {})
+        for neighbour in outbound:
+            self.__edges.pop((vertex, neighbour), None)
+            if neighbour != vertex:
+                self.__inbound_neighbours[neighbour].pop(vertex, None)
+                if not self.__directed:
+                    self.__outbound_neighbours[neighbour].pop(vertex, None)
+                    self.__edges.pop((neighbour, vertex), None)
+        for neighbour in inbound:
+            if neighbour != vertex:
+                self.__outbound_neighbours[neighbour].pop(vertex, None)
+                self.__edges.pop((neighbour, vertex), None)
+
+    def remove_vertices(self, vertices):
+        # Theta(sum of the degrees), Theta(V + E) for more than a quarter of the vertices, nothing is removed
+        # unless every vertex is in the graph.
+        # One version step and one ("remove_vertices", [vertices]) notification for the whole removal.
+        vertices = list(dict.fromkeys(vertices))
+        for vertex in vertices:
+            if vertex not in self.__vertices:
+                raise ValueError("Vertex {} is not in the graph".format(vertex))
+        if 4 * len(vertices) > len(self.__vertices):
+            # Theta(V + E): for a large share of the graph one filtering pass over the edges and a rebuild
+            # of the neighbour maps beats detaching the vertices one by one
+            removed = set(vertices)
+            for vertex in vertices:
+                del self.__vertices[vertex]
+            self.__edges = {edge: weight for edge, weight in self.__edges.items()
+                            if edge[0] not in removed and edge[1] not in removed}
+            self.__rebuild_neighbours()
+        else:
+            for vertex in vertices:
+                self.__detach_vertex(vertex)
+        self.__notify("remove_vertices", vertices)
 
     def remove_edge(self, edge):
         # O(1)
-        if edge in self.__edges.keys():
-            self.__inbound_neighbours[edge[1]].discard(edge[0])
-            self.__outbound_neighbours[edge[0]].discard(edge[1])
-            if not self.__directed:
-                self.__inbound_neighbours[edge[0]].discard(edge[1])
-                self.__outbound_neighbours[edge[1]].discard(edge[0])
-            self.__edges.pop(edge)
-        else:
+        if edge not in self.__edges:
             raise ValueError("Edge {} is not in the graph".format(edge))
+        self.__notify("remove_edge", edge, self.__detach_edge(edge))
+
+    def __detach_edge(self, edge):
+        # O(1), removes edge without notifying and returns its weight
+        self.__inbound_neighbours[edge[1]].pop(edge[0], None)
+        self.__outbound_neighbours[edge[0]].pop(edge[1], None)
+        if not self.__directed:
+            self.__inbound_neighbours[edge[0]].pop(edge[1], None)
+            self.__outbound_neighbours[edge[1]].pop(edge[0], None)
+        return self.__edges.pop(edge)
+
+    def remove_edges(self, edges):
+        # Theta(number of edges), nothing is removed unless every edge is in the graph.
+        # One version step and one ("remove_edges", [(edge, weight)]) notification for the whole removal.
+        edges = list(dict.fromkeys(edges))
+        for edge in edges:
+            if edge not in self.__edges:
+                raise ValueError("Edge {} is not in the graph".format(edge))
+        removed = [(edge, self.__detach_edge(edge)) for edge in edges]
+        self.__notify("remove_edges", removed)
+
+    @contextmanager
+    def batch(self):
+        # with g.batch() as b: b.add_vertex(...), b.add_edge(...), b.remove_vertex(...), b.remove_edge(...)
+        # The operations are only recorded inside the block. On exit they are checked in order against the
+        # staged vertex and edge sets, then every neighbour index is rebuilt in one pass and listeners get a
+        # single "reset". Any invalid operation (or an exception in the block) leaves the graph untouched,
+        # a failing listener raises ListenerError after the whole batch was applied.
+        if self.__in_batch:
+            raise ValueError("Graph is already in a batch")
+        self.__in_batch = True
+        batch = GraphBatch()
+        try:
+            yield batch
+            self.__commit(batch.operations)
+        finally:
+            self.__in_batch = False
+            batch.operations = None
+
+    def __commit(self, operations):
+        # Theta(V + E + number of operations)
+        vertices = dict(self.__vertices)
+        edges = dict(self.__edges)
+        directed = self.__directed
+        # Edges added by the batch per vertex, the ones already in the graph are found in the neighbour maps.
+        # Only needed for edges added before the last vertex removal.
+        last_removal = max((i for i, operation in enumerate(operations) if operation[0] == "remove_vertex"),
+                           default=-1)
+        added = defaultdict(set)
+        for i, operation in enumerate(operations):
+            kind = operation[0]
+            if kind == "add_edge":
+                edge, weight = operation[1], operation[2]
+                if edge in edges or (not directed and (edge[1], edge[0]) in edges):
+                    raise ValueError("Edge {} already exists".format(edge))
+                if edge[0] not in vertices or edge[1] not in vertices:
+                    raise ValueError("Vertices {} are not in the graph".format(edge))
+                edges[edge] = 1 if weight is None else weight
+                if i < last_removal:
+                    added[edge[0]].add(edge)
+                    added[edge[1]].add(edge)
+            elif kind == "add_vertex":
+                if operation[1] in vertices:
+                    raise ValueError("Vertex {} already exists".format(operation[1]))
+                vertices[operation[1]] = None
+            elif kind == "remove_edge":
+                if edges.pop(operation[1], None) is None:
+                    raise ValueError("Edge {} is not in the graph".format(operation[1]))
+            else:
+                vertex = operation[1]
+                if vertex not in vertices:
+                    raise ValueError("Vertex {} is not in the graph".format(vertex))
+                del vertices[vertex]
+                for edge in added.pop(vertex, ()):
+                    edges.pop(edge, None)
+                for neighbour in self.__outbound_neighbours.get(vertex, ()):
+                    edges.pop((vertex, neighbour), None)
+                    if not directed:
+                        edges.pop((neighbour, vertex), None)
+                if directed:
+                    for neighbour in self.__inbound_neighbours.get(vertex, ()):
+                        edges.pop((neighbour, vertex), None)
+
+        self.__vertices = vertices
+        self.__edges = edges
+        self.__rebuild_neighbours()
+        self.__notify("reset")
 
     def get_v(self):
         # Theta(1)
@@ -154,6 +337,10 @@ class Graph:
         # Theta(1)
         return len(self.__edges)
 
+    def is_vertex(self, vertex: str):
+        # Theta(1)
+        return vertex in self.__vertices
+
     def is_edge(self, vertex1: str, vertex2: str):
         # O(e)
         if self.__directed is False:
@@ -164,9 +351,24 @@ class Graph:
                 return True
         return False
 
+    def adjacency(self):
+        # Theta(1), read only mapping vertex -> {outbound neighbour: weight}
+        return self.__outbound_neighbours
+
+    def inbound_adjacency(self):
+        # Theta(1), read only mapping vertex -> {inbound neighbour: weight}
+        return self.__inbound_neighbours
+
     def neighbors(self, vertex: str):
         return NeighbourIterator(self, vertex)
 
+    def neighbors_array(self, vertex: str):
+        # Theta(deg(vertex)), NumPy array of the outbound neighbours in one call
+        import numpy as np
+        if vertex not in self.__vertices:
+            raise ValueError("Vertex {} is not in the graph".format(vertex))
+        return np.array(list(self.__outbound_neighbours[vertex]))
+
     def inbound_neighbours(self, vertex: str):
         return InboundNeighbourIterator(self, vertex)
 
@@ -176,9 +378,28 @@ class Graph:
     def DFS_iter(self, vertex):
         return DFS(self, vertex)
 
+    def frontier_BFS_iter(self, vertex, direction_optimizing=False):
+        from traversal import FrontierBFS
+        return FrontierBFS(self, vertex, direction_optimizing)
+
+    def reversed(self):
+        # Theta(1), read only view with every edge turned around (see views.py)
+        from views import ReversedView
+        return ReversedView(self)
+
+    def as_undirected(self):
+        # Theta(1), read only view with every edge usable both ways (see views.py)
+        from views import UndirectedView
+        return UndirectedView(self)
+
+    def as_unweighted(self):
+        # Theta(1), read only view with every edge weighing 1 (see views.py)
+        from views import UnweightedView
+        return UnweightedView(self)
+
     def get_vertices(self):
-        # Theta(1)
-        return self.__vertices[:]
+        # Theta(v)
+        return list(self.__vertices)
 
     def get_edges(self):
         return self.__edges.copy()
@@ -216,16 +437,22 @@ class Graph:
             return "weighted"
         return "unweighted"
 
-    def get_coordinates(self, vertex, filename):
-        with open(filename, 'r') as f:
-            lines = f.readlines()
-        if not lines:
-            raise ValueError("File is empty or improperly formatted.")
-        for line in lines[1:]:
-            parts = line.split(",")
-            if parts[0] == vertex:
-                return float(parts[1]), float(parts[2])
-        raise ValueError("Vertex {} not found in file".format(vertex))
+    def load_positions(self, filename):
+        # Theta(V), attaches the coordinate store used by get_coordinates and A_star
+        self.__positions = VertexPositions.from_file(filename)
+        return self.__positions
+
+    def get_positions(self, filename=None):
+        # Theta(1) once loaded, a different positions file replaces the attached one
+        if filename is not None and (self.__positions is None or self.__positions.filename != filename):
+            return self.load_positions(filename)
+        if self.__positions is None:
+            raise ValueError("No vertex positions loaded")
+        return self.__positions
+
+    def get_coordinates(self, vertex, filename=None):
+        # Theta(1) once the positions are loaded
+        return self.get_positions(filename).get_coordinates(vertex)
 
     def count_neighbours(self, vertex):
         return len(self.__outbound_neighbours[vertex])
@@ -234,46 +461,82 @@ class Graph:
     def __str__(self):
         return str(f"{self.directed()} {self.weighted()} \n{self.return_edges()}{self.get_isolated_vertices()}\n")
 
-    @classmethod
-    def create_from_file(cls, filename):
-        with open(filename, 'r') as f:
-            lines = f.readlines()
-        if not lines:
-            raise ValueError("File is empty or improperly formatted.")
+    def save_to_file(self, filename):
+        # Theta(V + E), text format read back by create_from_file: the header, one edge per line, then
+        # the isolated vertices
+        with open(filename, 'w') as f:
+            f.write("{} {}\n".format(self.weighted(), self.directed()))
+            if self.__weighted:
+                f.writelines("{} {} {}\n".format(v1, v2, weight) for (v1, v2), weight in self.__edges.items())
+            else:
+                f.writelines("{} {}\n".format(v1, v2) for v1, v2 in self.__edges)
+            f.write(self.get_isolated_vertices())
 
-        header = lines[0].split()
-        if len(header) != 2:
-            raise ValueError("File is improperly formatted.")
-        directed = True if header[1] == "directed" else False
-        weighted = True if header[0] == "weighted" else False
+    def save_binary(self, path):
+        # Theta(V + E), CSR snapshot of the graph (see CSRGraph.save_binary)
+        from csr import CSRGraph
+        CSRGraph.from_graph(self).save_binary(path)
 
+    @staticmethod
+    def load_binary(path, mmap=True):
+        # O(V), returns a read only CSRGraph mapped from the snapshot, every algorithm accepts it;
+        # call to_graph() on it for a mutable Graph
+        from csr import CSRGraph
+        return CSRGraph.load_binary(path, mmap)
+
+    @classmethod
+    def create_from_file(cls, filename):
+        # Theta(V + E): the file is streamed line by line and every vertex lookup is O(1)
         graph = cls()
-        graph.__directed = directed
-        graph.__weighted = weighted
-
-        for line in lines[1:]:
-            parts = line.split()
-            if len(parts) == 1:
-                graph.add_vertex(parts[0])
-            elif len(parts) == 2 and weighted is False :
-                v1, v2 = parts
-                if v1 not in graph.get_vertices():
-                    graph.add_vertex(v1)
-                if v2 not in graph.get_vertices():
-                    graph.add_vertex(v2)
-                graph.add_edge((parts[0], parts[1]))
-            elif len(parts) == 3 and weighted is True:
-                v1, v2, weight_str = parts
+        with GraphFileReader(filename) as reader:
+            graph.__directed = reader.directed
+            graph.__weighted = reader.weighted
+            vertices = graph.__vertices
+            for line_number, v1, v2, weight in reader:
                 try:
-                    weight = int(weight_str)
-                except ValueError:
-                    raise ValueError(f"Invalid weight '{weight_str}' for edge ({v1}, {v2}).")
-                # Add vertices if not present.
-                if v1 not in graph.get_vertices():
-                    graph.add_vertex(v1)
-                if v2 not in graph.get_vertices():
-                    graph.add_vertex(v2)
-                graph.add_edge((v1, v2), weight)
-            else:
-                raise ValueError("File is improperly formatted.")
-        return graph
\ No newline at end of file
+                    if v2 is None:
+                        graph.add_vertex(v1)
+                        continue
+                    # Add vertices if not present.
+                    if v1 not in vertices:
+                        graph.add_vertex(v1)
+                    if v2 not in vertices:
+                        graph.add_vertex(v2)
+                    graph.add_edge((v1, v2), weight)
+                except ValueError as e:
+                    raise ValueError("{}, line {}: {}".format(filename, line_number, e)) from None
+        return graph
+
+
+class GraphBatch:
+    # Operations recorded by Graph.batch(), applied together when the with block ends
+    def __init__(self):
+        self.operations = []
+
+    def __record(self, operation):
+        if self.operations is None:
+            raise ValueError("Batch is already closed")
+        self.operations.append(operation)
+
+    def add_vertex(self, vertex):
+        self.__record(("add_vertex", vertex))
+
+    def add_vertices(self, vertices):
+        if self.operations is None:
+            raise ValueError("Batch is already closed")
+        self.operations.extend(("add_vertex", vertex) for vertex in vertices)
+
+    def add_edge(self, edge, weight=None):
+        self.__record(("add_edge", edge, weight))
+
+    def add_edges(self, edges):
+        # edges are (edge, weight) pairs
+        if self.operations is None:
+            raise ValueError("Batch is already closed")
+        self.operations.extend(("add_edge", edge, weight) for edge, weight in edges)
+
+    def remove_vertex(self, vertex):
+        self.__record(("remove_vertex", vertex))
+
+    def remove_edge(self, edge):
+        self.__record(("remove_edge", edge))
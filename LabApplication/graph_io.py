@@ -0,0 +1,66 @@
+WEIGHT_TOKENS = {"weighted": True, "unweighted": False}
+DIRECTION_TOKENS = {"directed": True, "undirected": False}
+
+
+class GraphFileReader:
+    # Streams a graph text file one line at a time.
+    # The header ("weighted directed", "undirected unweighted", ... in any order) is parsed on open,
+    # iterating yields (line_number, v1, v2, weight) where v2 is None for an isolated vertex line
+    # and weight is None for unweighted graphs.
+    def __init__(self, filename):
+        # Theta(1)
+        self.filename = filename
+        self.directed = False
+        self.weighted = False
+        self.__file = None
+
+    def __enter__(self):
+        self.__file = open(self.filename, 'r')
+        try:
+            self.__read_header()
+        except Exception:
+            self.__file.close()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.__file.close()
+        return False
+
+    def __read_header(self):
+        # Theta(1)
+        line = self.__file.readline()
+        if not line:
+            raise ValueError("File is empty or improperly formatted.")
+        header = line.split()
+        if len(header) != 2:
+            raise ValueError("{}, line 1: File is improperly formatted.".format(self.filename))
+
+        weighted = [WEIGHT_TOKENS[token] for token in header if token in WEIGHT_TOKENS]
+        directed = [DIRECTION_TOKENS[token] for token in header if token in DIRECTION_TOKENS]
+        if len(weighted) != 1 or len(directed) != 1:
+            raise ValueError("{}, line 1: Invalid header '{}'.".format(self.filename, line.strip()))
+        self.weighted = weighted[0]
+        self.directed = directed[0]
+
+    def __iter__(self):
+        # Theta(number of lines), constant memory
+        weighted = self.weighted
+        for line_number, line in enumerate(self.__file, start=2):
+            parts = line.split()
+            if not parts:
+                continue
+            if len(parts) == 1:
+                yield line_number, parts[0], None, None
+            elif len(parts) == 2 and not weighted:
+                yield line_number, parts[0], parts[1], None
+            elif len(parts) == 3 and weighted:
+                v1, v2, weight_str = parts
+                try:
+                    weight = int(weight_str)
+                except ValueError:
+                    raise ValueError("{}, line {}: Invalid weight '{}' for edge ({}, {}).".format(
+                        self.filename, line_number, weight_str, v1, v2)) from None
+                yield line_number, v1, v2, weight
+            else:
+                raise ValueError("{}, line {}: File is improperly formatted.".format(self.filename, line_number))
@@ -0,0 +1,180 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+# Shared instrumentation surface of the algorithms.
+# Nothing is recorded unless a Recorder is installed with recording(). While none is, report() and phase()
+# return right away and timed() functions call straight through, so the algorithms pay one None check per
+# call and nothing inside their loops. The counters are named "<algorithm>.<counter>", with
+#   settled  vertices taken off the queue / visited,
+#   relaxed  edges scanned from settled vertices,
+#   push/pop priority queue operations,
+# and the phases keep the call count and total time of every timed function or phase() block.
+#
+#   with instrumentation.recording(sample_interval=0.001) as recorder:
+#       dijkstra(g, "1")
+#   recorder.save_json("profile.json")
+
+_recorder = None
+_disabled = nullcontext()
+_own_file = os.path.normcase(os.path.abspath(__file__))
+
+
+class Recorder:
+    def __init__(self):
+        # Theta(1)
+        self.counters = Counter()
+        self.phases = defaultdict(lambda: [0, 0.0])
+        self.samples = Counter()
+        self.sample_interval = None
+        self.__sampler = None
+
+    def count(self, name, amount=1):
+        # Theta(1)
+        self.counters[name] += amount
+
+    def add(self, prefix, counters):
+        # Theta(len(counters)), adds every counter as prefix.name
+        for name, amount in counters.items():
+            self.counters["{}.{}".format(prefix, name)] += amount
+
+    @contextmanager
+    def phase(self, name):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.phases[name]
+            entry[0] += 1
+            entry[1] += time.perf_counter() - start_time
+
+    def start_sampling(self, interval, thread_id=None):
+        # Samples the stack of thread_id (the calling thread by default) every interval seconds from a
+        # daemon thread until stop_sampling. Python only switches threads every sys.getswitchinterval(),
+        # so intervals below that are rounded up in practice.
+        if self.__sampler is not None:
+            raise ValueError("Sampling is already running")
+        self.sample_interval = interval
+        self.__sampler = _Sampler(self.samples, interval, thread_id or threading.get_ident())
+        self.__sampler.start()
+
+    def stop_sampling(self):
+        if self.__sampler is not None:
+            self.__sampler.stop()
+            self.__sampler = None
+
+    def reset(self):
+        self.counters.clear()
+        self.phases.clear()
+        self.samples.clear()
+
+    def hot_spots(self, limit=20):
+        # Functions by the number of samples they were running in (self time), most frequent first
+        functions = Counter()
+        for stack, count in self.samples.items():
+            functions[stack[-1]] += count
+        return functions.most_common(limit)
+
+    def to_dict(self, limit=20):
+        result = {
+            "counters": dict(sorted(self.counters.items())),
+            "phases": {name: {"calls": calls, "total_ms": round(total * 1000, 3)}
+                       for name, (calls, total) in sorted(self.phases.items())},
+        }
+        if self.samples:
+            result["samples"] = {
+                "interval_ms": self.sample_interval * 1000,
+                "total": sum(self.samples.values()),
+                "hot_spots": [[name, count] for name, count in self.hot_spots(limit)],
+                # Collapsed stacks ("outer;...;inner"), the input format of flame graph tools
+                "stacks": {";".join(stack): count for stack, count in self.samples.most_common()},
+            }
+        return result
+
+    def to_json(self, limit=20):
+        return json.dumps(self.to_dict(limit), indent=2)
+
+    def save_json(self, filename, limit=20):
+        with open(filename, 'w') as f:
+            f.write(self.to_json(limit))
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, samples, interval, thread_id):
+        super().__init__(name="instrumentation-sampler", daemon=True)
+        self.__samples = samples
+        self.__interval = interval
+        self.__thread_id = thread_id
+        self.__stopped = threading.Event()
+
+    def run(self):
+        while not self.__stopped.wait(self.__interval):
+            frame = sys._current_frames().get(self.__thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                if os.path.normcase(os.path.abspath(code.co_filename)) != _own_file:
+                    stack.append("{}:{}".format(os.path.basename(code.co_filename), code.co_name))
+                frame = frame.f_back
+            # A sample taken while stop() waits for this thread would only show the join
+            if stack and not self.__stopped.is_set():
+                stack.reverse()
+                self.__samples[tuple(stack)] += 1
+
+    def stop(self):
+        self.__stopped.set()
+        self.join()
+
+
+def active():
+    # Theta(1), the installed Recorder or None
+    return _recorder
+
+
+@contextmanager
+def recording(recorder=None, sample_interval=None):
+    # Installs recorder (a new one by default) for the duration of the block and yields it,
+    # sample_interval (seconds) also runs the sampling profiler on the calling thread.
+    # The previous recorder comes back afterwards, so recordings nest.
+    global _recorder
+    recorder = recorder if recorder is not None else Recorder()
+    previous, _recorder = _recorder, recorder
+    if sample_interval is not None:
+        recorder.start_sampling(sample_interval)
+    try:
+        yield recorder
+    finally:
+        if sample_interval is not None:
+            recorder.stop_sampling()
+        _recorder = previous
+
+
+def report(prefix, **counters):
+    # Theta(1) when disabled
+    if _recorder is not None:
+        _recorder.add(prefix, counters)
+
+
+def phase(name):
+    # Context manager timing a block as the phase name, a shared no-op one when disabled
+    if _recorder is None:
+        return _disabled
+    return _recorder.phase(name)
+
+
+def timed(name):
+    # Decorator timing every call of the function as the phase name
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _recorder is None:
+                return function(*args, **kwargs)
+            with _recorder.phase(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
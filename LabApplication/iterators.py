@@ -1,67 +1,92 @@
-class NeighbourIterator:
-    def __init__(self, graph, vertex):
+from collections import deque
+import instrumentation
+
+
+_END = object()
+
+
+class _RowIterator:
+    # Walks one row of an adjacency mapping in place, nothing is copied. The graph version is taken
+    # on creation and checked on every step, so a mutation of the graph makes the next step raise
+    # instead of returning neighbours of an older graph. Works with valid/next/getCurrentPosition
+    # and with the iterator protocol, both move the same position.
+    def __init__(self, graph, row):
         # Theta(1)
         self.__graph = graph
-        self.__currentPositions = 0
-        self.__vertex = vertex
-        self.__neighbours = list(self.__graph._Graph__outbound_neighbours[self.__vertex])
+        self.__version = graph.get_version()
+        self.__iterator = iter(row)
+        self.__current = next(self.__iterator, _END)
+
+    def __check(self):
+        if self.__graph.get_version() != self.__version:
+            raise ValueError("Graph was modified during iteration")
 
     def valid(self):
         # Theta(1)
-        return self.__currentPositions < len(self.__neighbours)
+        self.__check()
+        return self.__current is not _END
 
     def next(self):
         # Theta(1)
         if not self.valid():
             raise ValueError("No more neighbours")
-        self.__currentPositions += 1
+        self.__current = next(self.__iterator, _END)
 
     def getCurrentPosition(self):
         # Theta(1)
         if not self.valid():
             raise ValueError("No more neighbours")
-        return self.__neighbours[self.__currentPositions]
+        return self.__current
 
-class InboundNeighbourIterator:
-    def __init__(self, graph, vertex):
-        # Theta(1)
-        self.__graph = graph
-        self.__currentPositions = 0
-        self.__vertex = vertex
-        self.__neighbours = list(self.__graph._Graph__inbound_neighbours[self.__vertex])
+    def __iter__(self):
+        return self
 
-    def valid(self):
+    def __next__(self):
         # Theta(1)
-        return self.__currentPositions < len(self.__neighbours)
+        self.__check()
+        current = self.__current
+        if current is _END:
+            raise StopIteration
+        self.__current = next(self.__iterator, _END)
+        return current
 
-    def next(self):
+
+class NeighbourIterator(_RowIterator):
+    def __init__(self, graph, vertex):
         # Theta(1)
-        if not self.valid():
-            raise ValueError("No more neighbours")
-        self.__currentPositions += 1
+        super().__init__(graph, graph.adjacency()[vertex])
 
-    def getCurrentPosition(self):
+
+class InboundNeighbourIterator(_RowIterator):
+    def __init__(self, graph, vertex):
         # Theta(1)
-        if not self.valid():
-            raise ValueError("No more neighbours")
-        return self.__neighbours[self.__currentPositions]
+        super().__init__(graph, graph.inbound_adjacency()[vertex])
 
 
 class BFS:
     def __init__(self, graph, vertex):
-        self.__neighbours = graph._Graph__outbound_neighbours
+        self.__neighbours = graph.adjacency()
         self.__visited = set()
-        self.__queue = [(vertex, 0)]
+        self.__queue = deque([(vertex, 0)])
         self.__visited.add(vertex)
         self.__current_vertex = vertex
 
+    def __report(self):
+        # Once, when the traversal is exhausted
+        if instrumentation.active() is not None:
+            instrumentation.report("BFS", settled=len(self.__visited),
+                                   relaxed=sum(len(self.__neighbours[v]) for v in self.__visited))
+        self.__neighbours = None
+
     def __iter__(self):
         return self
 
     def __next__(self):
         if not self.__queue:
+            if self.__neighbours is not None:
+                self.__report()
             raise StopIteration
-        self.__current_vertex = self.__queue.pop(0)
+        self.__current_vertex = self.__queue.popleft()
         for neighbour in self.__neighbours[self.__current_vertex[0]]:
             if neighbour not in self.__visited:
                 self.__visited.add(neighbour)
@@ -73,12 +98,19 @@ class BFS:
 
 class DFS:
     def __init__(self, graph, vertex):
-        self.__neighbours = graph._Graph__outbound_neighbours
+        self.__neighbours = graph.adjacency()
         self.__visited = set()
         self.__stack = [(vertex, 0)]
         self.__visited.add(vertex)
         self.__current_vertex = vertex
 
+    def __report(self):
+        # Once, when the traversal is exhausted
+        if instrumentation.active() is not None:
+            instrumentation.report("DFS", settled=len(self.__visited),
+                                   relaxed=sum(len(self.__neighbours[v]) for v in self.__visited))
+        self.__neighbours = None
+
     def __iter__(self):
         return self
 
@@ -87,6 +119,8 @@ class DFS:
 
     def __next__(self):
         if not self.__stack:
+            if self.__neighbours is not None:
+                self.__report()
             raise StopIteration
         self.__current_vertex = self.__stack.pop()
         for neighbour in self.__neighbours[self.__current_vertex[0]]:
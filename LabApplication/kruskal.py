@@ -1,5 +1,7 @@
 from graph import *
+from union_find import DisjointSet
 from collections import deque
+import instrumentation
 
 
 # Average case: O(V + E)
@@ -15,56 +17,46 @@ def tree_height(tree, root):
         vertex, level = queue.popleft()
         max_height = max(max_height, level)
 
-        neighbors = tree.neighbors(vertex) # using neighbour iterator
-        while neighbors.valid():
-            neighbor = neighbors.getCurrentPosition()
+        for neighbor in tree.neighbors(vertex): # using neighbour iterator
             if neighbor not in visited:
                 visited.add(neighbor)
                 queue.append((neighbor, level + 1))
-            neighbors.next()
 
     return max_height
 
 
-# Average case: O(F/2)
-def find_tree(forest, vertex):
-    for tree in forest:
-        if vertex in tree:
-            return tree
-    return None
+# Average case: O(E log E)
+# forest=True returns a minimum spanning forest instead of raising on a disconnected graph,
+# edges_only=True returns the (v1, v2, weight) list without building the tree Graph.
+@instrumentation.timed("kruskal")
+def kruskal(g: Graph, forest=False, edges_only=False):
+    with instrumentation.phase("kruskal.sort"):
+        sorted_edges = sorted(g.get_edges().items(), key=lambda x: (x[1], x[0]))
+    vertices = g.get_vertices()
+    components = DisjointSet(vertices)
+    needed = len(vertices) - 1
+    tree_edges = []
+
+    with instrumentation.phase("kruskal.union"):
+        for (v1, v2), weight in sorted_edges:
+            if len(tree_edges) >= needed:
+                break
+            if components.union(v1, v2):
+                tree_edges.append((v1, v2, weight))
+    if instrumentation.active() is not None:
+        instrumentation.report("kruskal", edges=len(sorted_edges), tree_edges=len(tree_edges))
+
+    if not forest and len(tree_edges) < needed:
+        raise Exception("g is disconnected")
+
+    if edges_only:
+        return tree_edges
 
-# Average case: O(|set1| + |set2| + |forest|)
-def make_union(set1, set2, forest):
-    union = set1.union(set2)
-    new_forest = {s for s in forest if s != set1 and s!= set2}
-    new_forest.add(frozenset(union))
-    return new_forest
-
-
-# Average case: O(E log E + E * V)
-def kruskal(g: Graph):
     t = Graph()
-    sorted_edges = sorted(g.get_edges().items(), key=lambda x: (x[1], x[0]))
-    forest = set()
-    for vertex in g.get_vertices():
+    for vertex in vertices:
         t.add_vertex(vertex)
-        component = set()
-        component.add(vertex)
-        forest.add(frozenset(component))
-
-    i = 0
-
-    while t.get_e() < g.get_v()-1:
-        ((v1,v2), weight) = sorted_edges[i]
-        tree_of_v1 = find_tree(forest, v1)
-        tree_of_v2 = find_tree(forest, v2)
-        if tree_of_v1 != tree_of_v2:
-            t.add_edge((v1, v2), weight)
-            forest = make_union(tree_of_v1, tree_of_v2, forest)
-        i = i + 1
-        if i > len(sorted_edges):
-            raise Exception("g is disconnected")
-
+    for v1, v2, weight in tree_edges:
+        t.add_edge((v1, v2), weight)
     return t
 
 
@@ -0,0 +1,155 @@
+from csr import CSRGraph
+from utility import dijkstra
+from array import array
+import mmap
+import random
+import struct
+
+LANDMARKS_MAGIC = b"GLANDMK\0"
+LANDMARKS_VERSION = 1
+# magic, version, number of landmarks, number of vertices, size of the name table in bytes
+_HEADER = struct.Struct("<8sIIQQ")
+
+
+def _padding(offset):
+    return (-offset) % 8
+
+
+class Landmarks:
+    # ALT (A*, landmarks, triangle inequality) lower bounds.
+    # For every landmark L the table keeps d(L, v) (dijkstra on the graph) and d(v, L) (dijkstra on
+    # the reversed graph), then for any s, t: d(s, t) >= d(L, t) - d(L, s) and d(s, t) >= d(s, L) - d(t, L).
+    # The distance rows are one flat float64 buffer: forward rows first, then backward rows.
+    def __init__(self, names, landmarks, distances, mapped=None):
+        # Theta(V)
+        self.__names = names
+        self.__index = {name: i for i, name in enumerate(names)}
+        self.__landmarks = landmarks
+        self.__distances = distances
+        # Keeps the memory map (if any) alive as long as the table views into it
+        self.__mapped = mapped
+
+    @classmethod
+    def build(cls, g, k=8, seed=0):
+        # O(k * (V + E) * log V): k forward and k backward dijkstra runs
+        csr = g if isinstance(g, CSRGraph) else CSRGraph.from_graph(g)
+        reverse = csr.reversed()
+        names = csr.get_names()
+        n = len(names)
+        if n == 0:
+            raise ValueError("Graph has no vertices")
+        k = min(k, n)
+
+        def row(distance):
+            return array('d', (distance[name] for name in names))
+
+        # Farthest landmark selection: each new landmark is the vertex with the largest distance from its
+        # closest already chosen landmark
+        chosen = [random.Random(seed).randrange(n)]
+        forward, backward = [], []
+        closest = [float('inf')] * n
+        while True:
+            landmark = names[chosen[-1]]
+            forward.append(row(dijkstra(csr, landmark)[1]))
+            backward.append(row(dijkstra(reverse, landmark)[1]))
+            if len(chosen) == k:
+                break
+            for i in range(n):
+                d = forward[-1][i]
+                if d < closest[i]:
+                    closest[i] = d
+            candidates = [i for i in range(n) if i not in chosen]
+            # Unreachable vertices are preferred: they are not covered by any landmark yet
+            chosen.append(max(candidates, key=lambda i: closest[i]))
+
+        distances = array('d')
+        for table in (forward, backward):
+            for distance_row in table:
+                distances.extend(distance_row)
+        return cls(list(names), chosen, memoryview(distances))
+
+    def save(self, filename):
+        # Theta(k * V)
+        name_table = "\n".join(self.__names).encode("utf-8")
+        with open(filename, 'wb') as f:
+            f.write(_HEADER.pack(LANDMARKS_MAGIC, LANDMARKS_VERSION, len(self.__landmarks), len(self.__names),
+                                 len(name_table)))
+            f.write(name_table)
+            f.write(bytes(_padding(_HEADER.size + len(name_table))))
+            f.write(array('q', self.__landmarks).tobytes())
+            f.write(self.__distances.cast('B'))
+
+    @classmethod
+    def load(cls, filename, use_mmap=True):
+        # Theta(V) for the name table, the distance rows are mapped from the file instead of being read
+        with open(filename, 'rb') as f:
+            if use_mmap:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                data = f.read()
+        if len(data) < _HEADER.size:
+            raise ValueError("{} is not a landmark table".format(filename))
+        magic, version, k, n, names_size = _HEADER.unpack_from(data, 0)
+        if magic != LANDMARKS_MAGIC:
+            raise ValueError("{} is not a landmark table".format(filename))
+        if version != LANDMARKS_VERSION:
+            raise ValueError("Unsupported landmark table version {}".format(version))
+        offset = _HEADER.size
+        names = bytes(data[offset:offset + names_size]).decode("utf-8").split("\n") if n else []
+        offset += names_size + _padding(offset + names_size)
+        landmarks = memoryview(data)[offset:offset + 8 * k].cast('q').tolist()
+        offset += 8 * k
+        if len(data) != offset + 8 * 2 * k * n:
+            raise ValueError("{} is truncated".format(filename))
+        distances = memoryview(data)[offset:].cast('d')
+        return cls(names, landmarks, distances, data if use_mmap else None)
+
+    def get_landmarks(self):
+        # Theta(k)
+        return [self.__names[i] for i in self.__landmarks]
+
+    def __rows(self, vertex):
+        # Theta(k), (d(L, vertex), d(vertex, L)) for every landmark L
+        i = self.__index.get(vertex)
+        if i is None:
+            raise ValueError("Vertex {} is not in the landmark table".format(vertex))
+        n, k, distances = len(self.__names), len(self.__landmarks), self.__distances
+        return [(distances[l * n + i], distances[(k + l) * n + i]) for l in range(k)]
+
+    def distance_bound(self, source, target):
+        # Theta(k), lower bound on d(source, target), terms with unreachable landmarks are skipped
+        return self.heuristic_to(target)(source)
+
+    def heuristic_to(self, goal):
+        # Theta(k) per call, lower bound on the distance to goal; goal's row is read once
+        goal_rows = self.__rows(goal)
+        rows = self.__rows
+        inf = float('inf')
+
+        def heuristic(vertex):
+            bound = 0
+            for (from_l_v, v_to_l), (from_l_t, t_to_l) in zip(rows(vertex), goal_rows):
+                if from_l_v != inf and from_l_t != inf and from_l_t - from_l_v > bound:
+                    bound = from_l_t - from_l_v
+                if v_to_l != inf and t_to_l != inf and v_to_l - t_to_l > bound:
+                    bound = v_to_l - t_to_l
+            return bound
+
+        return heuristic
+
+    def heuristic_from(self, source):
+        # Theta(k) per call, lower bound on the distance from source; source's row is read once
+        source_rows = self.__rows(source)
+        rows = self.__rows
+        inf = float('inf')
+
+        def heuristic(vertex):
+            bound = 0
+            for (from_l_s, s_to_l), (from_l_v, v_to_l) in zip(source_rows, rows(vertex)):
+                if from_l_s != inf and from_l_v != inf and from_l_v - from_l_s > bound:
+                    bound = from_l_v - from_l_s
+                if s_to_l != inf and v_to_l != inf and s_to_l - v_to_l > bound:
+                    bound = s_to_l - v_to_l
+            return bound
+
+        return heuristic
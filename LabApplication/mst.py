@@ -0,0 +1,199 @@
+from graph import *
+from kruskal import kruskal
+from union_find import DisjointSet
+from concurrent.futures import ProcessPoolExecutor
+from collections import defaultdict
+from heapq import heappush, heappop
+import math
+import os
+import time
+
+
+def _tree_from_edges(vertices, tree_edges):
+    # Theta(V + E)
+    t = Graph()
+    for vertex in vertices:
+        t.add_vertex(vertex)
+    for v1, v2, weight in tree_edges:
+        t.add_edge((v1, v2), weight)
+    return t
+
+
+def _finish(vertices, tree_edges, components, forest, edges_only):
+    if not forest and components > 1:
+        raise Exception("g is disconnected")
+    if edges_only:
+        return tree_edges
+    return _tree_from_edges(vertices, tree_edges)
+
+
+# Average case: O(E log V)
+def prim(g: Graph, forest=False, edges_only=False):
+    vertices = g.get_vertices()
+    # Undirected view of the edges: vertex -> {neighbour: (weight, original edge)}
+    adjacency = defaultdict(dict)
+    for (v1, v2), weight in g.get_edges().items():
+        if v1 == v2:
+            continue
+        known = adjacency[v1].get(v2)
+        if known is None or weight < known[0]:
+            adjacency[v1][v2] = (weight, (v1, v2))
+            adjacency[v2][v1] = (weight, (v1, v2))
+
+    visited = set()
+    tree_edges = []
+    components = 0
+    for root in vertices:
+        if root in visited:
+            continue
+        components += 1
+        # Lazy deletion heap of (weight, vertex, edge): stale entries are skipped when popped
+        heap = [(0, root, None)]
+        while heap:
+            weight, vertex, edge = heappop(heap)
+            if vertex in visited:
+                continue
+            visited.add(vertex)
+            if edge is not None:
+                tree_edges.append((edge[0], edge[1], weight))
+            for neighbour, (neighbour_weight, neighbour_edge) in adjacency[vertex].items():
+                if neighbour not in visited:
+                    heappush(heap, (neighbour_weight, neighbour, neighbour_edge))
+
+    return _finish(vertices, tree_edges, components, forest, edges_only)
+
+
+# Edge arrays shared with the Boruvka worker processes, set once per worker by _init_boruvka_worker
+_boruvka_edges = None
+
+
+def _init_boruvka_worker(sources, destinations, weights):
+    global _boruvka_edges
+    _boruvka_edges = (sources, destinations, weights)
+
+
+def _cheapest_edges(start, stop, component):
+    # Theta(stop - start), cheapest outgoing edge index of every component seen in the edge range.
+    # Ties are broken by the edge index so every component agrees on a single order of the edges.
+    sources, destinations, weights = _boruvka_edges
+    cheapest = {}
+    for k in range(start, stop):
+        c1 = component[sources[k]]
+        c2 = component[destinations[k]]
+        if c1 == c2:
+            continue
+        weight = weights[k]
+        for c in (c1, c2):
+            best = cheapest.get(c)
+            if best is None or weight < weights[best] or (weight == weights[best] and k < best):
+                cheapest[c] = k
+    return cheapest
+
+
+# Average case: O(E log V / workers + V log V), at most log V rounds
+def boruvka(g: Graph, workers=1, forest=False, edges_only=False):
+    vertices = g.get_vertices()
+    index = {vertex: i for i, vertex in enumerate(vertices)}
+    edges = list(g.get_edges().items())
+    sources = [index[v1] for (v1, _), _ in edges]
+    destinations = [index[v2] for (_, v2), _ in edges]
+    weights = [weight for _, weight in edges]
+
+    components = DisjointSet(range(len(vertices)))
+    tree_edges = []
+    chunk = max(1, math.ceil(len(edges) / max(1, workers)))
+    ranges = [(start, min(start + chunk, len(edges))) for start in range(0, len(edges), chunk)]
+
+    pool = None
+    if workers > 1 and len(ranges) > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_boruvka_worker,
+                                   initargs=(sources, destinations, weights))
+    else:
+        _init_boruvka_worker(sources, destinations, weights)
+    try:
+        while True:
+            component = [components.find(i) for i in range(len(vertices))]
+            if pool is not None:
+                partials = list(pool.map(_cheapest_edges, *zip(*[(a, b, component) for a, b in ranges])))
+            else:
+                partials = [_cheapest_edges(a, b, component) for a, b in ranges]
+
+            cheapest = {}
+            for partial in partials:
+                for c, k in partial.items():
+                    best = cheapest.get(c)
+                    if best is None or (weights[k], k) < (weights[best], best):
+                        cheapest[c] = k
+            if not cheapest:
+                break
+            for k in set(cheapest.values()):
+                if components.union(sources[k], destinations[k]):
+                    (v1, v2), weight = edges[k]
+                    tree_edges.append((v1, v2, weight))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return _finish(vertices, tree_edges, components.count(), forest, edges_only)
+
+
+MST_ENGINES = {
+    "kruskal": lambda g, workers, forest, edges_only: kruskal(g, forest, edges_only),
+    "prim": lambda g, workers, forest, edges_only: prim(g, forest, edges_only),
+    "boruvka": lambda g, workers, forest, edges_only: boruvka(g, workers, forest, edges_only),
+}
+
+
+# Below this many edges the process pool costs more to start than a parallel edge scan saves
+PARALLEL_MIN_EDGES = 100000
+
+
+def choose_mst_engine(g):
+    # Theta(1): Boruvka on dense graphs, Kruskal otherwise.
+    # Measured with benchmark(): on sparse graphs the single sort of Kruskal wins, even against Boruvka on
+    # several processes, on dense ones the edge scans of Boruvka beat both the sort and the heap traffic of Prim.
+    # The workers only decide whether that Boruvka runs in parallel (see auto_mst_workers).
+    v, e = g.get_v(), g.get_e()
+    if v > 1 and e >= v * math.log2(v):
+        return "boruvka"
+    return "kruskal"
+
+
+def auto_mst_workers(g, engine, workers=1):
+    # Theta(1), the processes engine="auto" gives to engine: workers for a Boruvka with enough edges, 1 otherwise
+    if engine == "boruvka" and g.get_e() >= PARALLEL_MIN_EDGES:
+        return workers
+    return 1
+
+
+def minimum_spanning_tree(g: Graph, engine="auto", workers=1, forest=False, edges_only=False):
+    # Shared entry point for the three engines, engine="auto" picks one from the density of g and only
+    # spreads it over workers processes when the graph is big enough for that to pay
+    if engine == "auto":
+        engine = choose_mst_engine(g)
+        workers = auto_mst_workers(g, engine, workers)
+    if engine not in MST_ENGINES:
+        raise ValueError("Unknown MST engine {}".format(engine))
+    return MST_ENGINES[engine](g, workers, forest, edges_only)
+
+
+def benchmark(graph_files, workers=max(2, os.cpu_count() or 1), repeat=3):
+    print(f"{'graph':40} {'V':>6} {'E':>6} {'engine':>12} {'weight':>8} {'time':>10}")
+    for graph_file in graph_files:
+        g = Graph.create_from_file(graph_file)
+        engines = [("kruskal", 1), ("prim", 1), ("boruvka", 1), ("boruvka", workers)]
+        for engine, engine_workers in engines:
+            best = float('inf')
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                tree_edges = minimum_spanning_tree(g, engine, engine_workers, forest=True, edges_only=True)
+                best = min(best, (time.perf_counter() - start_time) * 1000)
+            weight = sum(edge[2] for edge in tree_edges)
+            name = engine if engine_workers == 1 else f"{engine}x{engine_workers}"
+            print(f"{graph_file:40} {g.get_v():6} {g.get_e():6} {name:>12} {weight:8} {best:8.2f}ms")
+        engine = choose_mst_engine(g)
+        print(f"{'':40} auto engine: {engine} x{auto_mst_workers(g, engine, workers)}")
+
+
+if __name__ == "__main__":
+    benchmark(["A4_1.txt", "A3_v10_e40_positives_2.txt", "A3_v10000_e40000_positives_7.txt"])
@@ -0,0 +1,212 @@
+from csr import CSRGraph
+from batch_dijkstra import dijkstra_many
+from collections import deque
+from array import array
+import instrumentation
+import numpy as np
+import time
+
+
+class NegativeCycleError(ValueError):
+    # Raised when a negative cycle makes shortest paths undefined, cycle lists its vertices in edge order
+    # (empty if it could not be traced back). Every negative edge of an undirected graph is such a cycle.
+    def __init__(self, cycle):
+        super().__init__("Graph contains a negative cycle{}".format(": " + " -> ".join(cycle) if cycle else ""))
+        self.cycle = cycle
+
+
+def _trace_cycle(parent, vertex, n, none):
+    # O(n), walks n parents back from a vertex relaxed in the n-th round, which lands on the cycle
+    for _ in range(n):
+        vertex = parent[vertex]
+        if vertex == none:
+            return []
+    cycle = [vertex]
+    current = parent[vertex]
+    while current != vertex:
+        cycle.append(current)
+        current = parent[current]
+    cycle.reverse()
+    return cycle
+
+
+def _bellman_ford_ids(csr, distance, rounds):
+    # O(rounds * (V + E)) with every round vectorized over the inbound CSR arrays:
+    # candidate distances of all arcs at once, then the best per target with minimum.reduceat.
+    # Rounds are Jacobi style (they read the distances of the previous round) and stop as soon as one
+    # changes nothing. distance is updated in place; returns parent ids (-1 for none) and the rounds run.
+    # A change in the last allowed round means a negative cycle.
+    n = csr.get_v()
+    parent = np.full(n, -1, dtype=np.int64)
+    in_offsets = np.asarray(csr.in_offsets, dtype=np.int64)
+    sources = np.asarray(csr.in_sources, dtype=np.int64)
+    weights = np.asarray(csr.in_weights, dtype=np.float64)
+    if len(sources) == 0:
+        return parent, 1
+    counts = np.diff(in_offsets)
+    targets = np.flatnonzero(counts)
+    starts = in_offsets[:-1][targets]
+    repeat = counts[targets]
+    positions = np.arange(len(sources))
+
+    for round_number in range(1, rounds + 1):
+        candidate = distance[sources] + weights
+        best = np.minimum.reduceat(candidate, starts)
+        improved = best < distance[targets]
+        if not improved.any():
+            return parent, round_number
+        # Position of the first arc reaching the best candidate of every target
+        first = np.minimum.reduceat(np.where(candidate == np.repeat(best, repeat), positions, len(sources)), starts)
+        changed = targets[improved]
+        distance[changed] = best[improved]
+        parent[changed] = sources[first[improved]]
+        if round_number == rounds:
+            names = csr.get_names()
+            cycle = _trace_cycle(parent, int(changed[0]), n, -1)
+            raise NegativeCycleError([names[i] for i in cycle])
+    return parent, rounds
+
+
+def _as_weights(csr, values):
+    # Distances as ints for graphs with integer weights, like dijkstra returns them
+    if memoryview(csr.weights).format[-1] in 'qil':
+        return [value if value == float('inf') else int(value) for value in values]
+    return values
+
+
+# O(V * (V + E)) worst case, O(rounds * (V + E)) with early exit, each round runs in NumPy
+# Single source shortest paths with negative weights. Returns parent, distance, rounds like dijkstra
+# (parent/distance are dicts keyed by vertex), raises NegativeCycleError for a reachable negative cycle.
+@instrumentation.timed("bellman_ford")
+def bellman_ford(g, source):
+    csr = g if isinstance(g, CSRGraph) else CSRGraph.from_graph(g)
+    if not csr.is_vertex(source):
+        raise ValueError("Vertex not in graph")
+    n = csr.get_v()
+    distance = np.full(n, np.inf)
+    distance[csr.id_of(source)] = 0
+    parent_ids, rounds = _bellman_ford_ids(csr, distance, n)
+    instrumentation.report("bellman_ford", rounds=rounds)
+    names = csr.get_names()
+    parent = {names[i]: None if p < 0 else names[p] for i, p in enumerate(parent_ids.tolist())}
+    return parent, dict(zip(names, _as_weights(csr, distance.tolist()))), rounds
+
+
+# O(V * E) worst case, usually close to O(E)
+# Shortest Path Faster Algorithm: Bellman-Ford that only relaxes the out edges of vertices whose distance
+# changed, kept in a FIFO queue. Works on any graph with out_edges. Returns parent, distance,
+# push count, pop count like dijkstra, raises NegativeCycleError for a reachable negative cycle.
+@instrumentation.timed("spfa")
+def spfa(g, source):
+    if not g.is_vertex(source):
+        raise ValueError("Vertex not in graph")
+    push_count = 0
+    pop_count = 0
+    vertices = g.get_vertices()
+    n = len(vertices)
+    parent = {vertex: None for vertex in vertices}
+    distance = {vertex: float('inf') for vertex in vertices}
+    # Number of edges on the current path to each vertex, a path of n edges has to repeat a vertex
+    length = {source: 0}
+    distance[source] = 0
+    queue = deque([source])
+    queued = {source}
+    push_count += 1
+
+    relaxed_count = 0
+    while queue:
+        current = queue.popleft()
+        pop_count += 1
+        queued.discard(current)
+        current_distance = distance[current]
+        edges = g.out_edges(current)
+        relaxed_count += len(edges)
+        for neighbour, weight in edges:
+            new_distance = current_distance + weight
+            if new_distance < distance[neighbour]:
+                distance[neighbour] = new_distance
+                parent[neighbour] = current
+                length[neighbour] = length[current] + 1
+                if length[neighbour] >= n:
+                    raise NegativeCycleError(_trace_cycle(parent, neighbour, n, None))
+                if neighbour not in queued:
+                    queued.add(neighbour)
+                    queue.append(neighbour)
+                    push_count += 1
+
+    if instrumentation.active() is not None:
+        instrumentation.report("spfa", settled=pop_count, relaxed=relaxed_count, push=push_count, pop=pop_count)
+    return parent, distance, push_count, pop_count
+
+
+def johnson_potentials(g):
+    # O(V * (V + E)) worst case, h(v) = shortest distance from a virtual source joined to every vertex
+    # by 0 weight edges, so w(u, v) + h(u) - h(v) >= 0 for every edge. Returns h as a NumPy array in the
+    # order of g.get_vertices().
+    csr = g if isinstance(g, CSRGraph) else CSRGraph.from_graph(g)
+    potential = np.zeros(csr.get_v())
+    # The virtual source adds a vertex, so a negative cycle only shows up in round V + 1
+    _bellman_ford_ids(csr, potential, csr.get_v() + 1)
+    return potential
+
+
+# O(V * (V + E)) for the potentials + O(V * (V + E) * log V / workers) for the dijkstra runs
+# All pairs shortest paths with negative weights: the edges are reweighted with johnson_potentials (all
+# non negative afterwards) and dijkstra_many runs from every vertex in a process pool. Returns the distance
+# matrix (and the parent id matrix with parents=True) in the order of g.get_vertices(), like dijkstra_many.
+@instrumentation.timed("johnson")
+def johnson(g, workers=1, parents=False):
+    csr = g if isinstance(g, CSRGraph) else CSRGraph.from_graph(g)
+    h = johnson_potentials(csr)
+    integer = memoryview(csr.weights).format[-1] in 'qil'
+    dtype, typecode = (np.int64, 'q') if integer else (np.float64, 'd')
+    potential = h.astype(dtype)
+
+    offsets = np.asarray(csr.offsets, dtype=np.int64)
+    owners = np.repeat(np.arange(csr.get_v()), np.diff(offsets))
+    targets = np.asarray(csr.targets, dtype=np.int64)
+    weights = np.asarray(csr.weights, dtype=dtype) + potential[owners] - potential[targets]
+    in_offsets = np.asarray(csr.in_offsets, dtype=np.int64)
+    in_targets = np.repeat(np.arange(csr.get_v()), np.diff(in_offsets))
+    in_sources = np.asarray(csr.in_sources, dtype=np.int64)
+    in_weights = np.asarray(csr.in_weights, dtype=dtype) + potential[in_sources] - potential[in_targets]
+    if not integer:
+        # Rounding can leave tiny negative values on edges of shortest paths
+        np.maximum(weights, 0, out=weights)
+        np.maximum(in_weights, 0, out=in_weights)
+    reweighted = csr.with_weights(array(typecode, weights.tobytes()), array(typecode, in_weights.tobytes()))
+
+    result = dijkstra_many(reweighted, csr.get_names(), workers=workers, parents=parents)
+    distances = result[0] if parents else result
+    # d(u, v) = d'(u, v) - h(u) + h(v), unreachable entries stay inf
+    distances += h[np.newaxis, :] - h[:, np.newaxis]
+    return result
+
+
+if __name__ == "__main__":
+    from graph import Graph
+    from utility import dijkstra
+
+    g = Graph.create_from_file("A2_4.txt")
+    source = g.get_vertices()[0]
+    print(f"Bellman-Ford from {source}: {bellman_ford(g, source)[1]}")
+    print(f"SPFA from {source}:         {spfa(g, source)[1]}")
+    print(f"Johnson:\n{johnson(g)}")
+    try:
+        bellman_ford(Graph.create_from_file("A2_1.txt"), "1")
+    except NegativeCycleError as e:
+        print(f"A2_1: {e}")
+
+    g = CSRGraph.from_file("A3_v10000_e40000_positives_7.txt")
+    source = g.get_names()[0]
+    for name, function in (("Dijkstra", dijkstra), ("Bellman-Ford", bellman_ford), ("SPFA", spfa)):
+        start_time = time.perf_counter()
+        function(g, source)
+        print(f"{name:12} {(time.perf_counter() - start_time) * 1000:8.2f}ms")
+    start_time = time.perf_counter()
+    johnson_potentials(g)
+    print(f"{'Potentials':12} {(time.perf_counter() - start_time) * 1000:8.2f}ms")
+    g = CSRGraph.from_file("A3_v10_e40_positives_2.txt")
+    start_time = time.perf_counter()
+    johnson(g)
+    print(f"Johnson on {g.get_v()} vertices: {(time.perf_counter() - start_time) * 1000:.2f}ms")
@@ -0,0 +1,83 @@
+from array import array
+import math
+
+
+class VertexPositions:
+    # Coordinates of the vertices of a graph, loaded once from a "*_vertex_positions.txt" file.
+    # x/y are packed float arrays indexed through a name -> slot dict, so every lookup is O(1).
+    def __init__(self, filename=None):
+        # Theta(1)
+        self.filename = filename
+        self.__index = {}
+        self.__x = array('d')
+        self.__y = array('d')
+
+    @classmethod
+    def from_file(cls, filename):
+        # Theta(V), the file is streamed line by line
+        positions = cls(filename)
+        with open(filename, 'r') as f:
+            if not f.readline():
+                raise ValueError("File is empty or improperly formatted.")
+            for line_number, line in enumerate(f, start=2):
+                parts = line.split(",")
+                if len(parts) == 1 and not parts[0].strip():
+                    continue
+                if len(parts) != 3:
+                    raise ValueError("{}, line {}: File is improperly formatted.".format(filename, line_number))
+                try:
+                    positions.add(parts[0], float(parts[1]), float(parts[2]))
+                except ValueError as e:
+                    raise ValueError("{}, line {}: {}".format(filename, line_number, e)) from None
+        return positions
+
+    def add(self, vertex, x, y):
+        # Theta(1) amortized
+        if vertex in self.__index:
+            raise ValueError("Vertex {} already has a position".format(vertex))
+        self.__index[vertex] = len(self.__x)
+        self.__x.append(x)
+        self.__y.append(y)
+
+    def save(self, filename):
+        # Theta(V), same format as from_file reads
+        names = sorted(self.__index, key=self.__index.get)
+        with open(filename, 'w') as f:
+            f.write("vertex_name,position_x,position_y\n")
+            f.writelines("{},{},{}\n".format(name, self.__x[i], self.__y[i]) for i, name in enumerate(names))
+
+    def __contains__(self, vertex):
+        return vertex in self.__index
+
+    def __len__(self):
+        return len(self.__x)
+
+    def get_coordinates(self, vertex):
+        # Theta(1)
+        i = self.__index.get(vertex)
+        if i is None:
+            raise ValueError("Vertex {} not found in file".format(vertex))
+        return self.__x[i], self.__y[i]
+
+    def distance(self, vertex1, vertex2):
+        # Theta(1), euclidean distance
+        x1, y1 = self.get_coordinates(vertex1)
+        x2, y2 = self.get_coordinates(vertex2)
+        return math.sqrt((x1 - x2) ** 2 + (y1 - y2) ** 2)
+
+    def heuristic_to(self, goal):
+        # Theta(1), euclidean lower bound on the distance to goal, the goal coordinates are looked up once
+        x2, y2 = self.get_coordinates(goal)
+        index, xs, ys = self.__index, self.__x, self.__y
+
+        def heuristic(vertex):
+            i = index.get(vertex)
+            if i is None:
+                raise ValueError("Vertex {} not found in file".format(vertex))
+            return math.sqrt((xs[i] - x2) ** 2 + (ys[i] - y2) ** 2)
+
+        return heuristic
+
+    def heuristic_from(self, source):
+        # Theta(1), euclidean lower bound on the distance from source (the reverse search of bidirectional A*)
+        return self.heuristic_to(source)
@@ -0,0 +1,204 @@
+from heapq import heappush, heappop
+from pqdict import pqdict
+
+# Every backend is a min priority queue with the pqdict subset the shortest path functions use:
+# queue[key] = priority inserts key or changes its priority, queue.pop() removes and returns the key with
+# the smallest priority (queue.popitem() with its priority), queue.topitem() returns that key and its
+# priority without removing it,
+# len(queue) counts the keys waiting and key in queue tells whether key is one of them.
+
+
+def _integer(priority):
+    # The bucket based queues index buckets by priority, so priorities have to be whole numbers
+    if priority != int(priority):
+        raise ValueError("Priority {} is not an integer".format(priority))
+    return int(priority)
+
+
+class HeapQueue:
+    # Binary heap (heapq) with lazy deletion: a new priority pushes a new entry and the old one is skipped
+    # when it reaches the top. O(log n) amortized per operation, no decrease-key bookkeeping.
+    def __init__(self):
+        self.__heap = []
+        self.__best = {}
+
+    def __setitem__(self, key, priority):
+        # O(log n)
+        self.__best[key] = priority
+        heappush(self.__heap, (priority, key))
+
+    def __top(self):
+        # O(log n) amortized, drops the outdated entries on top of the heap
+        heap, best = self.__heap, self.__best
+        while heap:
+            priority, key = heap[0]
+            if best.get(key) == priority:
+                return priority, key
+            heappop(heap)
+        raise KeyError("the priority queue is empty")
+
+    def pop(self):
+        # O(log n) amortized
+        return self.popitem()[0]
+
+    def popitem(self):
+        # O(log n) amortized
+        priority, key = self.__top()
+        heappop(self.__heap)
+        del self.__best[key]
+        return key, priority
+
+    def topitem(self):
+        # O(log n) amortized
+        priority, key = self.__top()
+        return key, priority
+
+    def __len__(self):
+        return len(self.__best)
+
+    def __contains__(self, key):
+        return key in self.__best
+
+
+class BucketQueue:
+    # Dial's bucket queue for non negative integer priorities that never go below the last popped one
+    # (Dijkstra with integer weights). One bucket per priority and a pointer that only moves forward, so a
+    # whole run costs O(V + E + largest distance).
+    def __init__(self):
+        self.__buckets = {}
+        self.__best = {}
+        self.__current = 0
+
+    def __setitem__(self, key, priority):
+        # Theta(1)
+        priority = _integer(priority)
+        if priority < self.__current:
+            raise ValueError("Priority {} is below the last popped priority {}".format(priority, self.__current))
+        old = self.__best.get(key)
+        if old is not None:
+            bucket = self.__buckets[old]
+            del bucket[key]
+            if not bucket:
+                del self.__buckets[old]
+        self.__best[key] = priority
+        self.__buckets.setdefault(priority, {})[key] = None
+
+    def __top(self):
+        # O(1 + empty buckets skipped), the first non empty bucket
+        if not self.__best:
+            raise KeyError("the priority queue is empty")
+        buckets = self.__buckets
+        while self.__current not in buckets:
+            self.__current += 1
+        return buckets[self.__current]
+
+    def pop(self):
+        # O(1 + empty buckets skipped)
+        return self.popitem()[0]
+
+    def popitem(self):
+        # O(1 + empty buckets skipped)
+        bucket = self.__top()
+        key, _ = bucket.popitem()
+        if not bucket:
+            del self.__buckets[self.__current]
+        del self.__best[key]
+        return key, self.__current
+
+    def topitem(self):
+        # O(1 + empty buckets skipped), the key pop() would return
+        return next(reversed(self.__top())), self.__current
+
+    def __len__(self):
+        return len(self.__best)
+
+    def __contains__(self, key):
+        return key in self.__best
+
+
+class RadixHeap:
+    # Radix heap for non negative integer priorities that never go below the last popped one.
+    # An entry with priority p sits in bucket bit_length(p ^ last), when bucket 0 runs out the first non
+    # empty bucket is split around its minimum, so every entry moves down O(log C) times (C the largest
+    # edge weight). Changed priorities are lazy: the new entry is pushed and the old one skipped.
+    def __init__(self):
+        self.__buckets = [[]]
+        self.__best = {}
+        self.__last = 0
+
+    def __insert(self, priority, key):
+        i = (priority ^ self.__last).bit_length()
+        buckets = self.__buckets
+        while i >= len(buckets):
+            buckets.append([])
+        buckets[i].append((priority, key))
+
+    def __setitem__(self, key, priority):
+        # Theta(1)
+        priority = _integer(priority)
+        if priority < self.__last:
+            raise ValueError("Priority {} is below the last popped priority {}".format(priority, self.__last))
+        self.__best[key] = priority
+        self.__insert(priority, key)
+
+    def __top(self):
+        # O(log C) amortized, leaves a current entry of the smallest priority at the end of bucket 0
+        best = self.__best
+        if not best:
+            raise KeyError("the priority queue is empty")
+        buckets = self.__buckets
+        while True:
+            if not buckets[0]:
+                i = 1
+                while not buckets[i]:
+                    i += 1
+                entries = [entry for entry in buckets[i] if best.get(entry[1]) == entry[0]]
+                buckets[i] = []
+                if not entries:
+                    continue
+                self.__last = min(entries)[0]
+                for priority, key in entries:
+                    self.__insert(priority, key)
+            priority, key = buckets[0][-1]
+            if best.get(key) == priority:
+                return priority, key
+            buckets[0].pop()
+
+    def pop(self):
+        # O(log C) amortized
+        return self.popitem()[0]
+
+    def popitem(self):
+        # O(log C) amortized
+        priority, key = self.__top()
+        self.__buckets[0].pop()
+        del self.__best[key]
+        return key, priority
+
+    def topitem(self):
+        # O(log C) amortized
+        priority, key = self.__top()
+        return key, priority
+
+    def __len__(self):
+        return len(self.__best)
+
+    def __contains__(self, key):
+        return key in self.__best
+
+
+QUEUES = {
+    "pqdict": pqdict,
+    "heapq": HeapQueue,
+    "dial": BucketQueue,
+    "radix": RadixHeap,
+}
+
+
+def make_queue(kind):
+    # kind is a name from QUEUES or a callable returning an empty queue
+    if callable(kind):
+        return kind()
+    if kind not in QUEUES:
+        raise ValueError("Unknown priority queue {}".format(kind))
+    return QUEUES[kind]()
@@ -0,0 +1,131 @@
+from utility import dijkstra
+from collections import OrderedDict
+from array import array
+import random
+import time
+
+
+class PathQueryCache:
+    # Bounded LRU of single source shortest path trees in front of dijkstra, keyed by source: one tree answers
+    # every goal of its source. A tree is a parent id array plus a distance array over the vertex list of the
+    # graph version it was computed at. The first query after the graph changed drops every entry at once.
+    def __init__(self, g, capacity=128):
+        # Theta(1)
+        if capacity < 1:
+            raise ValueError("Capacity must be positive")
+        self.__graph = g
+        self.__capacity = capacity
+        self.__entries = OrderedDict()
+        self.__version = None
+        self.__names = []
+        self.__index = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def __sync(self):
+        # Theta(1), Theta(V) once per graph version for the id mapping, the entries of older versions go
+        version = self.__graph.get_version()
+        if version != self.__version:
+            self.__version = version
+            self.stale += len(self.__entries)
+            self.__entries.clear()
+            self.__names = list(self.__graph.get_vertices())
+            self.__index = {name: i for i, name in enumerate(self.__names)}
+        return version
+
+    def __store(self, key, entry):
+        self.__entries[key] = entry
+        self.__entries.move_to_end(key)
+        if len(self.__entries) > self.__capacity:
+            self.__entries.popitem(last=False)
+            self.evictions += 1
+
+    def __tree(self, source):
+        # Theta(1) on a hit, O((V + E) * log V) on a miss
+        entry = self.__entries.get(source)
+        self.__count(entry is not None)
+        if entry is None:
+            parent, distance, _, _ = dijkstra(self.__graph, source)
+            index = self.__index
+            parents = array('q', (-1 if parent[name] is None else index[parent[name]] for name in self.__names))
+            distances = array('d', (distance[name] for name in self.__names))
+            entry = (parents, distances)
+            self.__store(source, entry)
+        else:
+            self.__entries.move_to_end(source)
+        return entry
+
+    def distances_from(self, source):
+        # Theta(V), vertex -> distance from source
+        self.__sync()
+        if not self.__graph.is_vertex(source):
+            raise ValueError("Vertex not in graph")
+        _, distances = self.__tree(source)
+        return dict(zip(self.__names, distances))
+
+    def shortest_path(self, start, goal):
+        # Returns path, cost ([] and inf when goal is unreachable). Theta(path length) when start's tree is
+        # cached, one dijkstra from start otherwise, whose tree is kept for the next goals of start.
+        self.__sync()
+        if not self.__graph.is_vertex(start) or not self.__graph.is_vertex(goal):
+            raise ValueError("Start or goal vertex not in graph")
+        names, index = self.__names, self.__index
+        parents, distances = self.__tree(start)
+        cost = distances[index[goal]]
+        if cost == float('inf'):
+            return [], cost
+        path = []
+        current = index[goal]
+        while current >= 0:
+            path.append(names[current])
+            current = parents[current]
+        path.reverse()
+        return path, cost
+
+    def __count(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def hit_rate(self):
+        # Theta(1), 0 before the first query
+        queries = self.hits + self.misses
+        return self.hits / queries if queries else 0.0
+
+    def get_stats(self):
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate(), "stale": self.stale,
+                "evictions": self.evictions, "entries": len(self.__entries), "capacity": self.__capacity}
+
+    def clear(self):
+        self.__entries.clear()
+
+    def __len__(self):
+        return len(self.__entries)
+
+
+if __name__ == "__main__":
+    from graph import Graph
+    from utility import bidirectional_dijkstra
+
+    g = Graph.create_from_file("A3_v10000_e40000_positives_7.txt")
+    cache = PathQueryCache(g, capacity=64)
+    random.seed(7)
+    vertices = g.get_vertices()
+    # Skewed traffic: a few popular sources asked for many different goals
+    popular = [random.choice(vertices) for _ in range(10)]
+    queries = [(random.choice(popular), random.choice(vertices)) for _ in range(1000)]
+
+    start_time = time.perf_counter()
+    for start, goal in queries:
+        bidirectional_dijkstra(g, start, goal)
+    uncached = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for start, goal in queries:
+        cache.shortest_path(start, goal)
+    cached = time.perf_counter() - start_time
+    print(f"{len(queries)} queries: uncached {uncached * 1000:.2f}ms, cached {cached * 1000:.2f}ms")
+    print(cache.get_stats())
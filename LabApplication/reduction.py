@@ -1,23 +1,25 @@
 from graph import *
-
-
-def check_isomorphic(graph, target_graph):
-    if set(graph.get_vertices()) != set(target_graph.get_vertices()):
+from fingerprint import is_isomorphic
+import instrumentation
+import random
+import time
+
+
+def check_isomorphic(graph, target_graph, relabel=False):
+    # Theta(V + E): same vertex names and same edges, every membership test is O(1).
+    # Edges are compared through is_edge, so in directed graphs u -> v and v -> u are different edges.
+    # relabel=True ignores the names: WL fingerprints first, then a VF2 style search for a mapping.
+    if relabel:
+        return is_isomorphic(graph, target_graph)
+    if graph.get_v() != target_graph.get_v() or graph.get_e() != target_graph.get_e():
         return False
-
-    graph_edges = set()
-    for edge in graph.get_edges():
-        if not graph.is_edge(edge[0], edge[1]):
-            continue
-        graph_edges.add(tuple(sorted([edge[0], edge[1]])))
-
-    target_edges = set()
-    for edge in target_graph.get_edges():
-        if not target_graph.is_edge(edge[0], edge[1]):
-            continue
-        target_edges.add(tuple(sorted([edge[0], edge[1]])))
-
-    return graph_edges == target_edges
+    for vertex in graph.get_vertices():
+        if not target_graph.is_vertex(vertex):
+            return False
+    for vertex1, vertex2 in graph.get_edges():
+        if not target_graph.is_edge(vertex1, vertex2):
+            return False
+    return True
 
 
 def get_degree_two_vertices(graph):
@@ -29,63 +31,167 @@ def get_degree_two_vertices(graph):
 
 
 def get_neighbors_list(graph, vertex):
-    neighbors = []
-    iterator = graph.neighbors(vertex)
-    while iterator.valid():
-        neighbors.append(iterator.getCurrentPosition())
-        iterator.next()
-    return neighbors
-
-
-def reducing(graph, target_graph):
-    # First phase: Remove degree-2 vertices from source graph that aren't in target
-    vertices_to_process = get_degree_two_vertices(graph)
-
-    for vertex in vertices_to_process:
-        if vertex not in target_graph.get_vertices():
-            neighbors = get_neighbors_list(graph, vertex)
-
-            if graph.count_neighbours(vertex) != 2:
-                continue
-
-            neighbor1, neighbor2 = neighbors
-
-            if not graph.is_edge(neighbor1, neighbor2):
-                graph.add_edge((neighbor1, neighbor2))
-                graph.remove_vertex(vertex)
-                print(f"Removed vertex {vertex}, added edge ({neighbor1}, {neighbor2})")
-
-    # Second phase: Add degree-2 vertices from target graph that aren't in source
-    target_vertices = get_degree_two_vertices(target_graph)
-
-    for vertex in target_vertices:
-        if vertex not in graph.get_vertices():
-            neighbors = get_neighbors_list(target_graph, vertex)
-
-            if len(neighbors) != 2:
+    return list(graph.neighbors(vertex))
+
+
+def smooth(graph, keep=None):
+    # Theta(V + E), contracts every maximal chain of degree-2 vertices that are not kept (keep(vertex) is
+    # True) in a single pass. The chain u - x1 - ... - xk - v becomes the edge u - v, exactly as if x1, ..., xk
+    # were smoothed one after the other; when u and v are already adjacent the last vertex stays (u - xk - v),
+    # since smoothing it would need a second u - v edge. Cycles of such vertices shrink to triangles.
+    # The smoothed vertices leave graph in one bulk removal, then the new edges are added.
+    # Returns the log [("smooth", vertex, (neighbour1, neighbour2))] in smoothing order.
+    adjacency = graph.adjacency()
+    vertices = graph.get_vertices()
+    # The smoothable vertices not walked yet, a chain walk takes its vertices out as it goes
+    candidates = {vertex for vertex in vertices
+                  if len(adjacency[vertex]) == 2 and (keep is None or not keep(vertex))}
+    added = set()
+    smoothed = []
+    new_edges = []
+    log = []
+
+    def adjacent(u, v):
+        return graph.is_edge(u, v) or ((u, v) if u <= v else (v, u)) in added
+
+    take = candidates.remove
+    for vertex in vertices:
+        if vertex not in candidates:
+            continue
+        take(vertex)
+        # Walk both ways up to the first vertex that can not be smoothed
+        sides = []
+        for start in adjacency[vertex]:
+            previous, current, side = vertex, start, []
+            while current in candidates:
+                take(current)
+                side.append(current)
+                first, second = adjacency[current]
+                previous, current = current, (second if first == previous else first)
+            sides.append((side, current))
+        (left, u), (right, v) = sides
+        chain = left[::-1] + [vertex] + right
+        if u == vertex:
+            # A cycle made only of smoothable vertices: keep chain[0] and the last two
+            u = v = chain[0]
+            chain = chain[1:]
+        if u == v:
+            # Both ends on the same vertex, a triangle u - x(k-1) - xk remains
+            chain, kept = chain[:-2], chain[-2:]
+            target = kept[0] if kept else None
+            if target is None:
                 continue
+        elif adjacent(u, v):
+            chain, target = chain[:-1], chain[-1]
+        else:
+            target = v
+        if not chain:
+            continue
+        for i, x in enumerate(chain):
+            log.append(("smooth", x, (u, chain[i + 1] if i + 1 < len(chain) else target)))
+        smoothed.extend(chain)
+        added.add((u, target) if u <= target else (target, u))
+        new_edges.append((u, target))
+
+    # Every removal and edge was checked above, so the two steps can not fail half way
+    graph.remove_vertices(smoothed)
+    for edge in new_edges:
+        graph.add_edge(edge)
+    return log
+
+
+def subdivide(graph, target_graph):
+    # Theta(V + E), inserts the degree-2 chains of target_graph whose vertices are missing from graph:
+    # a chain u - x - ... - y - v with u, v in graph replaces the edge u - v of graph, in one batch.
+    # Returns the log [("subdivide", (u, v), [x, ..., y])].
+    target_adjacency = target_graph.adjacency()
+    vertices = target_graph.get_vertices()
+    # The chain vertices not walked yet, as in smooth
+    candidates = {vertex for vertex in vertices
+                  if len(target_adjacency[vertex]) == 2 and not graph.is_vertex(vertex)}
+    replaced = set()
+    log = []
+    take = candidates.remove
+    for vertex in vertices:
+        if vertex not in candidates:
+            continue
+        take(vertex)
+        # Walk the chain both ways up to the first vertex that is in graph (or not of degree 2)
+        sides = []
+        for start in target_adjacency[vertex]:
+            previous, current, side = vertex, start, []
+            while current in candidates:
+                take(current)
+                side.append(current)
+                first, second = target_adjacency[current]
+                previous, current = current, (second if first == previous else first)
+            sides.append((side, current))
+        (left, u), (right, v) = sides
+        chain = left[::-1] + [vertex] + right
+        if u == v or not graph.is_vertex(u) or not graph.is_vertex(v) or not graph.is_edge(u, v):
+            continue
+        edge = (u, v) if u <= v else (v, u)
+        if edge in replaced:
+            continue
+        replaced.add(edge)
+        log.append(("subdivide", (u, v), chain))
 
-            neighbor1, neighbor2 = neighbors
+    with graph.batch() as batch:
+        for _, (u, v), chain in log:
+            batch.remove_edge(graph.get_edge((u, v)))
+            batch.add_vertices(chain)
+            path = [u] + chain + [v]
+            for vertex1, vertex2 in zip(path, path[1:]):
+                batch.add_edge((vertex1, vertex2))
+    return log
 
-            if graph.is_edge(neighbor1, neighbor2):
-                if (neighbor1, neighbor2) in graph.get_edges():
-                    graph.remove_edge((neighbor1, neighbor2))
-                else:
-                    graph.remove_edge((neighbor2, neighbor1))
 
-                graph.add_vertex(vertex)
-                graph.add_edge((vertex, neighbor1))
-                graph.add_edge((vertex, neighbor2))
-                print(f"Added vertex {vertex} between {neighbor1} and {neighbor2}")
+@instrumentation.timed("reducing")
+def reducing(graph, target_graph):
+    # Theta(V + E) for both graphs. Smooths the degree-2 vertices of graph that target_graph does not have,
+    # then subdivides the edges of graph with the degree-2 chains of target_graph that graph does not have.
+    # Returns the log of both phases.
+    with instrumentation.phase("reducing.smooth"):
+        log = smooth(graph, keep=target_graph.is_vertex)
+    smoothed = len(log)
+    with instrumentation.phase("reducing.subdivide"):
+        log.extend(subdivide(graph, target_graph))
+    if instrumentation.active() is not None:
+        instrumentation.report("reducing", smoothed=smoothed, subdivided=len(log) - smoothed)
+    return log
 
 
 if __name__ == "__main__":
+    from generators import subdivided_graph
+
     graph_file = "A5_1.txt"
     target_file = "A5_2.txt"
     g = Graph.create_from_file(graph_file)
     target_graph = Graph.create_from_file(target_file)
-    reducing(g, target_graph)
+    for step in reducing(g, target_graph):
+        if step[0] == "smooth":
+            print(f"Removed vertex {step[1]}, added edge ({step[2][0]}, {step[2][1]})")
+        else:
+            print(f"Added vertices {', '.join(step[2])} between {step[1][0]} and {step[1][1]}")
     if check_isomorphic(g, target_graph):
         print("The graphs are homeomorphic")
     else:
-        print("The graphs are not homeomorphic")
\ No newline at end of file
+        print("The graphs are not homeomorphic")
+
+    # Two subdivisions of the same random graph with 10^5 vertices in total
+    random.seed(7)
+    base = Graph()
+    names = [str(i) for i in range(5000)]
+    with base.batch() as batch:
+        batch.add_vertices(names)
+        edges = {tuple(sorted(random.sample(names, 2))) for _ in range(10000)}
+        for edge in edges:
+            batch.add_edge(edge)
+    g = subdivided_graph(base, 9, "a")
+    target_graph = subdivided_graph(base, 3, "b")
+    sizes = f"{g.get_v()} and {target_graph.get_v()} vertices"
+    start_time = time.perf_counter()
+    log = reducing(g, target_graph)
+    homeomorphic = check_isomorphic(g, target_graph)
+    print(f"{sizes}: {len(log)} steps, "
+          f"homeomorphic: {homeomorphic}, {(time.perf_counter() - start_time) * 1000:.2f}ms")
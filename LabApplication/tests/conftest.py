@@ -0,0 +1,39 @@
+import os
+import random
+import sys
+
+# The modules import each other by name (from graph import *), so the tests run with LabApplication on the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from graph import Graph
+
+
+def make_graph(edges, directed=False, vertices=()):
+    # edges are (v1, v2) pairs with the default weight, or a {(v1, v2): weight} dict. The vertices come
+    # first in the given order, then the edge endpoints that are not among them.
+    weights = edges if isinstance(edges, dict) else dict.fromkeys(edges)
+    g = Graph()
+    if directed:
+        g.change_if_directed()
+    with g.batch() as batch:
+        batch.add_vertices(dict.fromkeys([*vertices, *(v for edge in weights for v in edge)]))
+        for edge, weight in weights.items():
+            batch.add_edge(edge, weight)
+    return g
+
+
+def random_graph(n, m, directed=False, seed=0, weights=None):
+    # m distinct random edges between the vertices "0" ... "n - 1", weights is a (low, high) range of
+    # integer weights, the default weight otherwise
+    generator = random.Random(seed)
+    names = [str(i) for i in range(n)]
+    edges = {}
+    while len(edges) < m:
+        v1, v2 = generator.sample(names, 2)
+        if (v1, v2) not in edges and (directed or (v2, v1) not in edges):
+            edges[(v1, v2)] = None if weights is None else generator.randint(*weights)
+    return make_graph(edges, directed, names)
+
+
+def path_cost(g, path):
+    return sum(g.get_weight((a, b)) for a, b in zip(path, path[1:]))
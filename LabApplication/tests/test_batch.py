@@ -0,0 +1,116 @@
+import pytest
+
+from conftest import make_graph
+from graph import ListenerError
+
+
+def small_graph():
+    return make_graph({("a", "b"): 1, ("b", "c"): 2}, vertices=["a", "b", "c", "d"])
+
+
+def snapshot(g):
+    return g.get_vertices(), g.get_edges(), {v: dict(g.out_edges(v)) for v in g.get_vertices()}, g.get_version()
+
+
+def test_batch_applies_every_operation():
+    g = small_graph()
+    with g.batch() as batch:
+        batch.remove_vertex("b")
+        batch.add_edge(("a", "c"), 5)
+        batch.add_vertex("e")
+        batch.add_edge(("d", "e"))
+    assert g.get_vertices() == ["a", "c", "d", "e"]
+    assert g.get_edges() == {("a", "c"): 5, ("d", "e"): 1}
+    assert dict(g.out_edges("c")) == {"a": 5}
+
+
+@pytest.mark.parametrize("operations", [
+    [("add_vertex", "e"), ("add_edge", ("a", "x"))],
+    [("remove_vertex", "a"), ("add_edge", ("a", "d"))],
+    [("add_edge", ("c", "d")), ("add_edge", ("d", "c"))],
+    [("remove_edge", ("a", "b")), ("remove_edge", ("a", "b"))],
+    [("add_vertex", "a")],
+])
+def test_invalid_batch_leaves_graph_untouched(operations):
+    g = small_graph()
+    events = []
+    g.subscribe(lambda *event: events.append(event))
+    before = snapshot(g)
+    with pytest.raises(ValueError):
+        with g.batch() as batch:
+            for kind, argument in operations:
+                getattr(batch, kind)(argument)
+    assert snapshot(g) == before
+    assert events == []
+
+
+def test_exception_in_block_leaves_graph_untouched():
+    g = small_graph()
+    before = snapshot(g)
+    with pytest.raises(RuntimeError):
+        with g.batch() as batch:
+            batch.remove_vertex("a")
+            raise RuntimeError("abort")
+    assert snapshot(g) == before
+
+
+def test_failing_listener_runs_after_the_batch_is_applied():
+    g = small_graph()
+    seen = []
+
+    def failing(event, *args):
+        raise ValueError("listener failed")
+
+    g.subscribe(failing)
+    g.subscribe(lambda event, *args: seen.append((event, g.is_vertex("a"))))
+    with pytest.raises(ListenerError) as error:
+        with g.batch() as batch:
+            batch.remove_vertex("a")
+    assert not g.is_vertex("a")
+    assert seen == [("reset", False)]
+    assert error.value.event == "reset"
+    assert [listener for listener, _ in error.value.errors] == [failing]
+    # The graph is usable and the next batch starts normally
+    g.unsubscribe(failing)
+    with g.batch() as batch:
+        batch.add_vertex("a")
+    assert g.is_vertex("a")
+
+
+def test_bulk_removals_notify_once():
+    g = small_graph()
+    g.add_edge(("c", "d"), 3)
+    events = []
+    g.subscribe(lambda event, *args: events.append((event, args)))
+    version = g.get_version()
+    g.remove_edges([("a", "b"), ("c", "d")])
+    assert events == [("remove_edges", ([(("a", "b"), 1), (("c", "d"), 3)],))]
+    assert g.get_version() == version + 1
+    g.remove_vertices(["a", "b"])
+    assert events[1:] == [("remove_vertices", (["a", "b"],))]
+    assert g.get_version() == version + 2
+    assert g.get_vertices() == ["c", "d"]
+    assert g.get_edges() == {}
+
+
+@pytest.mark.parametrize("remove", [lambda g: g.remove_vertices(["a", "x"]),
+                                    lambda g: g.remove_edges([("a", "b"), ("a", "d")])])
+def test_invalid_bulk_removal_changes_nothing(remove):
+    g = small_graph()
+    before = snapshot(g)
+    with pytest.raises(ValueError):
+        remove(g)
+    assert snapshot(g) == before
+
+
+def test_failing_listener_sees_the_whole_bulk_removal():
+    g = small_graph()
+
+    def failing(event, *args):
+        raise RuntimeError("listener failed")
+
+    g.subscribe(failing)
+    with pytest.raises(ListenerError):
+        g.remove_vertices(["a", "d"])
+    assert g.get_vertices() == ["b", "c"]
+    assert g.get_edges() == {("b", "c"): 2}
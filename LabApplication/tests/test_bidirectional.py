@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from conftest import path_cost
+from generators import grid_graph, power_law_graph
+from priority_queues import QUEUES, make_queue
+from utility import dijkstra, bidirectional_dijkstra, bidirectional_A_star
+
+
+@pytest.mark.parametrize("kind", sorted(QUEUES))
+def test_topitem_peeks_at_the_next_pop(kind):
+    generator = random.Random(kind)
+    queue = make_queue(kind)
+    last = 0
+    for _ in range(200):
+        if queue and generator.random() < 0.4:
+            key, priority = queue.topitem()
+            assert priority >= last
+            assert queue.pop() == key
+            last = priority
+        else:
+            key = generator.randrange(50)
+            if key not in queue:
+                queue[key] = last + generator.randrange(20)
+
+
+@pytest.mark.parametrize("kind", sorted(QUEUES))
+def test_bidirectional_dijkstra_takes_every_queue(kind):
+    g = power_law_graph(400, seed=2)
+    distance = dijkstra(g, "0")[1]
+    for goal in ("1", "57", "399"):
+        path, cost, _, _ = bidirectional_dijkstra(g, "0", goal, queue=kind)
+        assert cost == distance[goal]
+        assert path[0] == "0" and path[-1] == goal and path_cost(g, path) == cost
+
+
+@pytest.mark.parametrize("kind", ["pqdict", "heapq"])
+def test_bidirectional_A_star_takes_a_queue(kind):
+    g, positions = grid_graph(15, 15, seed=4)
+    path, cost, _, _ = bidirectional_A_star(g, "0", "224", positions, queue=kind)
+    assert cost == dijkstra(g, "0")[1]["224"] == path_cost(g, path)
+
+
+def test_unknown_queue_is_rejected():
+    g, _ = grid_graph(3, 3)
+    with pytest.raises(ValueError):
+        bidirectional_dijkstra(g, "0", "8", queue="fibonacci")
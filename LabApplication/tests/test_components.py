@@ -0,0 +1,68 @@
+import sys
+
+import pytest
+
+from components import SCC_MODES, connected_components, group_components, strongly_connected_components
+from conftest import make_graph, random_graph
+
+
+def reachable(g, source):
+    seen = {source}
+    stack = [source]
+    while stack:
+        for neighbour, _ in g.out_edges(stack.pop()):
+            if neighbour not in seen:
+                seen.add(neighbour)
+                stack.append(neighbour)
+    return seen
+
+
+def mutual_reachability(g):
+    # Brute force partition: u and v share a component when each reaches the other
+    reach = {v: reachable(g, v) for v in g.get_vertices()}
+    return {frozenset(u for u in reach[v] if v in reach[u]) for v in g.get_vertices()}
+
+
+def partition(labels):
+    return {frozenset(group) for group in group_components(labels).values()}
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("m", [30, 60, 120])
+def test_modes_match_mutual_reachability(seed, m):
+    g = random_graph(40, m, True, seed)
+    expected = mutual_reachability(g)
+    labels = {mode: strongly_connected_components(g, mode) for mode in SCC_MODES}
+    assert labels["tarjan"] == labels["label_propagation"]
+    assert partition(labels["tarjan"]) == expected
+    assert sorted(set(labels["tarjan"].values())) == list(range(len(expected)))
+
+
+def test_label_propagation_with_workers():
+    g = random_graph(60, 150, True, 3)
+    assert strongly_connected_components(g, "label_propagation", workers=2) == strongly_connected_components(g)
+
+
+def test_deep_path_does_not_recurse():
+    # Far deeper than the recursion limit: a path, then a single cycle through all of it
+    n = 3 * sys.getrecursionlimit()
+    names = [str(i) for i in range(n)]
+    path = make_graph(list(zip(names, names[1:])), True)
+    labels = strongly_connected_components(path)
+    assert len(set(labels.values())) == n
+    cycle = make_graph(list(zip(names, names[1:] + names[:1])), True)
+    for mode in SCC_MODES:
+        assert set(strongly_connected_components(cycle, mode).values()) == {0}
+
+
+def test_connected_components_ignore_directions():
+    g = random_graph(50, 40, True, 1)
+    labels = connected_components(g)
+    assert connected_components(g, "label_propagation") == labels
+    undirected = make_graph(sorted({tuple(sorted(edge)) for edge in g.get_edges()}), False, g.get_vertices())
+    assert partition(labels) == mutual_reachability(undirected)
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        strongly_connected_components(make_graph([("a", "b")], True), "kosaraju")
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from conftest import path_cost, random_graph
+from contraction_hierarchies import ContractionHierarchy, CH_FORMAT_VERSION
+from generators import grid_graph
+from utility import dijkstra
+
+
+def graphs():
+    yield "grid", grid_graph(8, 9, seed=3)[0]
+    for directed in (False, True):
+        for seed in range(3):
+            yield "{}-{}".format("directed" if directed else "undirected", seed), \
+                random_graph(40, 90, directed, seed, weights=(1, 20))
+
+
+def assert_matches_dijkstra(g, ch):
+    for start in g.get_vertices()[::3]:
+        distance = dijkstra(g, start)[1]
+        for goal in g.get_vertices():
+            path, cost, _ = ch.query(start, goal)
+            assert cost == distance[goal], (start, goal)
+            if cost == float('inf'):
+                assert path == []
+            else:
+                assert path[0] == start and path[-1] == goal
+                assert path_cost(g, path) == cost
+
+
+@pytest.mark.parametrize("name,g", list(graphs()))
+@pytest.mark.parametrize("core_degree", [2, 16, 10 ** 9])
+def test_queries_match_dijkstra(name, g, core_degree):
+    # core_degree=2 stops at a large core, 10 ** 9 contracts every vertex
+    assert_matches_dijkstra(g, ContractionHierarchy.build(g, core_degree=core_degree))
+
+
+def test_small_witness_searches_still_give_shortest_paths():
+    # Witness searches that give up early only add extra shortcuts
+    g = random_graph(40, 120, True, 5, weights=(1, 20))
+    assert_matches_dijkstra(g, ContractionHierarchy.build(g, max_settled=1))
+
+
+def test_unknown_vertices_are_rejected():
+    ch = ContractionHierarchy.build(grid_graph(3, 3)[0])
+    with pytest.raises(ValueError):
+        ch.query("0", "missing")
+
+
+@pytest.mark.parametrize("name,g", list(graphs())[:3])
+def test_save_load_round_trip(tmp_path, name, g):
+    ch = ContractionHierarchy.build(g)
+    path = str(tmp_path / "graph.ch")
+    ch.save(path)
+    loaded = ContractionHierarchy.load(path)
+    assert loaded.get_core_size() == ch.get_core_size()
+    assert loaded.get_shortcut_count() == ch.get_shortcut_count()
+    for start in g.get_vertices()[::5]:
+        for goal in g.get_vertices():
+            assert loaded.query(start, goal)[:2] == ch.query(start, goal)[:2]
+    assert_matches_dijkstra(g, loaded)
+
+
+def test_load_rejects_other_versions(tmp_path):
+    path = tmp_path / "graph.ch"
+    ContractionHierarchy.build(grid_graph(3, 3)[0]).save(str(path))
+    data = json.loads(path.read_text())
+    data["version"] = CH_FORMAT_VERSION + 1
+    path.write_text(json.dumps(data))
+    with pytest.raises(ValueError, match="format"):
+        ContractionHierarchy.load(str(path))
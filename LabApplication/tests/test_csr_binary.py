@@ -0,0 +1,132 @@
+import functools
+import os
+import multiprocessing
+import pickle
+
+import numpy as np
+import pytest
+
+import batch_dijkstra
+from csr import CSRGraph
+from conftest import make_graph
+from graph import Graph
+from negative_weights import johnson
+
+
+def small_graph(directed=True):
+    edges = {("a", "b"): 3, ("b", "c"): 4, ("a", "c"): 9, ("c", "d"): 1, ("d", "a"): 2}
+    return make_graph(edges, directed, ["a", "b", "c", "d", "e"])
+
+
+def same_graph(g1, g2):
+    return (g1.get_vertices() == g2.get_vertices() and g1.get_edges() == g2.get_edges()
+            and g1.directed() == g2.directed() and g1.weighted() == g2.weighted()
+            and all(sorted(g1.out_edges(v)) == sorted(g2.out_edges(v)) for v in g1.get_vertices())
+            and all(sorted(g1.in_edges(v)) == sorted(g2.in_edges(v)) for v in g1.get_vertices()))
+
+
+@pytest.mark.parametrize("directed", [True, False])
+@pytest.mark.parametrize("mmap", [True, False])
+def test_round_trip(tmp_path, directed, mmap):
+    csr = CSRGraph.from_graph(small_graph(directed))
+    path = str(tmp_path / "graph.bin")
+    csr.save_binary(path)
+    loaded = CSRGraph.load_binary(path, mmap=mmap)
+    assert same_graph(csr, loaded)
+    assert same_graph(csr.reversed(), loaded.reversed())
+
+
+def test_truncated_file(tmp_path):
+    path = tmp_path / "graph.bin"
+    CSRGraph.from_graph(small_graph()).save_binary(str(path))
+    data = path.read_bytes()
+    path.write_bytes(data[:-16])
+    with pytest.raises(ValueError, match="truncated"):
+        CSRGraph.load_binary(str(path), verify=False)
+    with pytest.raises(ValueError, match="checksum"):
+        CSRGraph.load_binary(str(path))
+    path.write_bytes(data[:10])
+    with pytest.raises(ValueError, match="not a binary graph"):
+        CSRGraph.load_binary(str(path))
+
+
+def test_corrupted_file(tmp_path):
+    path = tmp_path / "graph.bin"
+    CSRGraph.from_graph(small_graph()).save_binary(str(path))
+    data = bytearray(path.read_bytes())
+    data[-9] ^= 0xFF
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="checksum"):
+        CSRGraph.load_binary(str(path))
+
+
+def variants(tmp_path):
+    csr = CSRGraph.from_graph(small_graph())
+    path = str(tmp_path / "graph.bin")
+    csr.save_binary(path)
+    mapped = CSRGraph.load_binary(path)
+    unmapped = CSRGraph.load_binary(path, mmap=False)
+    return csr, {
+        "built": csr,
+        "mapped": mapped,
+        "unmapped": unmapped,
+        "mapped reversed": mapped.reversed(),
+        "mapped reversed twice": mapped.reversed().reversed(),
+        "unmapped reversed": unmapped.reversed(),
+    }
+
+
+def test_every_variant_pickles(tmp_path):
+    csr, graphs = variants(tmp_path)
+    for name, graph in graphs.items():
+        expected = csr.reversed() if name.endswith(" reversed") else csr
+        assert same_graph(pickle.loads(pickle.dumps(graph)), expected), name
+
+
+def test_workers_under_spawn(tmp_path, monkeypatch):
+    # spawn (the default on macOS and Windows) pickles the graph for every worker
+    monkeypatch.setattr(batch_dijkstra, "ProcessPoolExecutor", functools.partial(
+        batch_dijkstra.ProcessPoolExecutor, mp_context=multiprocessing.get_context("spawn")))
+    csr, graphs = variants(tmp_path)
+    expected = batch_dijkstra.dijkstra_many(csr, csr.get_names())
+    for name in ("mapped", "unmapped", "mapped reversed"):
+        graph = graphs[name]
+        sequential = batch_dijkstra.dijkstra_many(graph, graph.get_names())
+        parallel = batch_dijkstra.dijkstra_many(graph, graph.get_names(), workers=2)
+        assert np.array_equal(sequential, parallel), name
+    assert np.array_equal(johnson(graphs["unmapped"], workers=2), expected)
+
+
+@pytest.mark.parametrize("names", [["a", "bb", "ccc"], ["vertex1", "v2", "v33", "v444", "v5555"]])
+@pytest.mark.parametrize("float_weights", [False, True])
+def test_mapped_arrays_are_aligned(tmp_path, names, float_weights):
+    # Name tables of every length mod 8 and both weight types, every array has to start on its own alignment
+    g = make_graph({edge: 1.5 if float_weights else 2 for edge in zip(names, names[1:])}, True, names)
+    path = str(tmp_path / "graph.bin")
+    CSRGraph.from_graph(g).save_binary(path)
+    loaded = CSRGraph.load_binary(path)
+    for buffer in (loaded.offsets, loaded.targets, loaded.weights,
+                   loaded.in_offsets, loaded.in_sources, loaded.in_weights):
+        assert isinstance(buffer, memoryview)
+        assert np.frombuffer(buffer, dtype=buffer.format).flags.aligned
+        assert np.frombuffer(buffer, dtype=buffer.format).ctypes.data % 8 == 0
+    assert same_graph(CSRGraph.from_graph(g), loaded)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_names_with_separators_round_trip(tmp_path, mmap):
+    names = ["plain", "two\nlines", "", "tab\there", "ünïcödé", "\n"]
+    g = make_graph(dict.fromkeys(zip(names, names[1:]), 1), True, names)
+    csr = CSRGraph.from_graph(g)
+    path = str(tmp_path / "graph.bin")
+    csr.save_binary(path)
+    loaded = CSRGraph.load_binary(path, mmap=mmap)
+    assert loaded.get_names() == names
+    assert same_graph(csr, loaded)
+
+
+@pytest.mark.parametrize("filename", ["A2_1.txt", "A3_v10_e40_positives_2.txt", "A4_1.txt", "A5_1.txt",
+                                      "A3_v10000_e40000_positives_7.txt"])
+def test_from_file_matches_from_graph(filename):
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), filename)
+    assert same_graph(CSRGraph.from_file(path), CSRGraph.from_graph(Graph.create_from_file(path)))
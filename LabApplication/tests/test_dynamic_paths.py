@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+import conftest
+from dynamic_paths import ShortestPathTree
+from utility import dijkstra
+
+
+def random_graph(seed, directed=True):
+    return conftest.random_graph(40, 120, directed, seed, weights=(1, 20))
+
+
+def mutate(g, generator, source):
+    vertices = g.get_vertices()
+    edges = list(g.get_edges())
+    kind = generator.choice(["add_edge", "remove_edge", "set_weight", "add_vertex", "remove_vertex",
+                             "remove_edges", "remove_vertices"])
+    if kind == "add_edge" and len(vertices) > 1:
+        u, v = generator.sample(vertices, 2)
+        if not g.is_edge(u, v) and not (g.directed() == "undirected" and g.is_edge(v, u)):
+            g.add_edge((u, v), generator.randint(1, 20))
+    elif kind == "remove_edge" and edges:
+        g.remove_edge(generator.choice(edges))
+    elif kind == "set_weight" and edges:
+        g.set_weight(generator.choice(edges), generator.randint(1, 20))
+    elif kind == "add_vertex":
+        g.add_vertex("n{}".format(generator.random()))
+    elif kind == "remove_vertex":
+        candidates = [v for v in vertices if v != source]
+        if candidates:
+            g.remove_vertex(generator.choice(candidates))
+    elif kind == "remove_edges" and edges:
+        g.remove_edges(generator.sample(edges, min(len(edges), 6)))
+    elif kind == "remove_vertices":
+        candidates = [v for v in vertices if v != source]
+        g.remove_vertices(generator.sample(candidates, min(len(candidates), 3)))
+
+
+@pytest.mark.parametrize("directed", [True, False])
+@pytest.mark.parametrize("seed", range(5))
+def test_repair_matches_fresh_dijkstra(seed, directed):
+    g = random_graph(seed, directed=directed)
+    generator = random.Random(seed)
+    tree = ShortestPathTree(g, "0")
+    for _ in range(150):
+        mutate(g, generator, "0")
+        assert tree.get_distances() == dijkstra(g, "0")[1]
+    # Every parent pointer is a tight edge of the current graph
+    distances = tree.get_distances()
+    for vertex, parent in tree.get_parents().items():
+        if parent is not None:
+            assert distances[parent] + g.get_weight((parent, vertex)) == distances[vertex]
+    tree.close()
+
+
+def test_source_removed_in_a_batch():
+    g = random_graph(1)
+    tree = ShortestPathTree(g, "0")
+    with g.batch() as batch:
+        batch.remove_vertex("0")
+        batch.add_vertex("x")
+    assert set(tree.get_distances()) == set(g.get_vertices())
+    assert all(distance == float('inf') for distance in tree.get_distances().values())
+    assert all(parent is None for parent in tree.get_parents().values())
+
+
+def test_source_removed_then_change_if_weighted():
+    g = random_graph(2)
+    tree = ShortestPathTree(g, "0")
+    g.remove_vertex("0")
+    g.change_if_weighted()
+    assert set(tree.get_distances()) == set(g.get_vertices())
+    assert all(distance == float('inf') for distance in tree.get_distances().values())
+    assert tree.get_path("1") == []
+
+
+@pytest.mark.parametrize("directed", [True, False])
+def test_bulk_removal_of_a_subtree_and_the_source(directed):
+    g = random_graph(11, directed=directed)
+    tree = ShortestPathTree(g, "0")
+    # A whole branch of the tree at once, parents before and after their children
+    branch = [v for v, parent in tree.get_parents().items() if parent == "0"][:2]
+    branch += [v for v, parent in tree.get_parents().items() if parent in branch]
+    g.remove_vertices(list(reversed(branch)))
+    assert tree.get_distances() == dijkstra(g, "0")[1]
+    g.remove_vertices(["0", g.get_vertices()[-1]])
+    assert set(tree.get_distances()) == set(g.get_vertices())
+    assert all(d == float('inf') for d in tree.get_distances().values())
+    tree.close()
@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from conftest import make_graph, random_graph
+from generators import grid_graph, power_law_graph
+from fingerprint import find_isomorphism, is_isomorphic, wl_fingerprint
+
+
+def relabelled(g, seed):
+    # The same graph with shuffled, renamed vertices, edges added in another order
+    names = list(g.get_vertices())
+    shuffled = names[:]
+    random.Random(seed).shuffle(shuffled)
+    rename = {v: "v" + w for v, w in zip(names, shuffled)}
+    edges = [(rename[v1], rename[v2]) for v1, v2 in g.get_edges()]
+    random.Random(seed + 1).shuffle(edges)
+    return make_graph(edges, g.directed() == "directed", rename.values())
+
+
+def assert_isomorphism(g1, g2, mapping):
+    assert mapping is not None
+    assert sorted(mapping) == sorted(g1.get_vertices())
+    assert sorted(mapping.values()) == sorted(g2.get_vertices())
+    for v1, v2 in g1.get_edges():
+        assert g2.is_edge(mapping[v1], mapping[v2])
+    assert g1.get_e() == g2.get_e()
+
+
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("seed", range(4))
+def test_relabelled_random_graphs(directed, seed):
+    g = random_graph(60, 150, directed, seed)
+    other = relabelled(g, seed)
+    assert wl_fingerprint(g) == wl_fingerprint(other)
+    assert_isomorphism(g, other, find_isomorphism(g, other))
+
+
+@pytest.mark.parametrize("g", [grid_graph(7, 7)[0], power_law_graph(200, seed=3)], ids=["grid", "power_law"])
+def test_relabelled_symmetric_graphs(g):
+    # Grids have many automorphisms, so the search has to pick among equally coloured candidates
+    other = relabelled(g, 11)
+    assert_isomorphism(g, other, find_isomorphism(g, other))
+
+
+def test_regular_graphs_with_equal_fingerprints_are_told_apart():
+    # A 6-cycle and two triangles are both 2-regular, colour refinement can not separate them
+    hexagon = make_graph([(str(i), str((i + 1) % 6)) for i in range(6)])
+    triangles = make_graph([("0", "1"), ("1", "2"), ("2", "0"), ("3", "4"), ("4", "5"), ("5", "3")])
+    assert wl_fingerprint(hexagon) == wl_fingerprint(triangles)
+    assert find_isomorphism(hexagon, triangles) is None
+    assert not is_isomorphic(hexagon, triangles)
+
+
+def test_directed_orientation_matters():
+    chain = make_graph([("a", "b"), ("b", "c")], True)
+    fork = make_graph([("b", "a"), ("b", "c")], True)
+    assert not is_isomorphic(chain, fork)
+    assert_isomorphism(chain, make_graph([("z", "y"), ("y", "x")], True),
+                       find_isomorphism(chain, make_graph([("z", "y"), ("y", "x")], True)))
+    assert not is_isomorphic(chain, make_graph([("a", "b"), ("b", "c")]))
+
+
+def test_fingerprint_follows_changes():
+    g = random_graph(30, 60, False, 5)
+    other = relabelled(g, 5)
+    assert is_isomorphic(g, other)
+    v1, v2 = next(iter(g.get_edges()))
+    g.remove_edge((v1, v2))
+    assert not is_isomorphic(g, other)
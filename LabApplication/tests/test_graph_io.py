@@ -0,0 +1,63 @@
+import pytest
+
+from csr import CSRGraph
+from graph import Graph
+from graph_io import GraphFileReader
+
+
+def write(tmp_path, lines):
+    path = tmp_path / "graph.txt"
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_reader_yields_line_numbers(tmp_path):
+    path = write(tmp_path, ["directed weighted", "a b 3", "", "c", "b c -2"])
+    with GraphFileReader(path) as reader:
+        assert reader.directed and reader.weighted
+        assert list(reader) == [(2, "a", "b", 3), (4, "c", None, None), (5, "b", "c", -2)]
+
+
+@pytest.mark.parametrize("header", ["weighted", "weighted directed extra", "weighted weighted", "directed graph"])
+def test_bad_header_names_line_1(tmp_path, header):
+    path = write(tmp_path, [header, "a b 1"])
+    for load in (Graph.create_from_file, CSRGraph.from_file):
+        with pytest.raises(ValueError, match="graph.txt, line 1: "):
+            load(path)
+
+
+@pytest.mark.parametrize("lines,line_number,message", [
+    # Blank lines still count
+    (["undirected weighted", "a b 1", "", "b c x"], 4, "Invalid weight 'x' for edge \\(b, c\\)"),
+    (["undirected weighted", "a b 1", "b c"], 3, "improperly formatted"),
+    (["undirected unweighted", "a b", "c", "a b c"], 4, "improperly formatted"),
+    (["directed weighted", "a b 1", "b c 2", "a b c d", "c a 1"], 4, "improperly formatted"),
+])
+def test_malformed_line_is_named(tmp_path, lines, line_number, message):
+    path = write(tmp_path, lines)
+    for load in (Graph.create_from_file, CSRGraph.from_file):
+        with pytest.raises(ValueError, match="graph.txt, line {}: .*{}".format(line_number, message)):
+            load(path)
+
+
+@pytest.mark.parametrize("lines,line_number", [
+    (["undirected weighted", "a b 1", "c", "", "b a 2"], 5),
+    (["directed unweighted", "a b", "b a", "a b"], 4),
+])
+def test_duplicate_edge_is_named(tmp_path, lines, line_number):
+    with pytest.raises(ValueError, match="graph.txt, line {}: Edge already exists".format(line_number)):
+        Graph.create_from_file(write(tmp_path, lines))
+
+
+def test_duplicate_vertex_is_named(tmp_path):
+    path = write(tmp_path, ["directed weighted", "a b 1", "c", "a c 2", "c"])
+    for load in (Graph.create_from_file, CSRGraph.from_file):
+        with pytest.raises(ValueError, match="graph.txt, line 5: "):
+            load(path)
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "graph.txt"
+    path.write_text("")
+    with pytest.raises(ValueError, match="empty"):
+        Graph.create_from_file(str(path))
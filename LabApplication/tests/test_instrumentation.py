@@ -0,0 +1,35 @@
+from unittest import mock
+
+import pytest
+
+from generators import grid_graph
+import instrumentation
+from utility import A_star, dijkstra
+
+
+def relaxed_by_search(g, *args, **kwargs):
+    # Edges the search itself scans, counted on the out_edges calls of a run without a recorder
+    scanned = []
+    out_edges = g.out_edges
+    with mock.patch.object(g, "out_edges", side_effect=lambda v: scanned.append(len(out_edges(v))) or out_edges(v)):
+        A_star(g, *args, **kwargs)
+    return sum(scanned)
+
+
+@pytest.mark.parametrize("queue", ["pqdict", "heapq"])
+def test_A_star_counters_match_the_search(queue):
+    g, positions = grid_graph(12, 12, seed=5)
+    with instrumentation.recording() as recorder:
+        _, g_score, push, pop = A_star(g, "0", "143", heuristic=positions, queue=queue)
+    assert g_score["143"] == dijkstra(g, "0")[1]["143"]
+    assert recorder.counters["A_star.pop"] == recorder.counters["A_star.settled"] == pop
+    assert recorder.counters["A_star.push"] == push
+    assert recorder.counters["A_star.relaxed"] == relaxed_by_search(g, "0", "143", heuristic=positions, queue=queue)
+
+
+def test_disabled_instrumentation_reports_nothing():
+    g, positions = grid_graph(6, 6)
+    with mock.patch.object(instrumentation, "report") as report:
+        A_star(g, "0", "35", heuristic=positions)
+        dijkstra(g, "0")
+    report.assert_not_called()
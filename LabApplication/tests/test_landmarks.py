@@ -0,0 +1,68 @@
+import pytest
+
+from conftest import random_graph
+from generators import grid_graph
+from landmarks import Landmarks
+from utility import A_star, dijkstra
+
+
+def graphs():
+    yield "grid", grid_graph(8, 9, seed=3)[0]
+    for directed in (False, True):
+        for seed in range(3):
+            yield "{}-{}".format("directed" if directed else "undirected", seed), \
+                random_graph(40, 90, directed, seed, weights=(1, 20))
+
+
+@pytest.mark.parametrize("name,g", list(graphs()))
+@pytest.mark.parametrize("k", [1, 4])
+def test_bounds_never_overestimate(name, g, k):
+    landmarks = Landmarks.build(g, k=k)
+    for start in g.get_vertices():
+        distance = dijkstra(g, start)[1]
+        for goal in g.get_vertices():
+            assert landmarks.distance_bound(start, goal) <= distance[goal], (start, goal)
+
+
+@pytest.mark.parametrize("name,g", list(graphs()))
+def test_A_star_with_landmarks_matches_dijkstra(name, g):
+    landmarks = Landmarks.build(g, k=4, seed=1)
+    for start in g.get_vertices()[::4]:
+        distance = dijkstra(g, start)[1]
+        for goal in g.get_vertices():
+            assert A_star(g, start, goal, heuristic=landmarks)[1][goal] == distance[goal], (start, goal)
+
+
+def test_landmarks_are_exact_at_the_landmarks():
+    g = random_graph(30, 80, True, 4, weights=(1, 9))
+    landmarks = Landmarks.build(g, k=3)
+    for landmark in landmarks.get_landmarks():
+        distance = dijkstra(g, landmark)[1]
+        for goal in g.get_vertices():
+            if distance[goal] != float('inf'):
+                assert landmarks.distance_bound(landmark, goal) == distance[goal]
+
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+@pytest.mark.parametrize("name,g", list(graphs())[:3])
+def test_save_load_round_trip(tmp_path, name, g, use_mmap):
+    landmarks = Landmarks.build(g, k=4)
+    path = str(tmp_path / "graph.landmarks")
+    landmarks.save(path)
+    loaded = Landmarks.load(path, use_mmap=use_mmap)
+    assert loaded.get_landmarks() == landmarks.get_landmarks()
+    for start in g.get_vertices():
+        for goal in g.get_vertices()[::3]:
+            assert loaded.distance_bound(start, goal) == landmarks.distance_bound(start, goal)
+
+
+def test_load_rejects_bad_files(tmp_path):
+    path = tmp_path / "graph.landmarks"
+    Landmarks.build(grid_graph(3, 3)[0], k=2).save(str(path))
+    data = path.read_bytes()
+    path.write_bytes(data[:-8])
+    with pytest.raises(ValueError, match="truncated"):
+        Landmarks.load(str(path))
+    path.write_bytes(b"X" + data[1:])
+    with pytest.raises(ValueError, match="not a landmark table"):
+        Landmarks.load(str(path))
@@ -0,0 +1,42 @@
+import pytest
+
+from graph import Graph
+from generators import grid_graph
+from kruskal import kruskal
+from mst import choose_mst_engine, auto_mst_workers, minimum_spanning_tree, MST_ENGINES
+
+
+def complete_graph(n):
+    g = Graph()
+    with g.batch() as batch:
+        batch.add_vertices(str(i) for i in range(n))
+        for i in range(n):
+            for j in range(i + 1, n):
+                batch.add_edge((str(i), str(j)), (i * 7 + j * 13) % 17 + 1)
+    return g
+
+
+def tree_weight(tree_edges):
+    return sum(weight for _, _, weight in tree_edges)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_auto_keeps_kruskal_on_sparse_graphs(workers):
+    g, _ = grid_graph(10, 10)
+    assert choose_mst_engine(g) == "kruskal"
+    assert auto_mst_workers(g, "kruskal", workers) == 1
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_auto_picks_boruvka_on_dense_graphs(workers):
+    g = complete_graph(30)
+    assert choose_mst_engine(g) == "boruvka"
+    # Far below the size where a process pool pays
+    assert auto_mst_workers(g, "boruvka", workers) == 1
+
+
+@pytest.mark.parametrize("engine", ["auto"] + sorted(MST_ENGINES))
+def test_engines_agree_on_the_tree_weight(engine):
+    for g in (grid_graph(8, 9)[0], complete_graph(20)):
+        expected = tree_weight(kruskal(g, edges_only=True))
+        assert tree_weight(minimum_spanning_tree(g, engine, edges_only=True)) == expected
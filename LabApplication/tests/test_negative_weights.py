@@ -0,0 +1,126 @@
+import random
+
+import numpy as np
+import pytest
+
+from conftest import make_graph
+from csr import CSRGraph
+from negative_weights import NegativeCycleError, bellman_ford, johnson, spfa
+
+
+def negative_graph(n, m, seed, float_weights=False):
+    # Non negative weights shifted by random vertex potentials: the cycles keep their non negative
+    # lengths while many single edges turn negative
+    generator = random.Random(seed)
+    names = [str(i) for i in range(n)]
+    potential = {name: generator.randint(0, 15) for name in names}
+    edges = {}
+    while len(edges) < m:
+        v1, v2 = generator.sample(names, 2)
+        weight = generator.randint(0, 10) + potential[v1] - potential[v2]
+        edges[(v1, v2)] = weight + 0.25 if float_weights else weight
+    return make_graph(edges, True, names)
+
+
+def floyd_warshall(g):
+    names = g.get_vertices()
+    distance = {u: {v: 0 if u == v else float('inf') for v in names} for u in names}
+    for (u, v), weight in g.get_edges().items():
+        distance[u][v] = min(distance[u][v], weight)
+    for k in names:
+        for i in names:
+            through = distance[i][k]
+            if through == float('inf'):
+                continue
+            for j in names:
+                if through + distance[k][j] < distance[i][j]:
+                    distance[i][j] = through + distance[k][j]
+    return distance
+
+
+def assert_tree(g, source, parent, distance):
+    for vertex, vertex_parent in parent.items():
+        if vertex_parent is not None:
+            assert distance[vertex_parent] + g.get_weight((vertex_parent, vertex)) == distance[vertex]
+        else:
+            assert vertex == source or distance[vertex] == float('inf')
+
+
+def assert_cycle(g, cycle):
+    assert cycle
+    edges = list(zip(cycle, cycle[1:] + cycle[:1]))
+    assert sum(g.get_weight(edge) for edge in edges) < 0
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("float_weights", [False, True])
+def test_single_source_matches_floyd_warshall(seed, float_weights):
+    g = negative_graph(14, 40, seed, float_weights)
+    assert any(weight < 0 for weight in g.get_edges().values())
+    expected = floyd_warshall(g)
+    for source in g.get_vertices():
+        parent, distance, _ = bellman_ford(g, source)
+        assert distance == expected[source]
+        assert_tree(g, source, parent, distance)
+        parent, distance, _, _ = spfa(g, source)
+        assert distance == expected[source]
+        assert_tree(g, source, parent, distance)
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("float_weights", [False, True])
+def test_johnson_matches_floyd_warshall(seed, float_weights):
+    g = negative_graph(14, 40, seed, float_weights)
+    expected = floyd_warshall(g)
+    names = g.get_vertices()
+    matrix = [[expected[u][v] for v in names] for u in names]
+    assert np.array_equal(johnson(g), np.array(matrix, dtype=float))
+
+
+def test_bellman_ford_on_csr_ids():
+    # Vertices without inbound arcs and several arcs into one vertex, the shapes reduceat has to segment
+    g = make_graph({("a", "b"): 4, ("a", "c"): 2, ("c", "b"): -3, ("d", "b"): -10, ("b", "e"): 1,
+                    ("c", "e"): 1}, True, ["f"])
+    parent, distance, rounds = bellman_ford(CSRGraph.from_graph(g), "a")
+    assert distance == {"f": float('inf'), "a": 0, "b": -1, "c": 2, "d": float('inf'), "e": 0}
+    assert parent == {"f": None, "a": None, "b": "c", "c": "a", "d": None, "e": "b"}
+    assert all(isinstance(d, int) for d in distance.values() if d != float('inf'))
+    assert rounds <= g.get_v()
+
+
+def test_graph_without_edges():
+    g = make_graph({}, True, ["a", "b"])
+    assert bellman_ford(g, "a")[1] == {"a": 0, "b": float('inf')}
+    assert spfa(g, "a")[1] == {"a": 0, "b": float('inf')}
+    assert np.array_equal(johnson(g), np.array([[0, np.inf], [np.inf, 0]]))
+
+
+@pytest.mark.parametrize("function", [bellman_ford, spfa])
+def test_reachable_negative_cycle(function):
+    g = make_graph({("s", "a"): 1, ("a", "b"): 2, ("b", "c"): -4, ("c", "a"): 1, ("c", "t"): 3}, True)
+    with pytest.raises(NegativeCycleError) as error:
+        function(g, "s")
+    assert_cycle(g, error.value.cycle)
+    assert sorted(error.value.cycle) == ["a", "b", "c"]
+    with pytest.raises(NegativeCycleError):
+        johnson(g)
+
+
+def test_unreachable_negative_cycle():
+    # Only the single source searches from s can ignore the cycle, Johnson needs every source
+    g = make_graph({("s", "t"): 2, ("t", "u"): -1, ("a", "b"): 1, ("b", "a"): -2, ("a", "t"): 0}, True)
+    for function in (bellman_ford, spfa):
+        distance = function(g, "s")[1]
+        assert distance == {"s": 0, "t": 2, "u": 1, "a": float('inf'), "b": float('inf')}
+    with pytest.raises(NegativeCycleError) as error:
+        bellman_ford(g, "a")
+    assert_cycle(g, error.value.cycle)
+    with pytest.raises(NegativeCycleError):
+        johnson(g)
+
+
+def test_undirected_negative_edge_is_a_cycle():
+    g = make_graph({("a", "b"): 3, ("b", "c"): -1})
+    for function in (bellman_ford, spfa):
+        with pytest.raises(NegativeCycleError):
+            function(g, "a")
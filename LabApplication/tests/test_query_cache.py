@@ -0,0 +1,50 @@
+import pytest
+
+from conftest import path_cost
+from generators import grid_graph
+from query_cache import PathQueryCache
+from utility import dijkstra
+
+
+def test_a_miss_keeps_the_tree_for_every_goal():
+    g, _ = grid_graph(8, 8)
+    cache = PathQueryCache(g)
+    distance = dijkstra(g, "0")[1]
+    for goal in ("63", "7", "56", "63"):
+        path, cost = cache.shortest_path("0", goal)
+        assert cost == distance[goal] == path_cost(g, path)
+        assert path[0] == "0" and path[-1] == goal
+    assert (cache.misses, cache.hits) == (1, 3)
+    assert cache.distances_from("0") == distance
+    assert cache.hits == 4
+
+
+def test_mutation_purges_every_entry_and_gives_fresh_results():
+    g, _ = grid_graph(6, 6)
+    cache = PathQueryCache(g)
+    for start in ("0", "5", "30"):
+        cache.shortest_path(start, "35")
+    assert len(cache) == 3
+    path, _ = cache.shortest_path("0", "35")
+    g.set_weight((path[0], path[1]), 1000)
+
+    path, cost = cache.shortest_path("0", "35")
+    assert cost == dijkstra(g, "0")[1]["35"] == path_cost(g, path)
+    assert len(cache) == 1
+    assert cache.stale == 3
+
+    g.remove_vertex("35")
+    with pytest.raises(ValueError):
+        cache.shortest_path("0", "35")
+    assert len(cache) == 0
+
+
+def test_unreachable_goal_and_eviction():
+    g, _ = grid_graph(3, 3)
+    g.add_vertex("alone")
+    cache = PathQueryCache(g, capacity=2)
+    assert cache.shortest_path("0", "alone") == ([], float('inf'))
+    for start in ("1", "2", "3"):
+        cache.shortest_path(start, "8")
+    assert len(cache) == 2
+    assert cache.evictions == 2
@@ -0,0 +1,41 @@
+from unittest import mock
+
+import pytest
+
+from csr import CSRGraph
+from generators import grid_graph, power_law_graph
+import traversal
+from traversal import FrontierBFS
+
+
+def depths(iterator):
+    return dict(iterator)
+
+
+@pytest.mark.parametrize("direction_optimizing", [False, True])
+def test_frontier_bfs_matches_bfs(direction_optimizing):
+    g = power_law_graph(300, seed=3)
+    expected = depths(g.BFS_iter("0"))
+    assert depths(FrontierBFS(g, "0", direction_optimizing)) == expected
+    assert depths(FrontierBFS(CSRGraph.from_graph(g), "0", direction_optimizing)) == expected
+
+
+def test_conversion_is_reused_until_the_graph_changes():
+    g, _ = grid_graph(6, 6)
+    with mock.patch.object(traversal.CSRGraph, "from_graph", wraps=CSRGraph.from_graph) as from_graph:
+        for _ in range(3):
+            depths(FrontierBFS(g, "0"))
+        assert from_graph.call_count == 1
+
+        g.remove_edge(("0", "1"))
+        after = depths(FrontierBFS(g, "0"))
+        assert from_graph.call_count == 2
+    assert after == depths(g.BFS_iter("0"))
+    assert after["1"] == 3
+
+
+def test_prebuilt_csr_is_not_converted():
+    csr = CSRGraph.from_graph(grid_graph(4, 4)[0])
+    with mock.patch.object(traversal.CSRGraph, "from_graph") as from_graph:
+        depths(FrontierBFS(csr, "0"))
+    from_graph.assert_not_called()
@@ -0,0 +1,127 @@
+from unittest import mock
+
+import pytest
+
+import conftest
+from conftest import make_graph
+from csr import CSRGraph
+from kruskal import kruskal
+from traversal import FrontierBFS
+from utility import dijkstra, bidirectional_dijkstra
+
+
+def random_graph(n, m, directed, seed):
+    return conftest.random_graph(n, m, directed, seed, weights=(1, 9))
+
+
+def materialized(g, edges, directed):
+    return make_graph(edges, directed, g.get_vertices())
+
+
+def reversed_copy(g):
+    edges = {(v2, v1): weight for (v1, v2), weight in g.get_edges().items()}
+    return materialized(g, edges, g.directed() == "directed")
+
+
+def undirected_copy(g):
+    edges = {}
+    for (v1, v2), weight in g.get_edges().items():
+        key = (v2, v1) if (v2, v1) in edges else (v1, v2)
+        edges[key] = min(weight, edges.get(key, weight))
+    return materialized(g, edges, False)
+
+
+def unweighted_copy(g):
+    copy = materialized(g, g.get_edges(), g.directed() == "directed")
+    copy.change_if_weighted()
+    return copy
+
+
+VIEWS = {
+    "reversed": (lambda g: g.reversed(), reversed_copy),
+    "undirected": (lambda g: g.as_undirected(), undirected_copy),
+    "unweighted": (lambda g: g.as_unweighted(), unweighted_copy),
+}
+
+
+def pairs(edges, directed):
+    # Edge dict keyed independently of the stored orientation when undirected
+    return {(edge if directed else frozenset(edge)): weight for edge, weight in edges.items()}
+
+
+def graphs():
+    for directed in (False, True):
+        for seed in range(3):
+            g = random_graph(40, 120, directed, seed)
+            yield "{}-{}".format("directed" if directed else "undirected", seed), g
+
+
+@pytest.mark.parametrize("backend", ["graph", "csr"])
+@pytest.mark.parametrize("kind", sorted(VIEWS))
+def test_views_match_materialized_copies(kind, backend):
+    make_view, make_copy = VIEWS[kind]
+    for name, g in graphs():
+        copy = make_copy(g)
+        view = make_view(g if backend == "graph" else CSRGraph.from_graph(g))
+        directed = copy.directed() == "directed"
+        assert view.directed() == copy.directed(), name
+        assert view.weighted() == copy.weighted(), name
+        assert view.get_e() == copy.get_e(), name
+        assert pairs(view.get_edges(), directed) == pairs(copy.get_edges(), directed), name
+
+        # An unweighted Graph refuses get_weight, its edges keep the weight 1 the view returns
+        weights = pairs(copy.get_edges(), directed)
+        vertices = copy.get_vertices()
+        for v1 in vertices[:10]:
+            assert sorted(view.out_edges(v1)) == sorted(copy.out_edges(v1)), name
+            assert sorted(view.in_edges(v1)) == sorted(copy.in_edges(v1)), name
+            for v2 in vertices:
+                assert view.is_edge(v1, v2) == copy.is_edge(v1, v2), name
+                if copy.is_edge(v1, v2):
+                    assert view.get_weight((v1, v2)) == weights[(v1, v2) if directed else frozenset((v1, v2))], name
+
+        for source in vertices[:3]:
+            assert dijkstra(view, source)[1] == dijkstra(copy, source)[1], name
+            assert dict(view.BFS_iter(source)) == dict(copy.BFS_iter(source)), name
+            assert dict(FrontierBFS(view, source)) == dict(copy.BFS_iter(source)), name
+            cost = bidirectional_dijkstra(view, source, vertices[-1])[1]
+            assert cost == bidirectional_dijkstra(copy, source, vertices[-1])[1], name
+        if not directed:
+            expected = sum(weight for _, _, weight in kruskal(copy, forest=True, edges_only=True))
+            assert sum(weight for _, _, weight in kruskal(view, forest=True, edges_only=True)) == expected, name
+
+
+def test_views_follow_the_graph():
+    g = random_graph(20, 40, True, 7)
+    reversed_view, undirected_view, unweighted_view = g.reversed(), g.as_undirected(), g.as_unweighted()
+    v1, v2 = next(iter(g.get_edges()))
+    g.remove_edge((v1, v2))
+    assert not reversed_view.is_edge(v2, v1)
+    assert undirected_view.is_edge(v1, v2) == g.is_edge(v2, v1)
+    assert not unweighted_view.is_edge(v1, v2)
+    assert pairs(reversed_view.get_edges(), True) == pairs(reversed_copy(g).get_edges(), True)
+
+
+@pytest.mark.parametrize("backend", ["graph", "csr"])
+@pytest.mark.parametrize("kind", sorted(VIEWS))
+def test_missing_edges_raise_like_the_graph(kind, backend):
+    g = random_graph(10, 12, True, 3)
+    base = g if backend == "graph" else CSRGraph.from_graph(g)
+    view = VIEWS[kind][0](base)
+    missing = [(v1, v2) for v1 in g.get_vertices() for v2 in g.get_vertices()
+               if v1 != v2 and not view.is_edge(v1, v2)]
+    for edge in missing[:5] + [("0", "not a vertex"), ("not a vertex", "0")]:
+        with pytest.raises(ValueError, match="does not exist"):
+            view.get_weight(edge)
+
+
+def test_undirected_edge_count_is_cached_per_version():
+    g = random_graph(30, 80, True, 9)
+    view = g.as_undirected()
+    with mock.patch.object(g, "get_edges", wraps=g.get_edges) as get_edges:
+        count = view.get_e()
+        assert view.get_e() == view.get_e() == count == undirected_copy(g).get_e()
+        assert get_edges.call_count == 2
+        v1, v2 = next(iter(g.get_edges()))
+        g.remove_edge((v1, v2))
+        assert view.get_e() == undirected_copy(g).get_e()
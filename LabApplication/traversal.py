@@ -0,0 +1,115 @@
+from csr import CSRGraph
+import instrumentation
+import weakref
+
+# graph -> (version, CSRGraph of that version), so repeated traversals of an unchanged graph convert it once
+_csr_cache = weakref.WeakKeyDictionary()
+
+
+def _csr_of(graph):
+    # Theta(1) for a CSRGraph or a graph that did not change since its last conversion, Theta(V + E) otherwise
+    if isinstance(graph, CSRGraph):
+        return graph
+    entry = _csr_cache.get(graph)
+    if entry is None or entry[0] != graph.get_version():
+        entry = (graph.get_version(), CSRGraph.from_graph(graph))
+        _csr_cache[graph] = entry
+    return entry[1]
+
+
+class FrontierBFS:
+    # Level synchronous BFS over the integer ids of a CSRGraph. Any other graph is converted once per version
+    # and the conversion is kept for the next FrontierBFS over it, passing a prebuilt CSRGraph skips it entirely.
+    # Each step expands a whole frontier with a bytearray visited set and yields its vertices as
+    # (vertex, depth), like BFS, with get_path_length() giving the depth of the last one returned.
+    # With direction_optimizing=True a step is run bottom-up (every unvisited vertex looks for a parent
+    # in the frontier through its inbound neighbours) when the frontier's outgoing edges outnumber the
+    # unvisited vertices' edges / alpha, and switches back once the frontier is smaller than V / beta.
+    def __init__(self, graph, vertex, direction_optimizing=False, alpha=14, beta=24):
+        # Theta(V + E) when graph changed since its last conversion, Theta(V) otherwise
+        self.__graph = _csr_of(graph)
+        self.__direction_optimizing = direction_optimizing
+        self.__alpha = alpha
+        self.__beta = beta
+        self.__levels = self.__frontiers(self.__graph.id_of(vertex))
+        self.__current = []
+        self.__position = 0
+        self.__depth = 0
+        self.__last = (vertex, 0)
+        self.bottom_up_steps = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while self.__position >= len(self.__current):
+            self.__depth, self.__current = next(self.__levels)
+            self.__position = 0
+        self.__last = (self.__graph.name_of(self.__current[self.__position]), self.__depth)
+        self.__position += 1
+        return self.__last
+
+    def get_path_length(self):
+        return self.__last[1]
+
+    def iter_levels(self):
+        # Yields (depth, [vertex names]) for each remaining frontier
+        names = self.__graph.get_names()
+        if self.__position < len(self.__current):
+            yield self.__depth, [names[i] for i in self.__current[self.__position:]]
+            self.__position = len(self.__current)
+        for depth, frontier in self.__levels:
+            self.__depth, self.__current = depth, frontier
+            self.__position = len(frontier)
+            yield depth, [names[i] for i in frontier]
+
+    def __frontiers(self, source):
+        # Theta(V + E) top-down, bottom-up steps cost Theta(V + edges checked)
+        graph = self.__graph
+        n = graph.get_v()
+        offsets, targets = graph.offsets, graph.targets
+        in_offsets, in_sources = graph.in_offsets, graph.in_sources
+        visited = bytearray(n)
+        visited[source] = 1
+        frontier = [source]
+        depth = 0
+        unvisited_edges = len(targets) - (offsets[source + 1] - offsets[source])
+        bottom_up = False
+
+        while frontier:
+            yield depth, frontier
+            depth += 1
+            if self.__direction_optimizing:
+                frontier_edges = sum(offsets[u + 1] - offsets[u] for u in frontier)
+                if not bottom_up and frontier_edges > unvisited_edges / self.__alpha:
+                    bottom_up = True
+                elif bottom_up and len(frontier) < n / self.__beta:
+                    bottom_up = False
+
+            next_frontier = []
+            if bottom_up:
+                self.bottom_up_steps += 1
+                in_frontier = bytearray(n)
+                for u in frontier:
+                    in_frontier[u] = 1
+                for v in range(n):
+                    if visited[v]:
+                        continue
+                    for p in range(in_offsets[v], in_offsets[v + 1]):
+                        if in_frontier[in_sources[p]]:
+                            visited[v] = 1
+                            next_frontier.append(v)
+                            break
+            else:
+                for u in frontier:
+                    for p in range(offsets[u], offsets[u + 1]):
+                        v = targets[p]
+                        if not visited[v]:
+                            visited[v] = 1
+                            next_frontier.append(v)
+            if self.__direction_optimizing:
+                unvisited_edges -= sum(offsets[v + 1] - offsets[v] for v in next_frontier)
+            frontier = next_frontier
+        if instrumentation.active() is not None:
+            instrumentation.report("frontier_BFS", settled=sum(visited), levels=depth,
+                                   bottom_up_steps=self.bottom_up_steps)
@@ -0,0 +1,67 @@
+class DisjointSet:
+    # Union-find over hashable elements with path halving and union by size.
+    # Any sequence of m operations on n elements costs O(m * alpha(n)).
+    def __init__(self, elements=()):
+        # Theta(n)
+        self.__parent = {}
+        self.__size = {}
+        self.__count = 0
+        for element in elements:
+            self.add(element)
+
+    def add(self, element):
+        # Theta(1), a new singleton set
+        if element in self.__parent:
+            raise ValueError("Element {} already exists".format(element))
+        self.__parent[element] = element
+        self.__size[element] = 1
+        self.__count += 1
+
+    def find(self, element):
+        # O(alpha(n)) amortized, returns the representative of the set of element
+        parent = self.__parent
+        if element not in parent:
+            raise ValueError("Element {} is not in the disjoint set".format(element))
+        while parent[element] != element:
+            # Path halving: point every other node on the way to its grandparent
+            parent[element] = parent[parent[element]]
+            element = parent[element]
+        return element
+
+    def union(self, element1, element2):
+        # O(alpha(n)) amortized, returns False if both were already in the same set
+        root1 = self.find(element1)
+        root2 = self.find(element2)
+        if root1 == root2:
+            return False
+        if self.__size[root1] < self.__size[root2]:
+            root1, root2 = root2, root1
+        self.__parent[root2] = root1
+        self.__size[root1] += self.__size.pop(root2)
+        self.__count -= 1
+        return True
+
+    def connected(self, element1, element2):
+        # O(alpha(n)) amortized
+        return self.find(element1) == self.find(element2)
+
+    def size_of(self, element):
+        # O(alpha(n)) amortized, number of elements in the set of element
+        return self.__size[self.find(element)]
+
+    def count(self):
+        # Theta(1), number of disjoint sets
+        return self.__count
+
+    def groups(self):
+        # O(n * alpha(n)), representative -> list of members
+        result = {}
+        for element in self.__parent:
+            result.setdefault(self.find(element), []).append(element)
+        return result
+
+    def __contains__(self, element):
+        return element in self.__parent
+
+    def __len__(self):
+        return len(self.__parent)
@@ -1,85 +1,290 @@
 from graph import *
-from pqdict import pqdict
-import math
-import time
+from priority_queues import make_queue
+from collections import defaultdict
+import instrumentation
+
+@instrumentation.timed("dijkstra")
+def dijkstra(g: 'Graph', v1, queue="heapq"):
+    # O((V + E) * log V), queue picks the priority queue backend (see priority_queues.QUEUES), the default
+    # lazy-deletion heapq one is about twice as fast as pqdict in CPython;
+    # "dial" and "radix" need integer weights and are O(V + E + largest distance) / O(E + V * log C)
+    pq_push_count = 0
+
+    if not g.is_vertex(v1):
+        raise ValueError("Vertex not in graph")
+
+    vertices = g.get_vertices()
+    parent = dict.fromkeys(vertices)
+    distance = dict.fromkeys(vertices, float('inf'))
+    visited = set()
+
+    distance[v1] = 0
+    pq = make_queue(queue)
+    pq[v1] = 0
+    # Every queue hands out a vertex once, with its final distance as the priority. A settled vertex only
+    # comes back through a negative edge, so the visited test is left to the (rare) improving relaxations.
+    popitem, out_edges, settle = pq.popitem, g.out_edges, visited.add
+
+    while pq:
+        current_vertex, current_distance = popitem()
+        settle(current_vertex)
+
+        for neighbour, weight in out_edges(current_vertex):
+            new_distance = current_distance + weight
+            if new_distance < distance[neighbour] and neighbour not in visited:
+                pq[neighbour] = new_distance
+                pq_push_count += 1
+                parent[neighbour] = current_vertex
+                distance[neighbour] = new_distance
+    pq_pop_count = len(visited)
+
+    if instrumentation.active() is not None:
+        instrumentation.report("dijkstra", settled=len(visited), relaxed=sum(len(g.out_edges(v)) for v in visited),
+                               push=pq_push_count, pop=pq_pop_count)
+    return parent, distance, pq_push_count, pq_pop_count
 
-def dijkstra(g: 'Graph', v1):
+@instrumentation.timed("multi_source_dijkstra")
+def multi_source_dijkstra(g: 'Graph', sources, queue="heapq"):
     # O((V + E) * log V)
+    # Every source starts at distance 0, so distance[v] is the distance to the nearest source
+    # and nearest[v] is that source (None when v is unreachable from all of them).
     pq_pop_count = 0
     pq_push_count = 0
 
     visited = set()
     parent = {vertex: None for vertex in g.get_vertices()}
     distance = {vertex: float('inf') for vertex in g.get_vertices()}
-
-    neighbours = g._Graph__outbound_neighbours
-
-    if v1 not in g.get_vertices():
-        raise ValueError("Vertex not in graph")
-
-    distance[v1] = 0
-    queue = pqdict({v1: 0})
-
-    while queue:
-        current_vertex = queue.pop()
+    nearest = {vertex: None for vertex in g.get_vertices()}
+
+    pq = make_queue(queue)
+    for source in sources:
+        if not g.is_vertex(source):
+            raise ValueError("Vertex not in graph")
+        distance[source] = 0
+        nearest[source] = source
+        pq[source] = 0
+        pq_push_count += 1
+
+    while pq:
+        current_vertex = pq.pop()
         pq_pop_count += 1
 
         if current_vertex in visited:
             continue
-        else:
-            visited.add(current_vertex)
-
-            for neighbour in neighbours[current_vertex]:
+        visited.add(current_vertex)
 
-                new_distance = distance[current_vertex] + g.get_weight((current_vertex, neighbour))
-
-                if neighbour not in visited and new_distance < distance[neighbour]:
-                    queue[neighbour] = new_distance
-                    pq_push_count += 1
-                    parent[neighbour] = current_vertex
-                    distance[neighbour] = new_distance
+        for neighbour, weight in g.out_edges(current_vertex):
+            new_distance = distance[current_vertex] + weight
+            if neighbour not in visited and new_distance < distance[neighbour]:
+                pq[neighbour] = new_distance
+                pq_push_count += 1
+                parent[neighbour] = current_vertex
+                distance[neighbour] = new_distance
+                nearest[neighbour] = nearest[current_vertex]
+
+    if instrumentation.active() is not None:
+        instrumentation.report("multi_source_dijkstra", settled=len(visited),
+                               relaxed=sum(len(g.out_edges(v)) for v in visited),
+                               push=pq_push_count, pop=pq_pop_count)
+    return parent, distance, nearest, pq_push_count, pq_pop_count
+
+@instrumentation.timed("delta_stepping")
+def delta_stepping(g: 'Graph', v1, delta=None):
+    # O(V + E + (largest distance / delta) + light edge re-relaxations), non negative weights.
+    # Vertices wait in buckets of width delta. A whole bucket is taken at once and its light edges
+    # (weight <= delta) are relaxed until the bucket stays empty, then the heavy edges of every vertex
+    # settled in it are relaxed once. delta=None uses the mean edge weight.
+    # Returns parent, distance, push count (bucket insertions), pop count (vertices taken from buckets).
+    if not g.is_vertex(v1):
+        raise ValueError("Vertex not in graph")
+    if delta is None:
+        weights = list(g.get_edges().values()) if g.weighted() == "weighted" else []
+        delta = max(1, sum(weights) / len(weights)) if weights else 1
+    if delta <= 0:
+        raise ValueError("delta has to be positive")
+    pq_pop_count = 0
+    pq_push_count = 0
 
+    parent = {vertex: None for vertex in g.get_vertices()}
+    distance = {vertex: float('inf') for vertex in g.get_vertices()}
+    buckets = defaultdict(set)
+
+    def relax(vertex, new_distance, through):
+        nonlocal pq_push_count
+        if new_distance < distance[vertex]:
+            if distance[vertex] != float('inf'):
+                buckets[int(distance[vertex] // delta)].discard(vertex)
+            buckets[int(new_distance // delta)].add(vertex)
+            pq_push_count += 1
+            distance[vertex] = new_distance
+            parent[vertex] = through
+
+    relax(v1, 0, None)
+    current = 0
+    while True:
+        while buckets and not buckets.get(current):
+            buckets.pop(current, None)
+            current += 1
+        if not buckets:
+            break
+        settled = []
+        while buckets.get(current):
+            frontier = buckets.pop(current)
+            pq_pop_count += len(frontier)
+            settled.extend(frontier)
+            for vertex in frontier:
+                for neighbour, weight in g.out_edges(vertex):
+                    if weight <= delta:
+                        relax(neighbour, distance[vertex] + weight, vertex)
+        buckets.pop(current, None)
+        for vertex in settled:
+            for neighbour, weight in g.out_edges(vertex):
+                if weight > delta:
+                    relax(neighbour, distance[vertex] + weight, vertex)
+        current += 1
+
+    if instrumentation.active() is not None:
+        reached = [vertex for vertex, value in distance.items() if value != float('inf')]
+        instrumentation.report("delta_stepping", settled=len(reached),
+                               relaxed=sum(len(g.out_edges(v)) for v in reached),
+                               push=pq_push_count, pop=pq_pop_count)
     return parent, distance, pq_push_count, pq_pop_count
 
-def A_star(g : 'Graph', start, goal, filename):
+@instrumentation.timed("A_star")
+def A_star(g : 'Graph', start, goal, filename=None, heuristic=None, queue="heapq"):
     # Worst case: O((V + E) * log V)
     # Best case: O(E)
+    # The positions file is parsed once and kept on the graph, filename=None uses the attached positions.
+    # Any other lower bound provider with a heuristic_to(goal) method (e.g. Landmarks) can be passed as heuristic.
+    # The integer queues ("dial", "radix") also need integer heuristic values that never overestimate an edge
+    # (a consistent heuristic such as Landmarks on integer weights), the euclidean one only works with the others.
     pq_pop_count = 0
     pq_push_count = 0
 
-    def heuristic(v):
-        x1, y1 = g.get_coordinates(v, filename)
-        x2, y2 = g.get_coordinates(goal, filename)
-        return math.sqrt((x1 - x2) ** 2 + (y1 - y2) ** 2)
-
-    if start not in g.get_vertices() or goal not in g.get_vertices():
+    if not g.is_vertex(start) or not g.is_vertex(goal):
         raise ValueError("Start or goal vertex not in graph")
 
+    if heuristic is None:
+        heuristic = g.get_positions(filename)
+    heuristic = heuristic.heuristic_to(goal)
+
     g_score = {vertex: float('inf') for vertex in g.get_vertices()}
     g_score[start] = 0
 
     parent = {vertex: None for vertex in g.get_vertices()}
 
-    queue = pqdict({start: heuristic(start)})
+    pq = make_queue(queue)
+    pq[start] = heuristic(start)
 
-    neighbours = g._Graph__outbound_neighbours
-
-    while queue:
-        current = queue.pop()
+    while pq:
+        current = pq.pop()
         pq_pop_count += 1
         if current == goal:
-            return parent, g_score, pq_push_count, pq_pop_count
+            break
 
-        for neighbour in neighbours.get(current, []):
-            new_distance = g_score[current] + g.get_weight((current, neighbour))
+        for neighbour, weight in g.out_edges(current):
+            new_distance = g_score[current] + weight
             if new_distance < g_score[neighbour]:
                 parent[neighbour] = current
                 g_score[neighbour] = new_distance
                 f_score = new_distance + heuristic(neighbour)
-                queue[neighbour] = f_score
+                pq[neighbour] = f_score
                 pq_push_count += 1
-
-    return [], g_score, pq_push_count, pq_pop_count
+    else:
+        parent = []
+
+    if instrumentation.active() is not None:
+        # Every reached vertex that left the queue was expanded, apart from the goal the search stopped at
+        expanded = [vertex for vertex, score in g_score.items()
+                    if score != float('inf') and vertex not in pq and vertex != goal]
+        instrumentation.report("A_star", settled=pq_pop_count, relaxed=sum(len(g.out_edges(v)) for v in expanded),
+                               push=pq_push_count, pop=pq_pop_count)
+    return parent, g_score, pq_push_count, pq_pop_count
+
+def _bidirectional_search(g, start, goal, forward_potential=None, name="bidirectional_dijkstra", queue="heapq"):
+    # O((V + E) * log V)
+    # Forward search over out_edges from start and reverse search over in_edges from goal, always
+    # expanding the smaller queue. Queue keys are distance + potential, the reverse search uses the
+    # negated forward potential, so the search can stop as soon as the two smallest keys add up to
+    # the best start-goal distance seen so far. Both searches use a make_queue(queue).
+    if not g.is_vertex(start) or not g.is_vertex(goal):
+        raise ValueError("Start or goal vertex not in graph")
+    pq_pop_count = 0
+    pq_push_count = 0
+    if start == goal:
+        return [start], 0, pq_push_count, pq_pop_count
+
+    if forward_potential is None:
+        potentials = (lambda v: 0, lambda v: 0)
+    else:
+        potentials = (forward_potential, lambda v: -forward_potential(v))
+    edges = (g.out_edges, g.in_edges)
+    distance = ({start: 0}, {goal: 0})
+    parent = ({start: None}, {goal: None})
+    settled = (set(), set())
+    queues = (make_queue(queue), make_queue(queue))
+    queues[0][start] = potentials[0](start)
+    queues[1][goal] = potentials[1](goal)
+    best = float('inf')
+    meeting = None
+
+    while queues[0] and queues[1]:
+        if queues[0].topitem()[1] + queues[1].topitem()[1] >= best:
+            break
+        side = 0 if len(queues[0]) <= len(queues[1]) else 1
+        other = 1 - side
+
+        current = queues[side].pop()
+        pq_pop_count += 1
+        settled[side].add(current)
+        current_distance = distance[side][current]
+        potential = potentials[side]
+
+        for neighbour, weight in edges[side](current):
+            new_distance = current_distance + weight
+            if neighbour not in settled[side] and new_distance < distance[side].get(neighbour, float('inf')):
+                distance[side][neighbour] = new_distance
+                parent[side][neighbour] = current
+                queues[side][neighbour] = new_distance + potential(neighbour)
+                pq_push_count += 1
+            through = distance[other].get(neighbour)
+            if through is not None and new_distance + through < best:
+                best = new_distance + through
+                # The meeting edge, oriented from the start side to the goal side
+                meeting = (current, neighbour) if side == 0 else (neighbour, current)
+
+    if instrumentation.active() is not None:
+        instrumentation.report(name, settled=len(settled[0]) + len(settled[1]),
+                               relaxed=sum(len(g.out_edges(v)) for v in settled[0])
+                               + sum(len(g.in_edges(v)) for v in settled[1]),
+                               push=pq_push_count, pop=pq_pop_count)
+    if meeting is None:
+        return [], best, pq_push_count, pq_pop_count
+    path = reconstruct_path(parent[0], meeting[0])
+    path.extend(reversed(reconstruct_path(parent[1], meeting[1])))
+    return path, best, pq_push_count, pq_pop_count
+
+@instrumentation.timed("bidirectional_dijkstra")
+def bidirectional_dijkstra(g: 'Graph', start, goal, queue="heapq"):
+    # O((V + E) * log V), returns path, cost, pq_push_count, pq_pop_count
+    # queue picks the priority queue of both searches like in dijkstra (integer weights for "dial" and "radix")
+    return _bidirectional_search(g, start, goal, queue=queue)
+
+@instrumentation.timed("bidirectional_A_star")
+def bidirectional_A_star(g: 'Graph', start, goal, positions=None, queue="heapq"):
+    # O((V + E) * log V), returns path, cost, pq_push_count, pq_pop_count
+    # positions is a VertexPositions or Landmarks (or a positions filename, None for the ones attached to g).
+    # Both searches use the average potential (h_goal(v) - h_start(v)) / 2, which keeps the
+    # stopping rule of bidirectional Dijkstra exact. The average is neither a whole number nor monotone in
+    # general, so the integer queues ("dial", "radix") raise ValueError here, the heap based ones work.
+    if positions is None or isinstance(positions, str):
+        positions = g.get_positions(positions)
+    if not g.is_vertex(start) or not g.is_vertex(goal):
+        raise ValueError("Start or goal vertex not in graph")
+    to_goal = positions.heuristic_to(goal)
+    from_start = positions.heuristic_from(start)
+    return _bidirectional_search(g, start, goal, lambda v: (to_goal(v) - from_start(v)) / 2,
+                                 "bidirectional_A_star", queue)
 
 def reconstruct_path(parent, goal):
     # O(V)
@@ -92,46 +297,61 @@ def reconstruct_path(parent, goal):
     return path
 
 
-def test_algorithms(graph_file, start, goal, coordinates_file):
+def test_algorithms(graph_file, start, goal, coordinates_file, profile=None):
+    # profile names a JSON file for the counters, phase times and sampled hot spots of the runs
     g = Graph.create_from_file(graph_file)
     print(g.return_edges())
     print(
         f"Loaded graph with {g.get_v()} vertices and {g.get_e()} edges."
     )
+    g.load_positions(coordinates_file)
+    if start is None:
+        start = g.get_vertices()[0]
+    if goal is None:
+        goal = g.get_vertices()[-1]
 
-    g.reset_cost()
+    with instrumentation.recording(sample_interval=0.001 if profile else None) as recorder:
+        parent_dij, distance_dij, _, _ = dijkstra(g, start)
+        dij_cost = distance_dij.get(goal, float('inf'))
+        dij_path = reconstruct_path(parent_dij, goal)
 
-    start_time = time.perf_counter()
-    parent_dij, distance_dij, pq_push, pq_pop = dijkstra(g, start)
-    dij_time = (time.perf_counter() - start_time) * 1000  # in ms
-    dij_cost = distance_dij.get(goal, float('inf'))
-    dij_path = reconstruct_path(parent_dij, goal)
-    dij_cost_calls = g.get_cost()
+        parent_A_star, distance_A_star, _, _ = A_star(g, start, goal, coordinates_file)
+        A_star_cost = distance_A_star.get(goal, float('inf'))
+        A_star_path = reconstruct_path(parent_A_star, goal)
 
-    g.reset_cost()
-
-    start_time = time.perf_counter()
-    parent_A_star, distance_A_star, A_pq_push, A_pq_pop = A_star(g, start, goal, coordinates_file)
-    A_star_time = (time.perf_counter() - start_time) * 1000  # in ms
-    A_star_cost = distance_A_star.get(goal, float('inf'))
-    A_star_path = reconstruct_path(parent_A_star, goal)
-    A_star_cost_calls = g.get_cost()
+        bi_dij_path, bi_dij_cost, _, _ = bidirectional_dijkstra(g, start, goal)
+        bi_A_star_path, bi_A_star_cost, _, _ = bidirectional_A_star(g, start, goal, coordinates_file)
 
+    times = {name: total * 1000 for name, (_, total) in recorder.phases.items()}
     # Print the outputs in the requested format.
     print(f"Minimum cost walk from {start} to {goal}:")
-    print(f"Dijkstra: time: {dij_time:.2f}ms, cost: {dij_cost}, path: {', '.join(dij_path)}")
-    print(f"A*: time: {A_star_time:.2f}ms, cost: {A_star_cost}, path: {', '.join(A_star_path)}")
+    print(f"Dijkstra: time: {times['dijkstra']:.2f}ms, cost: {dij_cost}, path: {', '.join(dij_path)}")
+    print(f"A*: time: {times['A_star']:.2f}ms, cost: {A_star_cost}, path: {', '.join(A_star_path)}")
+    print(f"Bi-Dijkstra: time: {times['bidirectional_dijkstra']:.2f}ms, cost: {bi_dij_cost}, "
+          f"path: {', '.join(bi_dij_path)}")
+    print(f"Bi-A*: time: {times['bidirectional_A_star']:.2f}ms, cost: {bi_A_star_cost}, "
+          f"path: {', '.join(bi_A_star_path)}")
 
     print("\nComparison:")
-    print(f"            g.cost   PQ.push   PQ.pop")
-    print(f"Dijkstra {dij_cost_calls:8} {pq_push:8} {pq_pop:8}")
-    print(f"A*       {A_star_cost_calls:8} {A_pq_push:8} {A_pq_pop:8}")
+    print(f"          settled  relaxed   PQ.push   PQ.pop")
+    for label, name in (("Dijkstra", "dijkstra"), ("A*", "A_star"), ("Bi-Dij", "bidirectional_dijkstra"),
+                        ("Bi-A*", "bidirectional_A_star")):
+        counters = [recorder.counters[f"{name}.{counter}"] for counter in ("settled", "relaxed", "push", "pop")]
+        print(f"{label:8} {counters[0]:8} {counters[1]:8} {counters[2]:9} {counters[3]:8}")
+    if profile:
+        recorder.save_json(profile)
+        print(f"Profile written to {profile}")
 
 
 if __name__ == '__main__':
-    graph_file = "A3_v10000_e40000_positives_7.txt"
-    start_vertex = input("Enter the start vertex: ")
-    goal_vertex = input("Enter the goal vertex: ")
-    coordinates_file = "A3_v10000_e40000_positives_7_vertex_positions.txt"
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare the shortest path algorithms on one graph file.")
+    parser.add_argument("graph_file", nargs="?", default="A3_v10000_e40000_positives_7.txt")
+    parser.add_argument("coordinates_file", nargs="?", default="A3_v10000_e40000_positives_7_vertex_positions.txt")
+    parser.add_argument("--start", help="start vertex, the first vertex of the file by default")
+    parser.add_argument("--goal", help="goal vertex, the last vertex of the file by default")
+    parser.add_argument("--profile", help="write counters, phase times and sampled hot spots to this JSON file")
+    args = parser.parse_args()
 
-    test_algorithms(graph_file, start_vertex, goal_vertex, coordinates_file)
\ No newline at end of file
+    test_algorithms(args.graph_file, args.start, args.goal, args.coordinates_file, args.profile)
@@ -0,0 +1,269 @@
+from collections.abc import Mapping
+from iterators import NeighbourIterator, InboundNeighbourIterator, BFS, DFS
+
+# Read only O(1) views of a graph (a Graph, a CSRGraph or another view) with the same query interface,
+# so the algorithms take them like the graph itself. Nothing is copied: every query goes to the
+# underlying graph, which keeps changing under the view (get_version is the one of the graph).
+# Graph.reversed(), as_undirected() and as_unweighted() create them.
+
+
+class _GraphView:
+    def __init__(self, graph):
+        # Theta(1)
+        self.__graph = graph
+
+    def base(self):
+        # Theta(1), the graph under the view
+        return self.__graph
+
+    def get_version(self):
+        return self.__graph.get_version()
+
+    def get_vertices(self):
+        return self.__graph.get_vertices()
+
+    def is_vertex(self, vertex):
+        return self.__graph.is_vertex(vertex)
+
+    def get_v(self):
+        return self.__graph.get_v()
+
+    def get_e(self):
+        return self.__graph.get_e()
+
+    def directed(self):
+        return self.__graph.directed()
+
+    def weighted(self):
+        return self.__graph.weighted()
+
+    def is_edge(self, vertex1, vertex2):
+        return self.__graph.is_edge(vertex1, vertex2)
+
+    def get_weight(self, edge):
+        return self.__graph.get_weight(edge)
+
+    def get_edges(self):
+        return self.__graph.get_edges()
+
+    def adjacency(self):
+        return self.__graph.adjacency()
+
+    def inbound_adjacency(self):
+        return self.__graph.inbound_adjacency()
+
+    def out_edges(self, vertex):
+        return self.__graph.out_edges(vertex)
+
+    def in_edges(self, vertex):
+        return self.__graph.in_edges(vertex)
+
+    def get_positions(self, filename=None):
+        return self.__graph.get_positions(filename)
+
+    def get_coordinates(self, vertex, filename=None):
+        return self.get_positions(filename).get_coordinates(vertex)
+
+    def count_neighbours(self, vertex):
+        return len(self.adjacency()[vertex])
+
+    def size_of_outbound_neighbours(self, vertex):
+        return len(self.adjacency()[vertex])
+
+    def size_of_inbound_neighbours(self, vertex):
+        return len(self.inbound_adjacency()[vertex])
+
+    def neighbors(self, vertex):
+        return NeighbourIterator(self, vertex)
+
+    def inbound_neighbours(self, vertex):
+        return InboundNeighbourIterator(self, vertex)
+
+    def neighbors_array(self, vertex):
+        # Theta(deg(vertex)), NumPy array of the outbound neighbours in one call
+        import numpy as np
+        if not self.is_vertex(vertex):
+            raise ValueError("Vertex {} is not in the graph".format(vertex))
+        return np.array(list(self.adjacency()[vertex]))
+
+    def BFS_iter(self, vertex):
+        return BFS(self, vertex)
+
+    def DFS_iter(self, vertex):
+        return DFS(self, vertex)
+
+    def frontier_BFS_iter(self, vertex, direction_optimizing=False):
+        from traversal import FrontierBFS
+        return FrontierBFS(self, vertex, direction_optimizing)
+
+    def reversed(self):
+        return ReversedView(self)
+
+    def as_undirected(self):
+        return UndirectedView(self)
+
+    def as_unweighted(self):
+        return UnweightedView(self)
+
+
+class ReversedView(_GraphView):
+    # Every edge turned around: outbound and inbound neighbours swap. An undirected graph is its own reverse.
+    def is_edge(self, vertex1, vertex2):
+        return self.base().is_edge(vertex2, vertex1)
+
+    def get_weight(self, edge):
+        return self.base().get_weight((edge[1], edge[0]))
+
+    def get_edges(self):
+        # Theta(E)
+        edges = self.base().get_edges()
+        if self.base().directed() == "undirected":
+            return edges
+        return {(v2, v1): weight for (v1, v2), weight in edges.items()}
+
+    def adjacency(self):
+        return self.base().inbound_adjacency()
+
+    def inbound_adjacency(self):
+        return self.base().adjacency()
+
+    def out_edges(self, vertex):
+        return self.base().in_edges(vertex)
+
+    def in_edges(self, vertex):
+        return self.base().out_edges(vertex)
+
+    def reversed(self):
+        return self.base()
+
+
+class _MergedRows(Mapping):
+    # vertex -> {neighbour: weight} over the outbound and inbound edges of a directed graph,
+    # the lighter weight wins when both directions exist
+    def __init__(self, graph):
+        self.__graph = graph
+
+    def __getitem__(self, vertex):
+        # Theta(deg(vertex)), the row is built on access
+        return _merged_edges(self.__graph, vertex)
+
+    def __iter__(self):
+        return iter(self.__graph.get_vertices())
+
+    def __len__(self):
+        return self.__graph.get_v()
+
+
+def _merged_edges(graph, vertex):
+    row = dict(graph.out_edges(vertex))
+    for neighbour, weight in graph.in_edges(vertex):
+        if neighbour not in row or weight < row[neighbour]:
+            row[neighbour] = weight
+    return row
+
+
+class UndirectedView(_GraphView):
+    # Every edge usable in both directions. u -> v and v -> u of a directed graph become one edge with the
+    # lighter of the two weights. Over an undirected graph every query goes straight through, over a
+    # directed one the neighbour rows are merged on access (Theta(deg)) and the edge count takes Theta(E)
+    # once per version of the graph.
+    def __init__(self, graph):
+        super().__init__(graph)
+        self.__count = None
+
+    def __symmetric(self):
+        return self.base().directed() == "undirected"
+
+    def directed(self):
+        return "undirected"
+
+    def get_e(self):
+        # Theta(1) unless the graph changed since the last call
+        if self.__symmetric():
+            return self.base().get_e()
+        version = self.base().get_version()
+        if self.__count is None or self.__count[0] != version:
+            self.__count = (version, len(self.get_edges()))
+        return self.__count[1]
+
+    def is_edge(self, vertex1, vertex2):
+        return self.base().is_edge(vertex1, vertex2) or self.base().is_edge(vertex2, vertex1)
+
+    def get_weight(self, edge):
+        base = self.base()
+        if self.__symmetric():
+            return base.get_weight(edge)
+        weights = [base.get_weight(e) for e in (edge, (edge[1], edge[0])) if base.is_edge(e[0], e[1])]
+        if not weights:
+            raise ValueError("Edge {} does not exist".format(edge))
+        return min(weights)
+
+    def get_edges(self):
+        # Theta(E), each pair once, oriented as the first of its edges in the graph
+        edges = self.base().get_edges()
+        if self.__symmetric():
+            return edges
+        merged = {}
+        for (v1, v2), weight in edges.items():
+            opposite = (v2, v1)
+            if opposite in merged:
+                merged[opposite] = min(merged[opposite], weight)
+            else:
+                merged[(v1, v2)] = weight
+        return merged
+
+    def adjacency(self):
+        if self.__symmetric():
+            return self.base().adjacency()
+        return _MergedRows(self.base())
+
+    def inbound_adjacency(self):
+        return self.adjacency()
+
+    def out_edges(self, vertex):
+        if self.__symmetric():
+            return self.base().out_edges(vertex)
+        return _merged_edges(self.base(), vertex).items()
+
+    def in_edges(self, vertex):
+        return self.out_edges(vertex)
+
+    def as_undirected(self):
+        return self
+
+
+class _UnitEdges:
+    # (neighbour, 1) pairs over one adjacency row, sized like the out_edges views of Graph
+    def __init__(self, row):
+        self.__row = row
+
+    def __iter__(self):
+        for neighbour in self.__row:
+            yield neighbour, 1
+
+    def __len__(self):
+        return len(self.__row)
+
+
+class UnweightedView(_GraphView):
+    # Every edge weighs 1, the weights of the graph stay as they are
+    def weighted(self):
+        return "unweighted"
+
+    def get_weight(self, edge):
+        if not self.base().is_edge(edge[0], edge[1]):
+            raise ValueError("Edge {} does not exist".format(edge))
+        return 1
+
+    def get_edges(self):
+        # Theta(E)
+        return dict.fromkeys(self.base().get_edges(), 1)
+
+    def out_edges(self, vertex):
+        return _UnitEdges(self.base().adjacency()[vertex])
+
+    def in_edges(self, vertex):
+        return _UnitEdges(self.base().inbound_adjacency()[vertex])
+
+    def as_unweighted(self):
+        return self